@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark ``calendar_overview.build_timeline`` against the old linear scan.
+
+Usage::
+
+    python benchmarks/bench_timeline.py [--events 1000,10000,50000] [--blocks 12,96,384]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from calendar_overview import BLOCK_MINUTES, EventIndex, align_to_block, block_overlaps, build_timeline  # noqa: E402
+
+
+def make_events(count: int, now: datetime, seed: int = 1) -> List[Dict[str, object]]:
+    """Events spread over a year either side of ``now``, 15 min to 3 h long."""
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        start = now + timedelta(minutes=rng.randrange(-365 * 24 * 60, 365 * 24 * 60))
+        events.append({"start": start, "end": start + timedelta(minutes=rng.choice((15, 30, 60, 90, 180))), "summary": ""})
+    events.sort(key=lambda evt: evt["start"])
+    return events
+
+
+def linear_timeline(now: datetime, events: List[Dict[str, object]], block_minutes: int, block_count: int) -> str:
+    base = align_to_block(now, block_minutes)
+    delta = timedelta(minutes=block_minutes)
+    chars = []
+    for i in range(block_count):
+        start = base + delta * i
+        end = start + delta
+        event = next((evt for evt in events if block_overlaps(evt, start, end)), None)
+        chars.append("=" if event else "-")
+    return "".join(chars)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--events", default="1000,10000,50000")
+    ap.add_argument("--blocks", default="12,96,384")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--skip-linear", action="store_true", help="Only time the indexed builder")
+    args = ap.parse_args(argv)
+
+    now = datetime(2026, 6, 1, 9, 10, tzinfo=timezone.utc)
+    print(f"{'events':>8} {'blocks':>7} {'linear ms':>10} {'build idx ms':>13} {'query ms':>9}")
+    for n in (int(x) for x in args.events.split(",")):
+        events = make_events(n, now)
+        build = best_of(lambda: EventIndex(events), args.repeat)
+        index = EventIndex(events)
+        for blocks in (int(x) for x in args.blocks.split(",")):
+            indexed = build_timeline(now, index, BLOCK_MINUTES, blocks)
+            query = best_of(lambda: build_timeline(now, index, BLOCK_MINUTES, blocks), args.repeat)
+            if args.skip_linear:
+                linear = float("nan")
+            else:
+                assert linear_timeline(now, events, BLOCK_MINUTES, blocks) == indexed
+                linear = best_of(lambda: linear_timeline(now, events, BLOCK_MINUTES, blocks), args.repeat)
+            print(f"{n:>8} {blocks:>7} {linear * 1000:>10.2f} {build * 1000:>13.2f} {query * 1000:>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic fixtures for the benchmark suite.
+
+The 1k-event feed and the message/kv samples are checked in under
+``benchmarks/fixtures/``; larger feeds are generated on first use into
+``benchmarks/fixtures/generated/`` (not tracked). The same seed always yields
+byte-identical output, which ``--check`` verifies for the checked-in files.
+
+Usage::
+
+    python benchmarks/fixtures.py                 # rewrite the checked-in fixtures
+    python benchmarks/fixtures.py --check         # verify they match the generator
+    python benchmarks/fixtures.py --feed 100000   # pre-generate a larger feed
+    python benchmarks/fixtures.py --tag-repo DIR  # build the branchy tag repository
+
+``--check`` also builds the tag repository in a temporary directory and
+verifies ``build_tags.TagIndex`` finds the same nearest tag as
+``git describe``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+GENERATED_DIR = os.path.join(FIXTURE_DIR, "generated")
+CHECKED_IN_FEED = 1000
+SEED = 20260601
+# Benchmarks render and parse around this instant; feeds span a year around it.
+NOW = datetime(2026, 6, 1, 9, 10, tzinfo=timezone.utc)
+
+SUMMARIES = ("Standup", "1:1", "Design review", "Lunch", "Planning", "Focus time", "Interview",
+             "All hands", "Retro", "Customer call", "Dentist", "Team sync, weekly (room 4B)")
+TZIDS = ("", "", "", "America/New_York", "Europe/Berlin", "Pacific Standard Time", "UTC")
+WELLS = ("weather", "build", "calendar", "cpu", "ram", "net", "alerts")
+
+
+def _fold(line: str) -> str:
+    """RFC 5545 folding at 75 octets, as real servers emit it."""
+    out = []
+    while len(line) > 75:
+        out.append(line[:75])
+        line = " " + line[75:]
+    out.append(line)
+    return "\r\n".join(out)
+
+
+def _stamp(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def make_feed(count: int, seed: int = SEED) -> str:
+    """A VCALENDAR with ``count`` VEVENTs: timed, all-day, zoned, folded and ~5% weekly series."""
+    rng = random.Random(seed)
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Traycer//bench//EN",
+             "BEGIN:VTIMEZONE", "TZID:Custom/Office", "BEGIN:STANDARD", "DTSTART:19701025T030000",
+             "TZOFFSETFROM:+0200", "TZOFFSETTO:+0100", "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+             "END:STANDARD", "BEGIN:DAYLIGHT", "DTSTART:19700329T020000", "TZOFFSETFROM:+0100",
+             "TZOFFSETTO:+0200", "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU", "END:DAYLIGHT", "END:VTIMEZONE"]
+    naive_now = NOW.replace(tzinfo=None)
+    for i in range(count):
+        start = naive_now + timedelta(minutes=15 * rng.randrange(-365 * 96, 365 * 96))
+        minutes = rng.choice((15, 30, 30, 60, 60, 90, 180))
+        summary = rng.choice(SUMMARIES)
+        lines += ["BEGIN:VEVENT", f"UID:bench-{seed}-{i}@traycer", f"DTSTAMP:{_stamp(naive_now)}Z"]
+        kind = rng.random()
+        if kind < 0.05:
+            lines.append(f"DTSTART;VALUE=DATE:{start:%Y%m%d}")
+            lines.append(f"DTEND;VALUE=DATE:{start + timedelta(days=1):%Y%m%d}")
+        else:
+            tzid = rng.choice(TZIDS + ("Custom/Office",))
+            if tzid:
+                lines.append(f"DTSTART;TZID={tzid}:{_stamp(start)}")
+            else:
+                lines.append(f"DTSTART:{_stamp(start)}Z")
+            if rng.random() < 0.5:
+                lines.append(f"DURATION:PT{minutes}M")
+            elif tzid:
+                lines.append(f"DTEND;TZID={tzid}:{_stamp(start + timedelta(minutes=minutes))}")
+            else:
+                lines.append(f"DTEND:{_stamp(start + timedelta(minutes=minutes))}Z")
+            if kind > 0.95:
+                lines.append(f"RRULE:FREQ=WEEKLY;COUNT={rng.randrange(4, 52)}")
+        lines.append(f"SUMMARY:{summary.replace(',', chr(92) + ',')}")
+        if rng.random() < 0.3:
+            lines.append(_fold("DESCRIPTION:" + " ".join(rng.choice(SUMMARIES) for _ in range(rng.randrange(8, 30)))))
+        if rng.random() < 0.2:
+            lines += ["BEGIN:VALARM", "ACTION:DISPLAY", "TRIGGER:-PT10M", "DURATION:PT5M", "END:VALARM"]
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def make_messages(count: int, seed: int = SEED) -> List[Dict[str, object]]:
+    """A producer-like mix: mostly ``set``, some ``bulk``, occasional ``add``/``resize``."""
+    rng = random.Random(seed)
+    msgs: List[Dict[str, object]] = [{"op": "add", "well": w, "width": 160} for w in WELLS]
+    while len(msgs) < count:
+        r = rng.random()
+        if r < 0.75:
+            msg: Dict[str, object] = {"op": "set", "well": rng.choice(WELLS), "text": f"🧠  {rng.randrange(100)}%"}
+            if rng.random() < 0.2:
+                msg["bg"] = f"#33{rng.randrange(1 << 24):06X}"
+            msgs.append(msg)
+        elif r < 0.95:
+            msgs.append({"op": "bulk", "updates": [
+                {"op": "set", "well": w, "text": f"📶  {rng.randrange(20, 600)} Mbps"}
+                for w in rng.sample(WELLS, rng.randrange(2, 5))]})
+        else:
+            msgs.append({"op": "resize", "well": rng.choice(WELLS), "width": rng.choice((120, 160, 220))})
+    return msgs[:count]
+
+
+def make_kv_lines(count: int, seed: int = SEED) -> List[str]:
+    """REPL ``set`` argument strings with quoting, colors and booleans."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        parts = [f'text="{rng.choice(SUMMARIES)} • {rng.randrange(100)}°F"']
+        if rng.random() < 0.5:
+            parts.append(f"fg=hex:FF{rng.randrange(1 << 24):06X}")
+        if rng.random() < 0.3:
+            parts.append(f"bg='#33{rng.randrange(1 << 24):06X}'")
+        if rng.random() < 0.2:
+            parts.append(f"blink={rng.choice(('true', 'false'))}")
+        if rng.random() < 0.2:
+            parts.append('action="start https://ci.example.com/builds?id=42"')
+        out.append(" ".join(parts))
+    return out
+
+
+def checked_in() -> Dict[str, str]:
+    """File name -> expected content of every tracked fixture."""
+    return {
+        f"feed-{CHECKED_IN_FEED}.ics": make_feed(CHECKED_IN_FEED),
+        "messages.ndjson": "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in make_messages(2000)),
+        "kv-lines.txt": "\n".join(make_kv_lines(1000)) + "\n",
+    }
+
+
+def feed_path(count: int) -> str:
+    """Path of the ``count``-event feed, generating it if needed."""
+    if count == CHECKED_IN_FEED:
+        return os.path.join(FIXTURE_DIR, f"feed-{count}.ics")
+    path = os.path.join(GENERATED_DIR, f"feed-{count}-{SEED}.ics")
+    if not os.path.exists(path):
+        os.makedirs(GENERATED_DIR, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8", newline="") as fh:
+            fh.write(make_feed(count))
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def _git(repo: str, *args: str, when: int = 0) -> str:
+    stamp = f"{1780000000 + when * 3600} +0000"
+    env = dict(os.environ, GIT_AUTHOR_NAME="fixture", GIT_AUTHOR_EMAIL="fixture@example.com",
+               GIT_COMMITTER_NAME="fixture", GIT_COMMITTER_EMAIL="fixture@example.com",
+               GIT_AUTHOR_DATE=stamp, GIT_COMMITTER_DATE=stamp)
+    return subprocess.run(["git", "-C", repo, *args], env=env, check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+def make_tag_repo(path: str) -> Tuple[str, str]:
+    """A merge whose nearest tag (``v1.1-side``) is not the first tagged commit in date order.
+
+    ::
+
+        A -- M1 (v2.0-main, newer) -- M2 ------------ H
+         \                                           /
+          X1 -- X2 -- X3 (v1.1-side, older) --------
+
+    From ``H``, ``git describe`` counts 3 commits to ``v1.1-side`` and 5 to
+    ``v2.0-main``; ``git rev-list`` (newest first) reaches ``M1`` first.
+    Returns ``(head sha, expected tag)``.
+    """
+    os.makedirs(path, exist_ok=True)
+    _git(path, "init", "--quiet", "--initial-branch=main")
+    _git(path, "commit", "--quiet", "--allow-empty", "-m", "A", when=0)
+    _git(path, "checkout", "--quiet", "-b", "side")
+    for n in (1, 2, 3):
+        _git(path, "commit", "--quiet", "--allow-empty", "-m", f"X{n}", when=n)
+    _git(path, "tag", "v1.1-side")
+    _git(path, "checkout", "--quiet", "main")
+    _git(path, "commit", "--quiet", "--allow-empty", "-m", "M1", when=100)
+    _git(path, "tag", "v2.0-main")
+    _git(path, "commit", "--quiet", "--allow-empty", "-m", "M2", when=101)
+    _git(path, "merge", "--quiet", "--no-ff", "-m", "H", "side", when=200)
+    return _git(path, "rev-parse", "HEAD"), "v1.1-side"
+
+
+def check_tag_index() -> List[str]:
+    """Problems found resolving the tag fixture with ``TagIndex`` (empty if fine)."""
+    if shutil.which("git") is None:
+        print("git not found; skipping the tag repository check", file=sys.stderr)
+        return []
+    sys.path.insert(0, os.path.join(os.path.dirname(HERE), "scripts"))
+    from build_tags import TagIndex
+
+    tmp = tempfile.mkdtemp(prefix="traycer-tags-")
+    try:
+        repo = os.path.join(tmp, "repo")
+        head, expected = make_tag_repo(repo)
+        described = _git(repo, "describe", "--tags", "--abbrev=0", head)
+        found = TagIndex(Path(repo), path=os.path.join(tmp, "index.json"), fetch_interval=0).lookup(head)
+        problems = []
+        if described != expected:
+            problems.append(f"tag repo: git describe gave {described!r}, fixture expects {expected!r}")
+        if found != expected:
+            problems.append(f"tag repo: TagIndex.lookup gave {found!r}, expected {expected!r}")
+        return problems
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--check", action="store_true", help="Verify the checked-in fixtures instead of writing them")
+    ap.add_argument("--feed", type=int, action="append", default=[], help="Also generate a feed of this many events")
+    ap.add_argument("--tag-repo", metavar="DIR", help="Also build the branchy tag repository in DIR")
+    args = ap.parse_args(argv)
+
+    stale = []
+    for name, content in checked_in().items():
+        path = os.path.join(FIXTURE_DIR, name)
+        if args.check:
+            try:
+                with open(path, "r", encoding="utf-8", newline="") as fh:
+                    if fh.read() != content:
+                        stale.append(name)
+            except OSError:
+                stale.append(name)
+            continue
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            fh.write(content)
+    for count in args.feed:
+        print(feed_path(count))
+    if args.tag_repo:
+        print("%s %s" % make_tag_repo(args.tag_repo))
+    if stale:
+        print(f"Fixtures out of date: {', '.join(stale)} (run benchmarks/fixtures.py)", file=sys.stderr)
+        return 1
+    if args.check:
+        problems = check_tag_index()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the Python producer hot paths.
+
+Runs each benchmark ``--repeat`` times on the synthetic fixtures from
+``benchmarks/fixtures.py`` and writes the results as JSON, tagged with the
+commit, so runs can be compared across changes::
+
+    python benchmarks/run.py --output before.json
+    git checkout my-branch
+    python benchmarks/run.py --output after.json --compare before.json
+
+Benchmarks (select with ``--only``, prefix match):
+
+- ``encode``            ``encode_message`` on the message fixture
+- ``send.memory``       ``TraycerClient.send`` into an in-process fake HUD
+- ``send.unix``         ``TraycerClient.send`` over a Unix socket to the fake HUD
+- ``send_json``         the module-level ``send_json`` helper (shared client)
+- ``parse_kv``          REPL ``key=value`` parsing
+- ``unfold.<n>``        ``unfold_ics_lines`` on an ``n``-event feed
+- ``parse.<n>``         ``parse_ics_events`` over the whole year of the feed
+- ``parse_window.<n>``  ``parse_ics_events`` for today's 24 h window
+- ``timeline.<n>``      ``EventIndex`` build plus ``build_timeline`` (96 blocks)
+- ``coldstart.<name>``  ``python scripts/<name>.py --help`` in a fresh interpreter
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+SCRIPTS = os.path.join(ROOT, "scripts")
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, HERE)
+
+import fixtures  # noqa: E402
+
+RESULT_VERSION = 1
+DEFAULT_SIZES = "1000,10000,100000"
+QUICK_SIZES = "1000,10000"
+COLDSTART_SCRIPTS = ("traycer_cli", "weather", "calendar_overview", "build_stats", "traycer_daemon", "traycer_fakehud")
+TIMELINE_BLOCKS = 96
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Returns a zero-argument callable timing one run; setup cost is excluded.
+    setup: Callable[[], Callable[[], Any]]
+    # Work items per run, for per-item timings (messages, lines, events).
+    items: int = 1
+    teardown: Optional[Callable[[], None]] = None
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        return fh.read()
+
+
+def _messages() -> List[Dict[str, Any]]:
+    with open(os.path.join(fixtures.FIXTURE_DIR, "messages.ndjson"), "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def _kv_lines() -> List[str]:
+    return _read(os.path.join(fixtures.FIXTURE_DIR, "kv-lines.txt")).splitlines()
+
+
+# ---- Send path ----
+def send_benchmarks() -> List[Benchmark]:
+    from traycer_client import TraycerClient, encode_message
+    from traycer_fakehud import FakeHudServer
+
+    msgs = _messages()
+    out: List[Benchmark] = [Benchmark("encode", lambda: lambda: [encode_message(m) for m in msgs], len(msgs))]
+
+    def over(url: str) -> Benchmark:
+        state: Dict[str, Any] = {}
+
+        def setup() -> Callable[[], Any]:
+            state["server"] = FakeHudServer(url).start()
+            client = state["client"] = TraycerClient(url, linger=None)
+            client.send(msgs[0])
+
+            def run() -> None:
+                for m in msgs:
+                    client.send(m)
+            return run
+
+        def teardown() -> None:
+            state["client"].close()
+            state["server"].stop()
+
+        scheme = url.split(":", 1)[0]
+        return Benchmark(f"send.{scheme}", setup, len(msgs), teardown)
+
+    out.append(over("memory://bench"))
+    if hasattr(socket, "AF_UNIX"):
+        sock = os.path.join(tempfile.gettempdir(), f"traycer-bench-{os.getpid()}.sock")
+        out.append(over(f"unix://{sock}"))
+
+    shared: Dict[str, Any] = {}
+
+    def send_json_setup() -> Callable[[], Any]:
+        import traycer_client
+
+        os.environ["TRAYCER_PIPE"] = "memory://bench-shared"
+        shared["server"] = FakeHudServer("memory://bench-shared").start()
+        traycer_client.send_json(msgs[0])
+
+        def run() -> None:
+            for m in msgs:
+                traycer_client.send_json(m)
+        return run
+
+    def send_json_teardown() -> None:
+        import traycer_client
+
+        if traycer_client._default_client is not None:
+            traycer_client._default_client.close()
+        shared["server"].stop()
+
+    out.append(Benchmark("send_json", send_json_setup, len(msgs), send_json_teardown))
+    return out
+
+
+# ---- REPL path ----
+def kv_benchmarks() -> List[Benchmark]:
+    from traycer_cli import parse_kv
+
+    lines = _kv_lines()
+    return [Benchmark("parse_kv", lambda: lambda: [parse_kv(line) for line in lines], len(lines))]
+
+
+# ---- Calendar ----
+def calendar_benchmarks(sizes: List[int]) -> List[Benchmark]:
+    from calendar_overview import EventIndex, build_timeline, parse_ics_events, unfold_ics_lines
+
+    tz = timezone.utc
+    year = (fixtures.NOW - timedelta(days=366), fixtures.NOW + timedelta(days=366))
+    today = (fixtures.NOW - timedelta(hours=12), fixtures.NOW + timedelta(hours=12))
+    out: List[Benchmark] = []
+    raw: Dict[int, str] = {}
+
+    def load(n: int) -> str:
+        # One feed in memory at a time; larger ones are generated on first use.
+        if n not in raw:
+            raw.clear()
+            raw[n] = _read(fixtures.feed_path(n))
+        return raw[n]
+
+    for n in sizes:
+        def timeline(n: int = n) -> Callable[[], Any]:
+            events = parse_ics_events(load(n), tz, *year)
+            return lambda: build_timeline(fixtures.NOW, EventIndex(events), 30, TIMELINE_BLOCKS)
+
+        out += [
+            Benchmark(f"unfold.{n}", lambda n=n: (lambda text=load(n): unfold_ics_lines(text)), n),
+            Benchmark(f"parse.{n}", lambda n=n: (lambda text=load(n): parse_ics_events(text, tz, *year)), n),
+            Benchmark(f"parse_window.{n}", lambda n=n: (lambda text=load(n): parse_ics_events(text, tz, *today)), n),
+            Benchmark(f"timeline.{n}", timeline, n),
+        ]
+    return out
+
+
+# ---- Cold start ----
+def coldstart_benchmarks() -> List[Benchmark]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("TRAYCER_RECORD", None)
+
+    def make(name: str) -> Benchmark:
+        cmd = [sys.executable, os.path.join(SCRIPTS, f"{name}.py"), "--help"]
+        return Benchmark(
+            f"coldstart.{name}",
+            lambda: lambda: subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                           env=env, cwd=SCRIPTS, check=False),
+        )
+
+    return [make(name) for name in COLDSTART_SCRIPTS]
+
+
+def all_benchmarks(sizes: List[int]) -> List[Benchmark]:
+    return send_benchmarks() + kv_benchmarks() + calendar_benchmarks(sizes) + coldstart_benchmarks()
+
+
+# ---- Running ----
+def measure(bench: Benchmark, repeat: int, warmup: int) -> Dict[str, Any]:
+    run = bench.setup()
+    try:
+        for _ in range(warmup):
+            run()
+        times = []
+        gc_was_enabled = gc.isenabled()
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - started)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+    finally:
+        if bench.teardown is not None:
+            bench.teardown()
+    median = statistics.median(times)
+    return {
+        "items": bench.items,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": median,
+        "max_s": max(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "per_item_us": median / bench.items * 1e6,
+    }
+
+
+def git_meta() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", "-C", ROOT, *args], capture_output=True, text=True,
+                                  check=False, timeout=10).stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "scripts"))}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print median ratios against ``baseline``; count benchmarks slower than ``threshold``."""
+    old = baseline.get("results", {})
+    regressions = 0
+    print(f"\n{'benchmark':<28} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+    for name, res in results.items():
+        if name not in old:
+            continue
+        before, now = old[name]["median_s"], res["median_s"]
+        ratio = now / before if before else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  <- slower"
+        print(f"{name:<28} {before * 1000:>12.3f} {now * 1000:>10.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", action="append", default=[], help="Run benchmarks whose name starts with this (repeatable)")
+    ap.add_argument("--sizes", default=None, help=f"Feed sizes in events (default: {DEFAULT_SIZES})")
+    ap.add_argument("--quick", action="store_true", help=f"Smaller feeds ({QUICK_SIZES}) and fewer repeats")
+    ap.add_argument("--repeat", type=int, default=None, help="Timed runs per benchmark (default: 5, quick: 3)")
+    ap.add_argument("--warmup", type=int, default=1, help="Untimed runs first (default: %(default)s)")
+    ap.add_argument("--output", help="Write JSON results here")
+    ap.add_argument("--compare", help="Baseline JSON from an earlier run")
+    ap.add_argument("--threshold", type=float, default=1.2,
+                    help="With --compare, exit 1 if a median is this many times slower (default: %(default)s)")
+    ap.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    args = ap.parse_args(argv)
+
+    sizes = [int(x) for x in (args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)).split(",")]
+    repeat = args.repeat or (3 if args.quick else 5)
+    benches = all_benchmarks(sizes)
+    if args.only:
+        benches = [b for b in benches if any(b.name.startswith(prefix) for prefix in args.only)]
+    if args.list:
+        print("\n".join(b.name for b in benches))
+        return 0
+
+    results: Dict[str, Any] = {}
+    print(f"{'benchmark':<28} {'median ms':>10} {'min ms':>10} {'per item us':>12}")
+    for bench in benches:
+        res = results[bench.name] = measure(bench, repeat, args.warmup)
+        print(f"{bench.name:<28} {res['median_s'] * 1000:>10.3f} {res['min_s'] * 1000:>10.3f} {res['per_item_us']:>12.3f}",
+              flush=True)
+
+    report = {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        **git_meta(),
+        "sizes": sizes,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
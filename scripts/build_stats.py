@@ -7,19 +7,36 @@ import json
 import re
 import subprocess
 import sys
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 
+import traycer_profile as profile
+from traycer_client import TraycerClient, TraycerError, get_client, settle_sends
+from build_tags import DEFAULT_FETCH_INTERVAL, TagIndex, find_git_dir
+from traycer_state import default_state_path
+from traycer_watch import open_watcher
+
 # ---- Config ----
-PIPE_NAME = r"\\.\pipe\TraycerHud"
-PIPE_TIMEOUT_SECONDS = 5.0
 BUILD_WELL_ID = "build"
 BUILD_WELL_WIDTH = 240
 DEPLOYMENTS_ACTION = 'https://github.com/SimX-Inc/unity-client/deployments'
 DEFAULT_FG = "#80F8F8F2"
 DEFAULT_BG = "#8044475A"
+SPOOL_FILE = "spool-build-stats.json"
+# Runs fetched by the main `gh run list` query (the last run and, usually, recent successes).
+# When none of them is a success on the branch, a second `--status success` query of
+# SUCCESS_LIMIT runs looks further back; busy repositories pay for that extra call.
+RUN_LIMIT = 50
+SUCCESS_LIMIT = 30
+# Repositories queried at once in multi-repo mode
+DEFAULT_JOBS = 4
+SUMMARY_WELL_WIDTH = 160
+# --watch: quiet period after a ref change, and the fallback refresh for CI-only changes
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_SAFETY_POLL = 30 * 60.0
 
 PALETTE = {
     "success":   {"label": "✔️", "background": "#8050FA7B"},
@@ -28,6 +45,9 @@ PALETTE = {
     "timed_out": {"label": "⏲️", "background": "#80FFB86C"},
 }
 
+# Worst first: decides the summary well's color
+SEVERITY = ("failure", "timed_out", "cancelled", "success")
+
 # Windows-only flag; harmless elsewhere
 CREATE_NO_WINDOW = 0x08000000
 
@@ -44,6 +64,7 @@ def run_hidden(cmd: list[str], *, timeout: float = 15.0) -> subprocess.Completed
         creationflags=CREATE_NO_WINDOW,
     )
 
+@profile.timed()
 def gh_json(args: list[str], *, timeout: float = 15.0) -> Optional[Any]:
     proc = run_hidden(["gh", *args], timeout=timeout)
     if proc.returncode != 0:
@@ -56,6 +77,7 @@ def gh_json(args: list[str], *, timeout: float = 15.0) -> Optional[Any]:
     except json.JSONDecodeError:
         return None
 
+@profile.timed()
 def git_out(repo_dir: Optional[Path], git_args: list[str], *, timeout: float = 15.0) -> Optional[str]:
     base = ["git"] + (["-C", str(repo_dir)] if repo_dir else [])
     proc = run_hidden(base + git_args, timeout=timeout)
@@ -87,106 +109,277 @@ def fmt_local(iso_ts: Optional[str]) -> str:
     local = dt.astimezone()
     return f"{local.month}/{local.day} {local.strftime('%I:%M %p').lstrip('0')}"
 
-def resolve_version(repo_dir: Optional[Path], sha: Optional[str]) -> Optional[str]:
+@profile.timed()
+def resolve_version(repo_dir: Optional[Path], sha: Optional[str], *,
+                    index: Optional[TagIndex] = None, fetched: Optional[Future] = None) -> Optional[str]:
+    """Tag at ``sha`` (or nearest tag below it), else the short sha.
+
+    ``fetched`` is an in-flight ``index.fetch_if_due`` to wait for first. A
+    passed-in ``index`` is left for the caller to save.
+    """
     if not sha:
         return None
     if repo_dir:
-        # Quietly fetch tags
-        run_hidden(["git", "-C", str(repo_dir), "fetch", "--tags", "--quiet"], timeout=20)
-        exact = git_out(repo_dir, ["tag", "--points-at", sha], timeout=10)
-        if exact:
-            # first non-empty line
-            for line in exact.splitlines():
-                if line.strip():
-                    return line.strip()
-        described = git_out(repo_dir, ["describe", "--tags", "--abbrev=0", sha], timeout=10)
-        if described:
-            return described.strip()
+        own = index is None
+        index = index or TagIndex(repo_dir)
+        if fetched is not None:
+            fetched.result()
+        else:
+            index.fetch_if_due()
+        version = index.lookup(sha)
+        if own:
+            index.save()
+        if version:
+            return version
     return sha[:7] if sha else None
 
-def send_traycer(payload: dict[str, Any]) -> bool:
-    data = json.dumps(payload, ensure_ascii=False) + "\n"
-    deadline = time.time() + PIPE_TIMEOUT_SECONDS
-    last_err: Optional[Exception] = None
-    while time.time() < deadline:
-        try:
-            with open(PIPE_NAME, "w", encoding="utf-8", newline="\n") as pipe:
-                pipe.write(data)
-            return True
-        except OSError as e:
-            last_err = e
-            time.sleep(0.1)
-    # Optional: log to file if you want; stdout/stderr may be invisible under pythonw
-    return False
-
-def ensure_build_well(width: int = BUILD_WELL_WIDTH) -> None:
-    send_traycer({"op": "add", "well": BUILD_WELL_ID, "width": width})
-
-def set_build_text(text: str, fg: str, bg: str, action: Optional[str] = None) -> None:
+def send_traycer(payload: dict[str, Any], client: Optional[TraycerClient] = None) -> bool:
+    try:
+        (client or get_client(state_file=default_state_path(), spool=default_state_path(SPOOL_FILE))).send(payload)
+    except TraycerError:
+        # stdout/stderr may be invisible under pythonw; the failure is counted in
+        # traycer_metrics (set TRAYCER_METRICS to dump it to a file).
+        return False
+    return True
+
+def ensure_build_well(width: int = BUILD_WELL_WIDTH, client: Optional[TraycerClient] = None) -> None:
+    send_traycer({"op": "add", "well": BUILD_WELL_ID, "width": width}, client)
+
+def set_build_text(text: str, fg: str, bg: str, action: Optional[str] = None,
+                   client: Optional[TraycerClient] = None) -> None:
     payload = {"op": "set", "well": BUILD_WELL_ID, "text": text, "fg": fg, "bg": bg}
     if action:
         payload["action"] = action
-    send_traycer(payload)
+    send_traycer(payload, client)
 
-# ---- Main ----
-def main(argv: Optional[list[str]] = None) -> int:
-    p = argparse.ArgumentParser(description="Update Traycer build well from latest GitHub Actions runs.")
-    p.add_argument("--repo-dir", help="Path to local clone (for tag/describe).")
-    p.add_argument("--repo", help="GitHub owner/repo, e.g. org/project. Auto-detected from repo-dir if omitted.")
-    p.add_argument("--branch", default="dev", help="Which branch counts as 'dev' (default: dev).")
-    args = p.parse_args(argv)
+# ---- Targets ----
+@dataclass
+class BuildTarget:
+    repo: Optional[str] = None
+    branch: str = "dev"
+    repo_dir: Optional[Path] = None
+    well: str = BUILD_WELL_ID
+    width: int = BUILD_WELL_WIDTH
+    action: str = DEPLOYMENTS_ACTION
+
+@dataclass
+class BuildStatus:
+    target: BuildTarget
+    text: str
+    fg: str = DEFAULT_FG
+    bg: str = DEFAULT_BG
+    conclusion: Optional[str] = None
+
+def target_for_repo(repo: str, branch: str = "dev", **overrides: Any) -> BuildTarget:
+    name = repo.rstrip("/").split("/")[-1]
+    fields = {"well": f"{BUILD_WELL_ID}-{name}", "action": f"https://github.com/{repo}/deployments"}
+    fields.update({k: v for k, v in overrides.items() if v is not None})
+    return BuildTarget(repo=repo, branch=branch, **fields)
+
+def parse_target(spec: str, default_branch: str = "dev") -> BuildTarget:
+    """``owner/repo[@branch]``"""
+    repo, _, branch = spec.partition("@")
+    return target_for_repo(repo, branch or default_branch)
+
+def load_targets(path: str, default_branch: str = "dev") -> tuple[list[BuildTarget], Optional[str]]:
+    """Targets and optional summary well id from a JSON config::
+
+        {"summary_well": "builds",
+         "repos": [{"repo": "org/app", "branch": "dev", "repo_dir": "C:/src/app", "well": "app"}]}
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    entries = data.get("repos", []) if isinstance(data, dict) else data
+    targets = []
+    for entry in entries:
+        repo_dir = Path(entry["repo_dir"]).resolve() if entry.get("repo_dir") else None
+        repo = entry.get("repo") or (get_repo_from_dir(repo_dir) if repo_dir else None)
+        if not repo:
+            raise ValueError(f"No repo for config entry {entry!r}")
+        targets.append(target_for_repo(
+            repo, entry.get("branch") or default_branch,
+            repo_dir=repo_dir, well=entry.get("well"), width=entry.get("width"), action=entry.get("action"),
+        ))
+    summary = data.get("summary_well") if isinstance(data, dict) else None
+    return targets, summary
+
+# ---- Collection ----
+def collect_build(target: BuildTarget, tag_fetch_interval: float = DEFAULT_FETCH_INTERVAL) -> BuildStatus:
+    """Query one repository and compose its well text."""
+    repo_dir = target.repo_dir
+    repo_args = ["-R", target.repo] if target.repo else []
+
+    index = TagIndex(repo_dir, fetch_interval=tag_fetch_interval) if repo_dir else None
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        # One gh query for both the last run and (usually) the latest successes;
+        # a due tag fetch overlaps it.
+        runs_f = pool.submit(profile.propagate(gh_json), ["run", "list", *repo_args, "-L", str(RUN_LIMIT),
+                                       "--json", "status,conclusion,updatedAt,headSha,headBranch"])
+        fetched = pool.submit(profile.propagate(index.fetch_if_due)) if index else None
+        runs = runs_f.result()
+        runs = runs if isinstance(runs, list) else []
+
+        # Last run (any status)
+        last = runs[0] if runs else None
 
-    repo_dir: Optional[Path] = Path(args.repo_dir).resolve() if args.repo_dir else None
-    repo = args.repo or (get_repo_from_dir(repo_dir) if repo_dir else None)
-    repo_args = ["-R", repo] if repo else []
-
-    # Last run (any status)
-    last_runs = gh_json(["run", "list", *repo_args, "-L", "1", "--json", "status,conclusion,updatedAt"]) or []
-    last = last_runs[0] if isinstance(last_runs, list) and last_runs else None
-
-    # Latest successful run (prefer given branch)
-    successes = gh_json(["run", "list", *repo_args, "--status", "success", "-L", "30",
-                         "--json", "headSha,updatedAt,headBranch"]) or []
-    dev_lower = args.branch.lower()
-    succ = None
-    if isinstance(successes, list):
-        for run in successes:
-            if (run.get("headBranch") or "").lower() == dev_lower:
-                succ = run
-                break
+        # Latest successful run (prefer given branch)
+        successes = [run for run in runs if (run.get("conclusion") or "").lower() == "success"]
+        dev_lower = target.branch.lower()
+        succ = next((run for run in successes if (run.get("headBranch") or "").lower() == dev_lower), None)
+        if succ is None:
+            # Buried under failed/cancelled/other-branch runs: ask for successes only.
+            older = gh_json(["run", "list", *repo_args, "--status", "success", "-L", str(SUCCESS_LIMIT),
+                             "--json", "conclusion,updatedAt,headSha,headBranch"])
+            older = older if isinstance(older, list) else []
+            succ = next((run for run in older if (run.get("headBranch") or "").lower() == dev_lower), None)
+            successes = successes or older
         if succ is None and successes:
             succ = successes[0]
 
+        version = resolve_version(repo_dir, succ.get("headSha"), index=index, fetched=fetched) if succ else None
+    finally:
+        pool.shutdown()
+    if index:
+        index.save()
+
     # Left side: version + time for successful dev (or first success)
     left_label = "<no dev success>"
     left_time = "-"
     if succ:
-        version = resolve_version(repo_dir, succ.get("headSha"))
         if version:
             left_label = version
         left_time = fmt_local(succ.get("updatedAt"))
     left = f"{left_label}  {left_time}"
 
     # Right side: last run status + time
-    fg = DEFAULT_FG
-    bg = DEFAULT_BG
+    status = BuildStatus(target, "")
     state_label = "?"
     if last and (last.get("status") or "").lower() == "completed":
         key = (last.get("conclusion") or "").lower()
         pal = PALETTE.get(key)
         if pal:
             state_label = pal["label"]
-            bg = pal["background"]
+            status.bg = pal["background"]
+            status.conclusion = key
     right = "-" if not last else f"{state_label} {fmt_local(last.get('updatedAt'))}"
 
-    summary = f"{left}  |  {right}"
+    status.text = f"{left}  |  {right}"
+    return status
+
+def collect_all(targets: list[BuildTarget], *, jobs: int = DEFAULT_JOBS,
+                tag_fetch_interval: float = DEFAULT_FETCH_INTERVAL) -> list[BuildStatus]:
+    """Collect every target with at most ``jobs`` repositories in flight; order is preserved."""
+    def one(target: BuildTarget) -> BuildStatus:
+        try:
+            return collect_build(target, tag_fetch_interval)
+        except (OSError, subprocess.SubprocessError) as exc:
+            return BuildStatus(target, f"{target.repo or '?'}  |  error: {type(exc).__name__}")
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(profile.propagate(one), targets))
+
+def summary_update(statuses: list[BuildStatus], well: str) -> dict[str, Any]:
+    """Aggregate well: count of repos per last-run conclusion, colored by the worst one."""
+    counts: dict[str, int] = {}
+    for status in statuses:
+        key = status.conclusion or "unknown"
+        counts[key] = counts.get(key, 0) + 1
+    parts = [f"{PALETTE[key]['label']} {counts[key]}" for key in PALETTE if key in counts]
+    if "unknown" in counts:
+        parts.append(f"? {counts['unknown']}")
+    worst = next((key for key in SEVERITY if key in counts), None)
+    bg = PALETTE[worst]["background"] if worst else DEFAULT_BG
+    return {"well": well, "text": "  ".join(parts) or "-", "fg": DEFAULT_FG, "bg": bg}
+
+# ---- Main ----
+def run_feed(argv: Optional[list[str]] = None, client: Optional[TraycerClient] = None) -> int:
+    """One refresh of the build well(s); also the ``traycer_daemon`` plugin entry point."""
+    p = argparse.ArgumentParser(description="Update Traycer build well(s) from latest GitHub Actions runs.")
+    p.add_argument("--repo-dir", help="Path to local clone (for tag/describe).")
+    p.add_argument("--repo", help="GitHub owner/repo, e.g. org/project. Auto-detected from repo-dir if omitted.")
+    p.add_argument("--branch", default="dev", help="Which branch counts as 'dev' (default: dev).")
+    p.add_argument("--target", action="append", default=[], metavar="OWNER/REPO[@BRANCH]",
+                   help="Additional repository with its own well (build-<name>); repeatable.")
+    p.add_argument("--config", help="JSON file listing repositories (see load_targets).")
+    p.add_argument("--summary-well", help="Also write an aggregated status well with this id.")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                   help="Repositories queried concurrently (default: %(default)s).")
+    p.add_argument("--watch", action="store_true",
+                   help="Keep running and refresh when the clone's HEAD/refs/FETCH_HEAD change.")
+    p.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                   help="With --watch, seconds of quiet before refreshing (default: %(default)s).")
+    p.add_argument("--safety-poll", type=float, default=DEFAULT_SAFETY_POLL / 60,
+                   help="With --watch, minutes between refreshes when nothing changes (default: %(default)s).")
+    p.add_argument("--tag-fetch-interval", type=float, default=DEFAULT_FETCH_INTERVAL / 60,
+                   help="Minutes between 'git fetch --tags' in --repo-dir; 0 never fetches (default: %(default)s).")
+    profile.add_arguments(p)
+    args = p.parse_args(argv)
+    with profile.session(args) as profiler:
+        try:
+            return run_builds(args, client)
+        finally:
+            if profiler is not None:
+                settle_sends(client)
+
+def run_builds(args: argparse.Namespace, client: Optional[TraycerClient] = None) -> int:
+    targets: list[BuildTarget] = []
+    summary_well = args.summary_well
+    if args.config:
+        try:
+            targets, config_summary = load_targets(args.config, args.branch)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"Invalid build_stats config: {exc}", file=sys.stderr)
+            return 1
+        summary_well = summary_well or config_summary
+    targets.extend(parse_target(spec, args.branch) for spec in args.target)
+    if args.repo or args.repo_dir or not targets:
+        # The classic single-repo invocation keeps the "build" well.
+        repo_dir: Optional[Path] = Path(args.repo_dir).resolve() if args.repo_dir else None
+        repo = args.repo or (get_repo_from_dir(repo_dir) if repo_dir else None)
+        targets.insert(0, BuildTarget(repo=repo, branch=args.branch, repo_dir=repo_dir))
 
-    # Send to Traycer
-    ensure_build_well()
-    set_build_text(summary, fg, bg, DEPLOYMENTS_ACTION)
+    if args.watch:
+        return watch_builds(args, targets, summary_well, client)
+    refresh_builds(args, targets, summary_well, client)
     return 0
 
-if __name__ == "__main__":
-    sys.exit(main())
+def refresh_builds(args: argparse.Namespace, targets: list[BuildTarget], summary_well: Optional[str],
+                   client: Optional[TraycerClient] = None) -> None:
+    statuses = collect_all(targets, jobs=args.jobs, tag_fetch_interval=args.tag_fetch_interval * 60)
 
+    # Send to Traycer: wells are created once (the client skips known ones), then one bulk.
+    for target in targets:
+        send_traycer({"op": "add", "well": target.well, "width": target.width}, client)
+    updates = [
+        {"well": st.target.well, "text": st.text, "fg": st.fg, "bg": st.bg, "action": st.target.action}
+        for st in statuses
+    ]
+    if summary_well:
+        send_traycer({"op": "add", "well": summary_well, "width": SUMMARY_WELL_WIDTH}, client)
+        updates.append(summary_update(statuses, summary_well))
+    send_traycer({"op": "bulk", "updates": updates}, client)
 
+def watch_builds(args: argparse.Namespace, targets: list[BuildTarget], summary_well: Optional[str],
+                 client: Optional[TraycerClient] = None) -> int:
+    """Refresh when a watched clone's HEAD/refs/FETCH_HEAD change, else every --safety-poll minutes."""
+    git_dirs = [d for d in (find_git_dir(t.repo_dir) for t in targets if t.repo_dir) if d is not None]
+    if not git_dirs:
+        print("--watch needs at least one --repo-dir (or repo_dir in --config) with a git clone", file=sys.stderr)
+        return 1
+    try:
+        with open_watcher(git_dirs) as watcher:
+            while True:
+                refresh_builds(args, targets, summary_well, client)
+                watcher.reset()
+                if watcher.wait(max(1.0, args.safety_poll * 60)):
+                    # A fetch/commit touches several refs in a row; refresh once it settles.
+                    watcher.settle(args.debounce)
+    except KeyboardInterrupt:
+        return 0
+
+def main(argv: Optional[list[str]] = None) -> int:
+    return run_feed(argv)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Persistent SHA -> tag index for ``build_stats``.
+
+Built from one ``git for-each-ref refs/tags`` listing and kept in the Traycer
+state directory. The listing is only re-read when ``packed-refs`` or
+``refs/tags`` change on disk, and ``git fetch --tags`` runs at most once per
+``fetch_interval``. Exact tags are a dictionary hit; the nearest tag below an
+untagged commit is resolved once with ``git describe --tags --abbrev=0``
+(nearest by graph distance, as the old per-run lookup did) and memoised until
+the tag set changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import traycer_profile as profile
+from traycer_state import default_state_path, read_json, write_json_atomic
+
+# 2: nearest tags come from git describe; older indexes memoised rev-list order.
+INDEX_VERSION = 2
+DEFAULT_FETCH_INTERVAL = 60 * 60.0
+
+# Windows-only flag; keeps git from flashing a console under pythonw
+CREATE_NO_WINDOW = 0x08000000
+
+
+def _spawn_flags() -> dict[str, Any]:
+    return {"creationflags": CREATE_NO_WINDOW} if sys.platform == "win32" else {}
+
+
+def find_git_dir(repo_dir: Path) -> Optional[Path]:
+    """The common git directory of a clone or worktree (where refs live)."""
+    dot_git = repo_dir / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if not dot_git.is_file():
+        return None
+    try:
+        content = dot_git.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    git_dir = (repo_dir / content[len("gitdir:"):].strip()).resolve()
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+        return (git_dir / common).resolve()
+    except OSError:
+        return git_dir
+
+
+def refs_signature(git_dir: Optional[Path]) -> str:
+    """Cheap fingerprint of the tag refs: stat of packed-refs plus every loose tag ref."""
+    if git_dir is None:
+        return ""
+    digest = hashlib.sha1()
+    try:
+        st = os.stat(git_dir / "packed-refs")
+        digest.update(f"packed:{st.st_mtime_ns}:{st.st_size}".encode())
+    except OSError:
+        pass
+    tags_dir = git_dir / "refs" / "tags"
+    for root, dirs, files in os.walk(tags_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(path, tags_dir)}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return digest.hexdigest()
+
+
+class TagIndex:
+    """Tags by commit SHA for one local clone, persisted between runs."""
+
+    def __init__(self, repo_dir: Path, *, fetch_interval: float = DEFAULT_FETCH_INTERVAL,
+                 path: Optional[str] = None) -> None:
+        self.repo_dir = repo_dir
+        self.git_dir = find_git_dir(repo_dir)
+        self.fetch_interval = fetch_interval
+        key = hashlib.sha1(str(repo_dir).encode("utf-8")).hexdigest()[:16]
+        self.path = path or default_state_path(f"build-tags-{key}.json")
+        self.signature = ""
+        self.fetched_at = 0.0
+        self.tags: dict[str, list[str]] = {}
+        self.nearest: dict[str, str] = {}
+        self._dirty = False
+        data = read_json(self.path)
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION and data.get("repo") == str(repo_dir):
+            self.signature = data.get("signature", "")
+            self.fetched_at = float(data.get("fetched_at", 0.0))
+            self.tags = data.get("tags", {})
+            self.nearest = data.get("nearest", {})
+
+    @profile.timed("git_out")
+    def _git(self, args: list[str], timeout: float) -> Optional[str]:
+        proc = subprocess.run(
+            ["git", "-C", str(self.repo_dir), *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False,
+            timeout=timeout,
+            **_spawn_flags(),
+        )
+        return proc.stdout if proc.returncode == 0 else None
+
+    def fetch_if_due(self, *, timeout: float = 20.0) -> bool:
+        """``git fetch --tags`` if the last fetch is older than ``fetch_interval``."""
+        if self.fetch_interval <= 0 or time.time() - self.fetched_at < self.fetch_interval:
+            return False
+        try:
+            self._git(["fetch", "--tags", "--quiet"], timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        # Recorded even on failure: an offline clone shouldn't retry every run.
+        self.fetched_at = time.time()
+        self._dirty = True
+        return True
+
+    def refresh(self) -> None:
+        """Re-read the tag listing if the refs changed since it was built."""
+        signature = refs_signature(self.git_dir)
+        if signature and signature == self.signature:
+            return
+        out = self._git(
+            ["for-each-ref", "refs/tags", "--format=%(objectname)%09%(*objectname)%09%(refname:strip=2)"],
+            timeout=10,
+        )
+        if out is None:
+            return
+        tags: dict[str, list[str]] = {}
+        for line in out.splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3:
+                continue
+            obj, peeled, name = parts
+            # Annotated tags point at a tag object; *objectname is the commit.
+            tags.setdefault(peeled or obj, []).append(name)
+        for names in tags.values():
+            names.sort()
+        if tags != self.tags:
+            self.tags = tags
+            self.nearest = {}
+        self.signature = signature
+        self._dirty = True
+
+    @profile.timed()
+    def _describe(self, sha: str) -> Optional[str]:
+        """Nearest tag below ``sha``, ``""`` if there is none, ``None`` if git failed (e.g. unknown sha)."""
+        try:
+            out = self._git(["describe", "--tags", "--abbrev=0", sha], timeout=10)
+            if out is not None:
+                return out.strip()
+            # describe also fails when no tag is reachable; only that answer is worth keeping.
+            if self._git(["rev-parse", "--verify", "--quiet", f"{sha}^{{commit}}"], timeout=10) is not None:
+                return ""
+        except subprocess.TimeoutExpired:
+            pass
+        return None
+
+    def lookup(self, sha: str) -> Optional[str]:
+        """Tag at ``sha``, else the nearest tag below it, else ``None``."""
+        self.refresh()
+        names = self.tags.get(sha)
+        if names:
+            return names[0]
+        if sha not in self.nearest:
+            found = self._describe(sha) if self.tags else ""
+            if found is None:
+                # Not in the clone yet; ask again once it has been pulled.
+                return None
+            self.nearest[sha] = found
+            self._dirty = True
+        return self.nearest[sha] or None
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "repo": str(self.repo_dir),
+            "signature": self.signature,
+            "fetched_at": self.fetched_at,
+            "tags": self.tags,
+            "nearest": self.nearest,
+        }
+        try:
+            write_json_atomic(self.path, data)
+            self._dirty = False
+        except OSError:
+            pass
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Compact binary cache of parsed calendar events.
+
+One file per feed, next to the cached HTTP body, holding the windowed event
+set of the last parse. A run whose feed is unchanged (same URL, same content
+hash or ETag) loads it with a single read and skips ICS parsing entirely.
+
+Layout (little-endian)::
+
+    header   magic "TRCE", version u16, event count u32, string count u32,
+             window start/end i64, then url, content hash, etag and tz as
+             u16-length-prefixed UTF-8
+    arrays   starts i64[n], ends i64[n], summary index u32[n]
+    strings  offsets u32[m + 1], UTF-8 blob
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from traycer_state import write_bytes_atomic
+
+MAGIC = b"TRCE"
+CACHE_VERSION = 1
+
+_HEADER = struct.Struct("<4sHIIqq")
+_LENGTH = struct.Struct("<H")
+
+
+@dataclass
+class CacheKey:
+    url: str
+    content_hash: str = ""
+    etag: str = ""
+    tz: str = ""
+
+    def matches(self, other: "CacheKey") -> bool:
+        if self.url != other.url or self.tz != other.tz:
+            return False
+        if self.content_hash and other.content_hash:
+            return self.content_hash == other.content_hash
+        return bool(self.etag) and self.etag == other.etag
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode("utf-8")[:0xFFFF]
+    return _LENGTH.pack(len(raw)) + raw
+
+
+def _unpack_str(buf: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _LENGTH.unpack_from(buf, offset)
+    offset += _LENGTH.size
+    return buf[offset:offset + length].decode("utf-8"), offset + length
+
+
+def encode_events(
+    key: CacheKey,
+    events: List[Dict[str, object]],
+    window_start: datetime,
+    window_end: datetime,
+) -> bytes:
+    strings: Dict[str, int] = {}
+    starts: List[int] = []
+    ends: List[int] = []
+    refs: List[int] = []
+    for evt in events:
+        starts.append(int(evt["start"].timestamp()))  # type: ignore[attr-defined]
+        ends.append(int(evt["end"].timestamp()))  # type: ignore[attr-defined]
+        refs.append(strings.setdefault(str(evt["summary"]), len(strings)))
+
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    n, m = len(events), len(blobs)
+    return b"".join((
+        _HEADER.pack(MAGIC, CACHE_VERSION, n, m, int(window_start.timestamp()), int(window_end.timestamp())),
+        _pack_str(key.url),
+        _pack_str(key.content_hash),
+        _pack_str(key.etag),
+        _pack_str(key.tz),
+        struct.pack(f"<{n}q", *starts),
+        struct.pack(f"<{n}q", *ends),
+        struct.pack(f"<{n}I", *refs),
+        struct.pack(f"<{m + 1}I", *offsets),
+        *blobs,
+    ))
+
+
+def decode_events(
+    buf: bytes,
+    key: CacheKey,
+    window_start: datetime,
+    window_end: datetime,
+    tz: timezone,
+) -> Optional[List[Dict[str, object]]]:
+    """Events from an encoded cache, or ``None`` if it is for another feed/body or window."""
+    try:
+        magic, version, n, m, lo, hi = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != CACHE_VERSION:
+            return None
+        offset = _HEADER.size
+        url, offset = _unpack_str(buf, offset)
+        content_hash, offset = _unpack_str(buf, offset)
+        etag, offset = _unpack_str(buf, offset)
+        tz_name, offset = _unpack_str(buf, offset)
+        if not key.matches(CacheKey(url, content_hash, etag, tz_name)):
+            return None
+        if not lo <= window_start.timestamp() or not window_end.timestamp() <= hi:
+            return None
+
+        starts = struct.unpack_from(f"<{n}q", buf, offset)
+        offset += 8 * n
+        ends = struct.unpack_from(f"<{n}q", buf, offset)
+        offset += 8 * n
+        refs = struct.unpack_from(f"<{n}I", buf, offset)
+        offset += 4 * n
+        offsets = struct.unpack_from(f"<{m + 1}I", buf, offset)
+        offset += 4 * (m + 1)
+        blob = buf[offset:]
+        strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(m)]
+    except (struct.error, UnicodeDecodeError, IndexError):
+        return None
+
+    return [
+        {
+            "start": datetime.fromtimestamp(start, tz),
+            "end": datetime.fromtimestamp(end, tz),
+            "summary": strings[ref],
+        }
+        for start, end, ref in zip(starts, ends, refs)
+    ]
+
+
+def load_events(
+    path: str,
+    key: CacheKey,
+    window_start: datetime,
+    window_end: datetime,
+    tz: timezone,
+) -> Optional[List[Dict[str, object]]]:
+    try:
+        with open(path, "rb") as fh:
+            buf = fh.read()
+    except OSError:
+        return None
+    return decode_events(buf, key, window_start, window_end, tz)
+
+
+def store_events(
+    path: str,
+    key: CacheKey,
+    events: List[Dict[str, object]],
+    window_start: datetime,
+    window_end: datetime,
+) -> None:
+    try:
+        write_bytes_atomic(path, encode_events(key, events, window_start, window_end))
+    except OSError:
+        pass
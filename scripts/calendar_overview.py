@@ -1,33 +1,50 @@
 #!/usr/bin/env python3
 """Traycer calendar overview script (single compact well).
 
-Fetch a Google Calendar (ICS) feed and render a compact ASCII overview that can
-be pushed into the Traycer HUD or printed to stdout.
+Fetch one or more Google Calendar (ICS) feeds and render a compact ASCII
+overview that can be pushed into the Traycer HUD or printed to stdout. Several
+feeds are fetched concurrently and merged into one timeline, optionally with a
+distinct busy glyph per feed (``--glyphs``).
 """
 
 from __future__ import annotations
 
 import argparse
-import json
-import os
+import asyncio
+import heapq
+import io
 import re
 import sys
-import urllib.request
 import time
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from calendar_cache import CacheKey, load_events, store_events
+from calendar_recurrence import OccurrenceMemo, expand_series, parse_rrule, series_key
+from calendar_tz import parse_vtimezone, resolve_tzid, warn_unknown_tzid
+from traycer_client import TraycerClient, TraycerError, settle_sends
+import traycer_profile as profile
+from traycer_http import FetchResult, fetch_many
+from traycer_state import WellStateCache, default_state_path
+from traycer_transport import default_url
 
-try:
-    from zoneinfo import ZoneInfo  # Python 3.9+
-except ImportError:  # pragma: no cover
-    ZoneInfo = None  # type: ignore
-
-PIPE_NAME = r"\\.\\pipe\\TraycerHud"
 CALENDAR_ICON = "\U0001F4C5"
 BLOCK_MINUTES = 30
 DEFAULT_BLOCK_COUNT = 12
 DEFAULT_TIMEOUT = 15
-CONNECT_TIMEOUT = 5.0
+# Parse a little past the display window so cached parses stay usable for later runs.
+PARSE_HORIZON = timedelta(hours=12)
+EVENT_PROPERTIES = frozenset({"DTSTART", "DTEND", "SUMMARY", "DURATION", "UID", "RECURRENCE-ID"})
+MULTI_PROPERTIES = frozenset({"RRULE", "RDATE", "EXDATE"})
+# Everything that determines where a series' occurrences fall.
+SERIES_PROPERTIES = ("DTSTART", "DTEND", "DURATION", "RRULE", "RDATE", "EXDATE")
+# Expansion range for recurring events when no display window is given.
+RECURRENCE_SPAN = timedelta(days=31)
+DEFAULT_REVALIDATE_MINUTES = 120
+# --follow: refetch this soon after a failed fetch.
+FOLLOW_RETRY = timedelta(minutes=5)
+SPOOL_FILE = "spool-calendar.json"
 
 _DURATION_RE = re.compile(
     r"P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?",
@@ -35,66 +52,56 @@ _DURATION_RE = re.compile(
 )
 
 
-class TraycerError(Exception):
-    """Raised when the Traycer pipe cannot be written."""
+def _events_cache_path(result: FetchResult) -> str:
+    return result.path + ".events"
+
 
+def _events_cache_key(result: FetchResult, local_tz: timezone) -> CacheKey:
+    return CacheKey(result.url, result.content_hash, result.etag or "", str(local_tz))
 
-class TraycerClient:
-    """Helper for sending JSON messages to the Traycer named pipe."""
 
-    def __init__(self, pipe: str = PIPE_NAME) -> None:
-        self._pipe = pipe
+@profile.timed()
+def load_cached_events(
+    result: FetchResult,
+    local_tz: timezone,
+    window_start: datetime,
+    window_end: datetime,
+) -> Optional[List[Dict[str, object]]]:
+    """Return events parsed from this exact feed body on an earlier run, if they cover the window."""
+    return load_events(
+        _events_cache_path(result), _events_cache_key(result, local_tz), window_start, window_end, local_tz
+    )
 
-    def send(self, payload: Dict[str, object]) -> None:
-        data = json.dumps(payload, separators=(",", ":")) + "\n"
 
-        deadline = time.time() + CONNECT_TIMEOUT
-        last_error: Optional[TraycerError] = None
-        while True:
-            try:
-                with open(self._pipe, "w", encoding="utf-8", newline="\n") as pipe:
-                    pipe.write(data)
-                return
-            except FileNotFoundError as exc:
-                err = TraycerError(f"Traycer pipe not found: {self._pipe}")
-                err.__cause__ = exc
-                last_error = err
-            except OSError as exc:
-                err = TraycerError(f"Failed writing to Traycer pipe: {exc}")
-                err.__cause__ = exc
-                last_error = err
-
-            if time.time() >= deadline:
-                raise last_error if last_error is not None else TraycerError("Failed opening Traycer pipe")
-            time.sleep(0.1)
-
-    def ensure_well(self, well_id: str, width: int, index: Optional[int] = None) -> None:
-        payload: Dict[str, object] = {"op": "add", "well": well_id, "width": width}
-        if index is not None:
-            payload["index"] = index
-        self.send(payload)
-
-    def set_text(self, well_id: str, text: str) -> None:
-        self.send({"op": "set", "well": well_id, "text": text})
-
-
-def fetch_ical(url: str, timeout: int = DEFAULT_TIMEOUT) -> str:
-    request = urllib.request.Request(url, headers={"User-Agent": "traycer-calendar/1.0"})
-    with urllib.request.urlopen(request, timeout=timeout) as response:  # nosec: user-supplied URL
-        charset = response.headers.get_content_charset() or "utf-8"
-        body = response.read()
-    return body.decode(charset, errors="replace")
+@profile.timed()
+def store_cached_events(
+    result: FetchResult,
+    events: List[Dict[str, object]],
+    local_tz: timezone,
+    window_start: datetime,
+    window_end: datetime,
+) -> None:
+    store_events(_events_cache_path(result), _events_cache_key(result, local_tz), events, window_start, window_end)
+
+
+def iter_unfolded_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Unfold RFC 5545 continuation lines while streaming."""
+    pending: Optional[str] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith(" ") or line.startswith("\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
 
 
 def unfold_ics_lines(raw: str) -> List[str]:
-    lines: List[str] = []
-    for line in raw.splitlines():
-        if line.startswith(" ") or line.startswith("\t"):
-            if lines:
-                lines[-1] += line[1:]
-        else:
-            lines.append(line)
-    return lines
+    return list(iter_unfolded_lines(raw.splitlines()))
 
 
 def unescape_ical_text(value: str) -> str:
@@ -120,90 +127,288 @@ def parse_duration(raw: str) -> Optional[timedelta]:
     )
 
 
-def parse_ical_datetime(value: str, params: Dict[str, str], local_tz: timezone) -> datetime:
-    value = value.strip()
-    tzid = params.get("TZID")
-    value_type = params.get("VALUE", "DATE-TIME").upper()
-
-    if value_type == "DATE":
-        dt = datetime.strptime(value, "%Y%m%d")
-        return dt.replace(tzinfo=local_tz)
-
+def _parse_basic_datetime(value: str) -> Tuple[datetime, bool]:
+    """Fixed-width ``YYYYMMDD[THHMM[SS]][Z]`` -> (naive datetime, is_utc)."""
     is_utc = value.endswith("Z")
     if is_utc:
         value = value[:-1]
-
-    dt_obj: Optional[datetime] = None
-    for fmt in ("%Y%m%dT%H%M%S", "%Y%m%dT%H%M"):
-        try:
-            dt_obj = datetime.strptime(value, fmt)
-            break
-        except ValueError:
-            continue
-    if dt_obj is None:
-        raise ValueError(f"Unsupported datetime format: {value}")
-
+    n = len(value)
+    try:
+        if n == 8:
+            return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8])), is_utc
+        if (n == 15 or n == 13) and value[8] == "T":
+            return (
+                datetime(
+                    int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15]) if n == 15 else 0,
+                ),
+                is_utc,
+            )
+    except ValueError:
+        pass
+    raise ValueError(f"Unsupported datetime format: {value}")
+
+
+def parse_ical_datetime_zoned(
+    value: str,
+    params: Dict[str, str],
+    local_tz: timezone,
+    zones: Optional[Dict[str, tzinfo]] = None,
+) -> datetime:
+    """Parse a DATE/DATE-TIME value, keeping its own zone (TZID, UTC or local).
+
+    ``zones`` holds the feed's own VTIMEZONE definitions, used for TZIDs that
+    are neither IANA nor Windows zone names.
+    """
+    dt_obj, is_utc = _parse_basic_datetime(value.strip())
+    if params.get("VALUE", "DATE-TIME").upper() == "DATE":
+        return dt_obj.replace(tzinfo=local_tz)
     if is_utc:
-        dt_obj = dt_obj.replace(tzinfo=timezone.utc)
-    elif tzid and ZoneInfo is not None:
-        try:
-            dt_obj = dt_obj.replace(tzinfo=ZoneInfo(tzid))
-        except Exception:
-            dt_obj = dt_obj.replace(tzinfo=local_tz)
+        return dt_obj.replace(tzinfo=timezone.utc)
+
+    tzid = params.get("TZID")
+    if tzid:
+        zone = resolve_tzid(tzid) or (zones or {}).get(tzid.strip('"'))
+        if zone is not None:
+            return dt_obj.replace(tzinfo=zone)
+        warn_unknown_tzid(tzid)
+    return dt_obj.replace(tzinfo=local_tz)
+
+
+def parse_ical_datetime(
+    value: str,
+    params: Dict[str, str],
+    local_tz: timezone,
+    zones: Optional[Dict[str, tzinfo]] = None,
+) -> datetime:
+    return parse_ical_datetime_zoned(value, params, local_tz, zones).astimezone(local_tz)
+
+
+def split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    key_part, value = line.split(":", 1)
+    parts = key_part.split(";")
+    params: Dict[str, str] = {}
+    for part in parts[1:]:
+        if "=" in part:
+            p_key, p_val = part.split("=", 1)
+            params[p_key.upper()] = p_val
+    return parts[0].upper(), params, value.strip()
+
+
+def _line(props: Dict[str, List[str]], key: str) -> str:
+    return props[key][-1]
+
+
+def event_end(
+    props: Dict[str, List[str]],
+    start: datetime,
+    local_tz: timezone,
+    zones: Optional[Dict[str, tzinfo]] = None,
+) -> datetime:
+    if "DTEND" in props:
+        _, end_params, end_val = split_property(_line(props, "DTEND"))
+        end = parse_ical_datetime(end_val, end_params, local_tz, zones)
+    elif "DURATION" in props:
+        duration = parse_duration(split_property(_line(props, "DURATION"))[2]) or timedelta(minutes=BLOCK_MINUTES)
+        end = start + duration
     else:
-        dt_obj = dt_obj.replace(tzinfo=local_tz)
+        end = start + timedelta(minutes=BLOCK_MINUTES)
+    if end <= start:
+        end = start + timedelta(minutes=BLOCK_MINUTES)
+    return end
 
-    return dt_obj.astimezone(local_tz)
 
+def event_summary(props: Dict[str, List[str]]) -> str:
+    return unescape_ical_text(split_property(_line(props, "SUMMARY"))[2]).strip() if "SUMMARY" in props else ""
 
-def parse_ics_events(raw: str, local_tz: timezone) -> List[Dict[str, object]]:
-    events: List[Dict[str, object]] = []
-    current: Dict[str, Tuple[str, Dict[str, str]]] = {}
-    inside_event = False
 
-    for line in unfold_ics_lines(raw):
-        if line.startswith("BEGIN:VEVENT"):
-            inside_event = True
-            current = {}
+def build_event(
+    props: Dict[str, List[str]],
+    local_tz: timezone,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    zones: Optional[Dict[str, tzinfo]] = None,
+) -> Optional[Dict[str, object]]:
+    """Build an event from its raw property lines, or ``None`` if it falls outside the window."""
+    if "DTSTART" not in props:
+        return None
+    # DTSTART first: most events in a long-lived feed end here without further work.
+    _, start_params, start_val = split_property(_line(props, "DTSTART"))
+    start = parse_ical_datetime(start_val, start_params, local_tz, zones)
+    if window_end is not None and start >= window_end:
+        return None
+    end = event_end(props, start, local_tz, zones)
+    if window_start is not None and end <= window_start:
+        return None
+    return {
+        "start": start,
+        "end": end,
+        "summary": event_summary(props),
+    }
+
+
+def _date_list(lines: List[str], local_tz: timezone, zones: Optional[Dict[str, tzinfo]]) -> List[datetime]:
+    out: List[datetime] = []
+    for line in lines:
+        _, params, value = split_property(line)
+        if params.get("VALUE", "").upper() == "PERIOD":
+            continue
+        out.extend(parse_ical_datetime_zoned(v, params, local_tz, zones) for v in value.split(",") if v.strip())
+    return out
+
+
+def expand_event(
+    props: Dict[str, List[str]],
+    local_tz: timezone,
+    window_start: datetime,
+    window_end: datetime,
+    overridden: Iterable[int] = (),
+    memo: Optional[OccurrenceMemo] = None,
+    zones: Optional[Dict[str, tzinfo]] = None,
+) -> Iterator[Dict[str, object]]:
+    """Yield the occurrences of a recurring event that overlap the window."""
+    _, start_params, start_val = split_property(_line(props, "DTSTART"))
+    # Expand in the series' own zone so occurrences keep their wall-clock time across DST.
+    dtstart = parse_ical_datetime_zoned(start_val, start_params, local_tz, zones)
+    duration = event_end(props, dtstart.astimezone(local_tz), local_tz, zones) - dtstart
+    uid = split_property(_line(props, "UID"))[2] if "UID" in props else ""
+
+    if memo is not None:
+        span_start, span_end = memo.memo_window(window_start, window_end)
+        shape = [line for key in SERIES_PROPERTIES for line in props.get(key, ())]
+        key = series_key(uid, shape + [str(local_tz)])
+        starts = memo.lookup(key, span_start, span_end)
+    else:
+        span_start, span_end, key, starts = window_start, window_end, "", None
+
+    if starts is None:
+        try:
+            rules = [parse_rrule(split_property(line)[2], dtstart.tzinfo) for line in props.get("RRULE", ())]
+        except ValueError:
+            rules = []
+        rdates = _date_list(props.get("RDATE", []), local_tz, zones)
+        exdates = [dt.timestamp() for dt in _date_list(props.get("EXDATE", []), local_tz, zones)]
+        starts = expand_series(dtstart, duration, span_start, span_end, rules, rdates, exdates)
+        if memo is not None:
+            memo.store(key, span_start, span_end, starts)
+
+    skip = set(overridden)
+    summary = event_summary(props)
+    for ts in starts:
+        if int(ts) in skip:
+            continue
+        start = datetime.fromtimestamp(ts, local_tz)
+        end = start + duration
+        if start < window_end and end > window_start:
+            yield {"start": start, "end": end, "summary": summary}
+
+
+def iter_ics_events(
+    lines: Iterable[str],
+    local_tz: timezone,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    memo: Optional[OccurrenceMemo] = None,
+) -> Iterator[Dict[str, object]]:
+    """Stream events from ICS lines, keeping only one VEVENT's properties at a time.
+
+    Events that end before ``window_start`` or start at/after ``window_end``
+    are dropped without being built. Recurring masters are held until the end
+    of the feed (overrides may follow them) and then expanded inside the
+    window; without a window they are expanded over ``RECURRENCE_SPAN``.
+    VTIMEZONE blocks (which precede the events using them) are collected for
+    TZIDs that ``resolve_tzid`` does not know.
+    """
+    if window_start is None or window_end is None:
+        now = datetime.now(local_tz)
+        span_start, span_end = window_start or now, window_end or now + RECURRENCE_SPAN
+    else:
+        span_start, span_end = window_start, window_end
+
+    zones: Dict[str, tzinfo] = {}
+    vtimezone: Optional[List[str]] = None
+    masters: List[Dict[str, List[str]]] = []
+    overridden: Dict[str, Set[int]] = {}
+    props: Optional[Dict[str, List[str]]] = None
+    depth = 0
+    for line in iter_unfolded_lines(lines):
+        if vtimezone is not None:
+            if line.startswith("END:VTIMEZONE"):
+                zone = parse_vtimezone(vtimezone)
+                if zone is not None:
+                    zones[zone.tzid] = zone
+                vtimezone = None
+            else:
+                vtimezone.append(line)
+            continue
+        if props is None:
+            if line.startswith("BEGIN:VEVENT"):
+                props = {}
+                depth = 0
+            elif line.startswith("BEGIN:VTIMEZONE"):
+                vtimezone = []
             continue
         if line.startswith("END:VEVENT"):
-            if inside_event and "DTSTART" in current:
-                start_val, start_params = current["DTSTART"]
-                start = parse_ical_datetime(start_val, start_params, local_tz)
-                if "DTEND" in current:
-                    end_val, end_params = current["DTEND"]
-                    end = parse_ical_datetime(end_val, end_params, local_tz)
-                elif "DURATION" in current:
-                    duration = parse_duration(current["DURATION"][0]) or timedelta(minutes=BLOCK_MINUTES)
-                    end = start + duration
-                else:
-                    end = start + timedelta(minutes=BLOCK_MINUTES)
-                if end <= start:
-                    end = start + timedelta(minutes=BLOCK_MINUTES)
-                summary = unescape_ical_text(current.get("SUMMARY", ("", {}))[0]) if "SUMMARY" in current else ""
-                events.append({
-                    "start": start,
-                    "end": end,
-                    "summary": summary.strip(),
-                })
-            inside_event = False
-            current = {}
+            current, props = props, None
+            if "DTSTART" not in current:
+                continue
+            if "RECURRENCE-ID" in current:
+                # A moved/edited instance: suppress the generated occurrence it replaces.
+                _, rid_params, rid_val = split_property(_line(current, "RECURRENCE-ID"))
+                uid = split_property(_line(current, "UID"))[2] if "UID" in current else ""
+                rid = parse_ical_datetime(rid_val, rid_params, local_tz, zones)
+                overridden.setdefault(uid, set()).add(int(rid.timestamp()))
+            elif "RRULE" in current or "RDATE" in current:
+                masters.append(current)
+                continue
+            event = build_event(current, local_tz, window_start, window_end, zones)
+            if event is not None:
+                yield event
+            continue
+        # Nested components (VALARM) carry their own DURATION etc.; skip them.
+        if line.startswith("BEGIN:"):
+            depth += 1
             continue
-        if not inside_event:
+        if line.startswith("END:"):
+            depth = max(0, depth - 1)
             continue
-        if ":" not in line:
+        if depth or ":" not in line:
             continue
-        key_part, value = line.split(":", 1)
-        parts = key_part.split(";")
-        key = parts[0].upper()
-        params: Dict[str, str] = {}
-        for part in parts[1:]:
-            if "=" in part:
-                p_key, p_val = part.split("=", 1)
-                params[p_key.upper()] = p_val
-        if key in {"DTSTART", "DTEND", "SUMMARY", "DURATION"}:
-            current[key] = (value.strip(), params)
+        key = line.split(":", 1)[0].split(";", 1)[0].upper()
+        if key in MULTI_PROPERTIES:
+            props.setdefault(key, []).append(line)
+        elif key in EVENT_PROPERTIES:
+            props[key] = [line]
+
+    for master in masters:
+        uid = split_property(_line(master, "UID"))[2] if "UID" in master else ""
+        yield from expand_event(master, local_tz, span_start, span_end, overridden.get(uid, ()), memo, zones)
+
+
+@profile.timed()
+def parse_ics_events(
+    raw: str,
+    local_tz: timezone,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    memo: Optional[OccurrenceMemo] = None,
+) -> List[Dict[str, object]]:
+    events = list(iter_ics_events(raw.splitlines(), local_tz, window_start, window_end, memo))
+    events.sort(key=lambda evt: evt["start"])
+    return events
+
 
+@profile.timed()
+def read_ics_events(
+    feed: FetchResult,
+    local_tz: timezone,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    memo: Optional[OccurrenceMemo] = None,
+) -> List[Dict[str, object]]:
+    """Parse a fetched feed line by line straight from its cached body file."""
+    with feed.open() as raw, io.TextIOWrapper(raw, encoding=feed.charset, errors="replace") as text:
+        events = list(iter_ics_events(text, local_tz, window_start, window_end, memo))
     events.sort(key=lambda evt: evt["start"])
     return events
 
@@ -218,32 +423,110 @@ def block_overlaps(event: Dict[str, object], start: datetime, end: datetime) ->
     return event["start"] < end and event["end"] > start  # type: ignore[index]
 
 
+class EventIndex:
+    """Sorted event starts plus running-max ends for O(log n) overlap queries.
+
+    Events starting before ``end`` are a prefix of the start-sorted list; one
+    of them overlaps ``[start, end)`` exactly when the latest end within that
+    prefix is after ``start``.
+    """
+
+    def __init__(self, events: Iterable[Dict[str, object]]) -> None:
+        spans = sorted((evt["start"].timestamp(), evt["end"].timestamp()) for evt in events)  # type: ignore[attr-defined]
+        self.starts = [s for s, _ in spans]
+        self.max_ends: List[float] = []
+        latest = float("-inf")
+        for _, e in spans:
+            latest = max(latest, e)
+            self.max_ends.append(latest)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: float, end: float) -> bool:
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_ends[i - 1] > start
+
+
+def merge_event_streams(streams: Iterable[Iterable[Dict[str, object]]]) -> List[Dict[str, object]]:
+    """k-way merge of per-source, start-sorted event lists."""
+    return list(heapq.merge(*streams, key=lambda evt: evt["start"]))
+
+
+TimelineIndexes = List[Tuple[str, EventIndex]]
+
+
+def timeline_indexes(
+    events: Union[List[Dict[str, object]], EventIndex],
+    glyphs: Optional[str] = None,
+) -> TimelineIndexes:
+    """``(glyph, index)`` pairs in priority order, built once per event set."""
+    if glyphs and not isinstance(events, EventIndex):
+        by_source: Dict[int, List[Dict[str, object]]] = {}
+        for evt in events:
+            by_source.setdefault(int(evt.get("source", 0)), []).append(evt)  # type: ignore[call-overload]
+        return [(glyphs[src % len(glyphs)], EventIndex(evts)) for src, evts in sorted(by_source.items())]
+    return [("=", events if isinstance(events, EventIndex) else EventIndex(events))]
+
+
+def render_timeline(indexes: TimelineIndexes, base: datetime, block_minutes: int, block_count: int) -> str:
+    start = base.timestamp()
+    step = block_minutes * 60
+    chars: List[str] = []
+
+    for _ in range(block_count):
+        end = start + step
+        chars.append(next((glyph for glyph, index in indexes if index.overlaps(start, end)), "-"))
+        start = end
+
+    return "".join(chars)
+
+
+@profile.timed()
 def build_timeline(
     now: datetime,
-    events: List[Dict[str, object]],
+    events: Union[List[Dict[str, object]], EventIndex],
     block_minutes: int,
     block_count: int,
+    glyphs: Optional[str] = None,
 ) -> str:
-    base = align_to_block(now, block_minutes)
-    delta = timedelta(minutes=block_minutes)
-    chars: List[str] = []
+    """Render one char per block: ``-`` free, ``=`` busy.
 
-    for i in range(block_count):
-        start = base + delta * i
-        end = start + delta
-        event = next((evt for evt in events if block_overlaps(evt, start, end)), None)
-        chars.append("=" if event else "-")
+    With ``glyphs``, busy blocks use ``glyphs[source]`` of the first source
+    (in ``url`` order) with an event there; events need a ``source`` index.
+    """
+    indexes = timeline_indexes(events, glyphs)
+    return render_timeline(indexes, align_to_block(now, block_minutes), block_minutes, block_count)
 
-    return "".join(chars)
+
+@profile.timed()
+def compute_frames(
+    now: datetime,
+    events: List[Dict[str, object]],
+    block_minutes: int,
+    block_count: int,
+    frame_count: int,
+    glyphs: Optional[str] = None,
+) -> List[Tuple[datetime, str]]:
+    """Calendar lines for the current block and the next ``frame_count - 1`` boundaries."""
+    indexes = timeline_indexes(events, glyphs)
+    base = align_to_block(now, block_minutes)
+    delta = timedelta(minutes=block_minutes)
+    frames = []
+    for k in range(frame_count):
+        at = base + delta * k
+        frames.append((at, f"{CALENDAR_ICON} {render_timeline(indexes, at, block_minutes, block_count)}"))
+    return frames
 
 
 def compose_calendar_line(
     now: datetime,
-    events: List[Dict[str, object]],
+    events: Union[List[Dict[str, object]], EventIndex],
     block_minutes: int,
     block_count: int,
+    glyphs: Optional[str] = None,
 ) -> str:
-    timeline = build_timeline(now, events, block_minutes, block_count)
+    timeline = build_timeline(now, events, block_minutes, block_count, glyphs)
     return f"{CALENDAR_ICON} {timeline}"
 
 
@@ -264,11 +547,11 @@ def local_timezone() -> timezone:
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Traycer calendar overview driver")
-    parser.add_argument("url", help="Google Calendar secret ICS URL")
+    parser.add_argument("url", nargs="+", help="Google Calendar secret ICS URL(s); several are merged into one timeline")
     parser.add_argument(
         "--pipe",
-        default=os.environ.get("TRAYCER_PIPE", PIPE_NAME),
-        help="Traycer named pipe (default: %(default)s)",
+        default=default_url(),
+        help="Traycer pipe or transport URL (default: %(default)s)",
     )
     parser.add_argument(
         "--blocks",
@@ -299,48 +582,180 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         default=None,
         help="Optional Traycer column index when inserting the well",
     )
+    parser.add_argument(
+        "--glyphs",
+        default=None,
+        help="One busy-block character per URL, in order (e.g. '=#*'); default '=' for all",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep running: push a precomputed frame at each block boundary",
+    )
+    parser.add_argument(
+        "--revalidate",
+        type=int,
+        default=DEFAULT_REVALIDATE_MINUTES,
+        help="With --follow, minutes between feed fetches (default: %(default)s)",
+    )
     parser.add_argument(
         "--stdout-only",
         action="store_true",
         help="Print the calendar line instead of sending it to Traycer",
     )
+    profile.add_arguments(parser)
     return parser.parse_args(argv)
 
 
-def main(argv: Optional[List[str]] = None) -> int:
+def push_line(client: TraycerClient, args: argparse.Namespace, line: str) -> None:
+    client.ensure_well(args.well, args.width, args.index)
+    client.set_text(args.well, line)
+
+
+def feed_events(
+    feed: FetchResult,
+    local_tz: timezone,
+    window_start: datetime,
+    window_end: datetime,
+    memo: Optional[OccurrenceMemo] = None,
+) -> List[Dict[str, object]]:
+    """Start-sorted events of one fetched feed, from the parse cache when the body is unchanged."""
+    events = load_cached_events(feed, local_tz, window_start, window_end)
+    if events is None:
+        parse_end = window_end + PARSE_HORIZON
+        events = read_ics_events(feed, local_tz, window_start, parse_end, memo)
+        store_cached_events(feed, events, local_tz, window_start, parse_end)
+    return events
+
+
+def collect_events(
+    args: argparse.Namespace,
+    local_tz: timezone,
+    window_start: datetime,
+    window_end: datetime,
+) -> Tuple[List[Dict[str, object]], List[str]]:
+    """Fetch every feed and merge their events; raises if none could be loaded."""
+    streams: List[List[Dict[str, object]]] = []
+    errors: List[str] = []
+    # Fetch every feed at once; wall time tracks the slowest feed, not the sum.
+    with profile.span("fetch_many"):
+        results = asyncio.run(fetch_many(args.url, timeout=args.timeout))
+    memo = OccurrenceMemo(default_state_path("recurrence-memo.json"))
+    for source, (url, feed) in enumerate(zip(args.url, results)):
+        if isinstance(feed, BaseException):
+            errors.append(f"{url}: {feed}" if len(args.url) > 1 else str(feed))
+            continue
+        events = feed_events(feed, local_tz, window_start, window_end, memo)
+        for evt in events:
+            evt["source"] = source
+        streams.append(events)
+    memo.save()
+    if not streams:
+        raise RuntimeError("; ".join(errors))
+    for message in errors:
+        print(f"Calendar fetch failed: {message}", file=sys.stderr)
+    return merge_event_streams(streams), errors
+
+
+def publish(client: Optional[TraycerClient], args: argparse.Namespace, line: str) -> bool:
+    if args.stdout_only:
+        print(line, flush=True)
+        return True
+    try:
+        if client is not None:
+            push_line(client, args, line)
+        else:
+            with TraycerClient(args.pipe, state=WellStateCache(default_state_path()),
+                               spool=default_state_path(SPOOL_FILE)) as own:
+                push_line(own, args, line)
+    except TraycerError as exc:
+        print(f"Failed to push update to Traycer: {exc}", file=sys.stderr)
+        print(line)
+        return False
+    return True
+
+
+def follow(args: argparse.Namespace, client: Optional[TraycerClient] = None) -> int:
+    """Push a precomputed frame at every block boundary; refetch only every ``--revalidate`` minutes."""
+    local_tz = local_timezone()
+    block = timedelta(minutes=BLOCK_MINUTES)
+    revalidate = timedelta(minutes=max(1, args.revalidate))
+    frame_count = -(-revalidate // block) + 1
+    own = client or TraycerClient(args.pipe, state=WellStateCache(default_state_path()),
+                                  spool=default_state_path(SPOOL_FILE))
+    frames: List[Tuple[datetime, str]] = []
+    next_fetch = datetime.now(local_tz)
+
+    try:
+        while True:
+            now = datetime.now(local_tz)
+            if now >= next_fetch:
+                window_start = align_to_block(now, BLOCK_MINUTES)
+                window_end = window_start + block * (args.blocks + frame_count)
+                try:
+                    events, errors = collect_events(args, local_tz, window_start, window_end)
+                    frames = compute_frames(now, events, BLOCK_MINUTES, args.blocks, frame_count, args.glyphs)
+                    next_fetch = now + (FOLLOW_RETRY if errors else revalidate)
+                except Exception as exc:
+                    # Keep showing precomputed frames while they last; retry sooner.
+                    if not frames or frames[-1][0] + block <= now:
+                        frames = [(now, compose_error_line(str(exc)))]
+                    next_fetch = now + min(FOLLOW_RETRY, revalidate)
+
+            current = [line for at, line in frames if at <= now]
+            if current:
+                publish(own, args, current[-1])
+            upcoming = [at for at, _ in frames if at > now]
+            wake = min(upcoming[0], next_fetch) if upcoming else next_fetch
+            time.sleep(max(0.0, (wake - datetime.now(local_tz)).total_seconds()))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if client is None:
+            own.close()
+
+
+def run_feed(argv: Optional[List[str]] = None, client: Optional[TraycerClient] = None) -> int:
+    """One refresh of the calendar well; also the ``traycer_daemon`` plugin entry point."""
     args = parse_args(argv)
     if args.blocks <= 0:
         print("--blocks must be positive", file=sys.stderr)
         return 1
+    with profile.session(args) as profiler:
+        try:
+            return refresh(args, client)
+        finally:
+            if profiler is not None:
+                settle_sends(client)
+
+
+def refresh(args: argparse.Namespace, client: Optional[TraycerClient] = None) -> int:
+    """Publish one calendar line, or keep publishing with ``--follow``."""
+    if args.follow:
+        return follow(args, client)
 
     local_tz = local_timezone()
     now = datetime.now(local_tz)
+    window_start = align_to_block(now, BLOCK_MINUTES)
+    window_end = window_start + timedelta(minutes=BLOCK_MINUTES * args.blocks)
 
     try:
-        ical_text = fetch_ical(args.url, timeout=args.timeout)
-        events = parse_ics_events(ical_text, local_tz)
-        line = compose_calendar_line(now, events, BLOCK_MINUTES, args.blocks)
-        success = True
+        events, errors = collect_events(args, local_tz, window_start, window_end)
+        line = compose_calendar_line(now, events, BLOCK_MINUTES, args.blocks, args.glyphs)
+        success = not errors
     except Exception as exc:
         line = compose_error_line(str(exc))
         success = False
 
-    if args.stdout_only:
-        print(line)
-        return 0 if success else 1
-
-    try:
-        client = TraycerClient(args.pipe)
-        client.ensure_well(args.well, args.width, args.index)
-        client.set_text(args.well, line)
-    except TraycerError as exc:
-        print(f"Failed to push update to Traycer: {exc}", file=sys.stderr)
-        print(line)
+    if not publish(client, args, line):
         return 1
-
     return 0 if success else 1
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    return run_feed(argv)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
 
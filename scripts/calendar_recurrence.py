@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""RRULE expansion for ``calendar_overview``.
+
+Supports the subset of RFC 5545 that calendar exports actually use:
+``FREQ`` (DAILY/WEEKLY/MONTHLY/YEARLY), ``INTERVAL``, ``COUNT``, ``UNTIL``,
+``BYDAY`` (with ordinals such as ``2TU``/``-1FR``), ``BYMONTHDAY``,
+``BYMONTH``, ``BYSETPOS`` and ``WKST``, plus ``EXDATE``/``RDATE`` and
+``RECURRENCE-ID`` overrides (handled by the caller).
+
+Occurrences are generated lazily in the series' own wall-clock time zone and
+only inside a bounded window; rules without ``COUNT`` jump straight to the
+first period that can reach the window instead of walking from DTSTART.
+``OccurrenceMemo`` keeps expanded start times per series (UID + rule hash) on
+disk so unchanged series are not re-expanded on every run.
+"""
+
+from __future__ import annotations
+
+import calendar
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from traycer_state import read_json, write_json_atomic
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+FREQS = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+# Guard against rules that can never match (e.g. BYMONTH=2;BYMONTHDAY=30).
+MAX_PERIODS = 100_000
+MEMO_VERSION = 1
+
+
+@dataclass(frozen=True)
+class RRule:
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    byday: Tuple[Tuple[int, int], ...] = ()
+    bymonthday: Tuple[int, ...] = ()
+    bymonth: Tuple[int, ...] = ()
+    bysetpos: Tuple[int, ...] = ()
+    wkst: int = 0
+
+
+def _ints(raw: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in raw.split(",") if part.strip())
+
+
+def parse_rrule(value: str, tz: timezone) -> RRule:
+    """Parse an RRULE value; ``tz`` is the series' zone, used for floating UNTIL values."""
+    parts: Dict[str, str] = {}
+    for item in value.split(";"):
+        if "=" in item:
+            key, val = item.split("=", 1)
+            parts[key.strip().upper()] = val.strip()
+
+    freq = parts.get("FREQ", "").upper()
+    if freq not in FREQS:
+        raise ValueError(f"Unsupported RRULE frequency: {freq or value}")
+
+    until: Optional[datetime] = None
+    if "UNTIL" in parts:
+        raw = parts["UNTIL"]
+        if raw.endswith("Z"):
+            until = datetime.strptime(raw[:-1][:15], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        elif "T" in raw:
+            until = datetime.strptime(raw[:15], "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+        else:
+            # A DATE UNTIL includes that whole day.
+            until = datetime.strptime(raw[:8], "%Y%m%d").replace(tzinfo=tz) + timedelta(days=1, seconds=-1)
+
+    byday: List[Tuple[int, int]] = []
+    for item in parts.get("BYDAY", "").split(","):
+        item = item.strip().upper()
+        if len(item) < 2 or item[-2:] not in WEEKDAYS:
+            continue
+        ordinal = int(item[:-2]) if item[:-2] not in ("", "+") else 0
+        byday.append((ordinal, WEEKDAYS[item[-2:]]))
+
+    return RRule(
+        freq=freq,
+        interval=max(1, int(parts.get("INTERVAL", "1") or 1)),
+        count=int(parts["COUNT"]) if "COUNT" in parts else None,
+        until=until,
+        byday=tuple(byday),
+        bymonthday=_ints(parts.get("BYMONTHDAY", "")),
+        bymonth=_ints(parts.get("BYMONTH", "")),
+        bysetpos=_ints(parts.get("BYSETPOS", "")),
+        wkst=WEEKDAYS.get(parts.get("WKST", "MO").upper(), 0),
+    )
+
+
+# ---- Period candidates ----
+def _add_months(year: int, month: int, delta: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def _month_days_for_weekday(year: int, month: int, weekday: int) -> List[int]:
+    first_weekday, length = calendar.monthrange(year, month)
+    first = 1 + (weekday - first_weekday) % 7
+    return list(range(first, length + 1, 7))
+
+
+def _days_in_month(rule: RRule, year: int, month: int, default_day: int) -> List[int]:
+    length = calendar.monthrange(year, month)[1]
+    days: Set[int] = set()
+    if rule.bymonthday:
+        for d in rule.bymonthday:
+            day = d if d > 0 else length + 1 + d
+            if 1 <= day <= length:
+                days.add(day)
+    if rule.byday:
+        by_weekday: Set[int] = set()
+        for ordinal, weekday in rule.byday:
+            matches = _month_days_for_weekday(year, month, weekday)
+            if ordinal == 0:
+                by_weekday.update(matches)
+            elif -len(matches) <= ordinal <= len(matches) and ordinal != 0:
+                by_weekday.add(matches[ordinal - 1] if ordinal > 0 else matches[ordinal])
+        days = days & by_weekday if rule.bymonthday else by_weekday
+    if not rule.bymonthday and not rule.byday:
+        if default_day <= length:
+            days.add(default_day)
+    return sorted(days)
+
+
+def _period_dates(rule: RRule, start: date, period: int) -> List[date]:
+    """Candidate dates for the ``period``-th recurrence period (0 = DTSTART's)."""
+    step = period * rule.interval
+    if rule.freq == "DAILY":
+        day = start + timedelta(days=step)
+        if rule.bymonth and day.month not in rule.bymonth:
+            return []
+        if rule.bymonthday and day.day not in rule.bymonthday:
+            return []
+        if rule.byday and day.weekday() not in {wd for _, wd in rule.byday}:
+            return []
+        return [day]
+    if rule.freq == "WEEKLY":
+        week_start = start - timedelta(days=(start.weekday() - rule.wkst) % 7) + timedelta(weeks=step)
+        weekdays = sorted({wd for _, wd in rule.byday}) if rule.byday else [start.weekday()]
+        days = [week_start + timedelta(days=(wd - rule.wkst) % 7) for wd in weekdays]
+        days.sort()
+        if rule.bymonth:
+            days = [d for d in days if d.month in rule.bymonth]
+        return days
+    if rule.freq == "MONTHLY":
+        year, month = _add_months(start.year, start.month, step)
+        if rule.bymonth and month not in rule.bymonth:
+            return []
+        return [date(year, month, d) for d in _days_in_month(rule, year, month, start.day)]
+    # YEARLY
+    year = start.year + step
+    months = rule.bymonth or ((start.month,) if not rule.byday or rule.bymonthday else tuple(range(1, 13)))
+    days: List[date] = []
+    for month in months:
+        days.extend(date(year, month, d) for d in _days_in_month(rule, year, month, start.day))
+    return days
+
+
+def _apply_setpos(rule: RRule, days: List[date]) -> List[date]:
+    if not rule.bysetpos or not days:
+        return days
+    picked = set()
+    for pos in rule.bysetpos:
+        if 1 <= pos <= len(days):
+            picked.add(days[pos - 1])
+        elif -len(days) <= pos <= -1:
+            picked.add(days[pos])
+    return sorted(picked)
+
+
+def _first_period(rule: RRule, start: date, target: date) -> int:
+    """Lowest period index whose dates can reach ``target`` (for rules without COUNT)."""
+    if target <= start:
+        return 0
+    if rule.freq == "DAILY":
+        span = (target - start).days // rule.interval
+    elif rule.freq == "WEEKLY":
+        span = (target - start).days // (7 * rule.interval)
+    elif rule.freq == "MONTHLY":
+        span = ((target.year - start.year) * 12 + target.month - start.month) // rule.interval
+    else:
+        span = (target.year - start.year) // rule.interval
+    return max(0, span - 1)
+
+
+def iter_rrule(
+    dtstart: datetime,
+    rule: RRule,
+    window_start: datetime,
+    window_end: datetime,
+    duration: timedelta,
+) -> Iterator[datetime]:
+    """Yield aware occurrence starts (in DTSTART's zone) whose span overlaps the window."""
+    tz = dtstart.tzinfo
+    wall = dtstart.replace(tzinfo=None)
+    start_day = wall.date()
+    first = 0
+    if rule.count is None:
+        # Nothing before this period can reach the window, so skip the walk from DTSTART.
+        target = (window_start - duration).astimezone(tz).date()
+        first = _first_period(rule, start_day, target)
+
+    emitted = 0
+    for period in range(first, first + MAX_PERIODS):
+        days = _apply_setpos(rule, _period_dates(rule, start_day, period))
+        for day in days:
+            occ_wall = datetime.combine(day, wall.time())
+            if occ_wall < wall:
+                continue
+            occ = occ_wall.replace(tzinfo=tz)
+            if rule.until is not None and occ > rule.until:
+                return
+            emitted += 1
+            if rule.count is not None and emitted > rule.count:
+                return
+            if occ >= window_end:
+                return
+            if occ + duration > window_start:
+                yield occ
+
+
+def expand_series(
+    dtstart: datetime,
+    duration: timedelta,
+    window_start: datetime,
+    window_end: datetime,
+    rules: Iterable[RRule] = (),
+    rdates: Iterable[datetime] = (),
+    exdates: Iterable[float] = (),
+) -> List[float]:
+    """Sorted epoch-second starts of a series inside the window, after EXDATE/RDATE."""
+    excluded = {int(ts) for ts in exdates}
+    starts: Set[int] = set()
+    for rule in rules:
+        for occ in iter_rrule(dtstart, rule, window_start, window_end, duration):
+            starts.add(int(occ.timestamp()))
+    if not rules and dtstart < window_end and dtstart + duration > window_start:
+        starts.add(int(dtstart.timestamp()))
+    for rdate in rdates:
+        if rdate < window_end and rdate + duration > window_start:
+            starts.add(int(rdate.timestamp()))
+    return sorted(ts for ts in starts if ts not in excluded)
+
+
+def series_key(uid: str, lines: Iterable[str]) -> str:
+    """Stable identity of a series: its UID and every line that shapes its occurrences."""
+    digest = hashlib.sha1(uid.encode("utf-8"))
+    for line in lines:
+        digest.update(b"\0")
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OccurrenceMemo:
+    """Expanded occurrence starts per series, reusable while the window is covered.
+
+    Entries are computed over whole days around the requested window so that
+    runs throughout the day hit the same entry. Only entries used in a run are
+    written back, which keeps the file bounded by the live series count.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, Dict[str, object]] = {}
+        self._used: Set[str] = set()
+        self._dirty = False
+        data = read_json(path) if path else None
+        if isinstance(data, dict) and data.get("version") == MEMO_VERSION and isinstance(data.get("series"), dict):
+            self._entries = data["series"]
+
+    @staticmethod
+    def memo_window(window_start: datetime, window_end: datetime) -> Tuple[datetime, datetime]:
+        day_start = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = window_end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        return day_start, day_end
+
+    def lookup(self, key: str, window_start: datetime, window_end: datetime) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        lo, hi = entry["window"]  # type: ignore[misc]
+        if not (lo <= window_start.timestamp() and window_end.timestamp() <= hi):
+            return None
+        self._used.add(key)
+        return list(entry["starts"])  # type: ignore[arg-type]
+
+    def store(self, key: str, window_start: datetime, window_end: datetime, starts: List[float]) -> None:
+        self._entries[key] = {"window": [window_start.timestamp(), window_end.timestamp()], "starts": starts}
+        self._used.add(key)
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        if not self._dirty and set(self._entries) == self._used:
+            return
+        series = {k: v for k, v in self._entries.items() if k in self._used}
+        try:
+            write_json_atomic(self.path, {"version": MEMO_VERSION, "series": series})
+        except OSError:
+            pass
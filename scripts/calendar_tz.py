@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""Time zone resolution for ``calendar_overview``.
+
+ICS exports name zones in several ways: IANA names (Google), Windows display
+names (Outlook/Exchange, e.g. ``Eastern Standard Time``), vendor-prefixed IANA
+names (``/mozilla.org/20050126_1/America/New_York``) or arbitrary labels
+defined by a ``VTIMEZONE`` block in the feed itself. ``resolve_tzid`` maps the
+first three to ``ZoneInfo`` objects once per process; ``VTimezone`` evaluates
+a feed's own definition when nothing else matches.
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo  # Python 3.9+
+except ImportError:  # pragma: no cover
+    ZoneInfo = None  # type: ignore
+
+from calendar_recurrence import iter_rrule, parse_rrule
+
+# Windows zone names -> IANA, from CLDR windowsZones.xml (territory "001").
+WINDOWS_ZONES: Dict[str, str] = {
+    "Dateline Standard Time": "Etc/GMT+12",
+    "UTC-11": "Etc/GMT+11",
+    "Aleutian Standard Time": "America/Adak",
+    "Hawaiian Standard Time": "Pacific/Honolulu",
+    "Marquesas Standard Time": "Pacific/Marquesas",
+    "Alaskan Standard Time": "America/Anchorage",
+    "UTC-09": "Etc/GMT+9",
+    "Pacific Standard Time (Mexico)": "America/Tijuana",
+    "UTC-08": "Etc/GMT+8",
+    "Pacific Standard Time": "America/Los_Angeles",
+    "US Mountain Standard Time": "America/Phoenix",
+    "Mountain Standard Time (Mexico)": "America/Mazatlan",
+    "Mountain Standard Time": "America/Denver",
+    "Yukon Standard Time": "America/Whitehorse",
+    "Central America Standard Time": "America/Guatemala",
+    "Central Standard Time": "America/Chicago",
+    "Easter Island Standard Time": "Pacific/Easter",
+    "Central Standard Time (Mexico)": "America/Mexico_City",
+    "Canada Central Standard Time": "America/Regina",
+    "SA Pacific Standard Time": "America/Bogota",
+    "Eastern Standard Time (Mexico)": "America/Cancun",
+    "Eastern Standard Time": "America/New_York",
+    "Haiti Standard Time": "America/Port-au-Prince",
+    "Cuba Standard Time": "America/Havana",
+    "US Eastern Standard Time": "America/Indianapolis",
+    "Turks And Caicos Standard Time": "America/Grand_Turk",
+    "Paraguay Standard Time": "America/Asuncion",
+    "Atlantic Standard Time": "America/Halifax",
+    "Venezuela Standard Time": "America/Caracas",
+    "Central Brazilian Standard Time": "America/Cuiaba",
+    "SA Western Standard Time": "America/La_Paz",
+    "Pacific SA Standard Time": "America/Santiago",
+    "Newfoundland Standard Time": "America/St_Johns",
+    "Tocantins Standard Time": "America/Araguaina",
+    "E. South America Standard Time": "America/Sao_Paulo",
+    "SA Eastern Standard Time": "America/Cayenne",
+    "Argentina Standard Time": "America/Buenos_Aires",
+    "Greenland Standard Time": "America/Godthab",
+    "Montevideo Standard Time": "America/Montevideo",
+    "Magallanes Standard Time": "America/Punta_Arenas",
+    "Saint Pierre Standard Time": "America/Miquelon",
+    "Bahia Standard Time": "America/Bahia",
+    "UTC-02": "Etc/GMT+2",
+    "Azores Standard Time": "Atlantic/Azores",
+    "Cape Verde Standard Time": "Atlantic/Cape_Verde",
+    "UTC": "Etc/UTC",
+    "Coordinated Universal Time": "Etc/UTC",
+    "GMT Standard Time": "Europe/London",
+    "Greenwich Standard Time": "Atlantic/Reykjavik",
+    "Sao Tome Standard Time": "Africa/Sao_Tome",
+    "Morocco Standard Time": "Africa/Casablanca",
+    "W. Europe Standard Time": "Europe/Berlin",
+    "Central Europe Standard Time": "Europe/Budapest",
+    "Romance Standard Time": "Europe/Paris",
+    "Central European Standard Time": "Europe/Warsaw",
+    "W. Central Africa Standard Time": "Africa/Lagos",
+    "Jordan Standard Time": "Asia/Amman",
+    "GTB Standard Time": "Europe/Bucharest",
+    "Middle East Standard Time": "Asia/Beirut",
+    "Egypt Standard Time": "Africa/Cairo",
+    "E. Europe Standard Time": "Europe/Chisinau",
+    "Syria Standard Time": "Asia/Damascus",
+    "West Bank Standard Time": "Asia/Hebron",
+    "South Africa Standard Time": "Africa/Johannesburg",
+    "FLE Standard Time": "Europe/Kiev",
+    "Israel Standard Time": "Asia/Jerusalem",
+    "South Sudan Standard Time": "Africa/Juba",
+    "Kaliningrad Standard Time": "Europe/Kaliningrad",
+    "Sudan Standard Time": "Africa/Khartoum",
+    "Libya Standard Time": "Africa/Tripoli",
+    "Namibia Standard Time": "Africa/Windhoek",
+    "Arabic Standard Time": "Asia/Baghdad",
+    "Turkey Standard Time": "Europe/Istanbul",
+    "Arab Standard Time": "Asia/Riyadh",
+    "Belarus Standard Time": "Europe/Minsk",
+    "Russian Standard Time": "Europe/Moscow",
+    "E. Africa Standard Time": "Africa/Nairobi",
+    "Volgograd Standard Time": "Europe/Volgograd",
+    "Iran Standard Time": "Asia/Tehran",
+    "Arabian Standard Time": "Asia/Dubai",
+    "Astrakhan Standard Time": "Europe/Astrakhan",
+    "Azerbaijan Standard Time": "Asia/Baku",
+    "Russia Time Zone 3": "Europe/Samara",
+    "Mauritius Standard Time": "Indian/Mauritius",
+    "Saratov Standard Time": "Europe/Saratov",
+    "Georgian Standard Time": "Asia/Tbilisi",
+    "Caucasus Standard Time": "Asia/Yerevan",
+    "Afghanistan Standard Time": "Asia/Kabul",
+    "West Asia Standard Time": "Asia/Tashkent",
+    "Ekaterinburg Standard Time": "Asia/Yekaterinburg",
+    "Pakistan Standard Time": "Asia/Karachi",
+    "Qyzylorda Standard Time": "Asia/Qyzylorda",
+    "India Standard Time": "Asia/Calcutta",
+    "Sri Lanka Standard Time": "Asia/Colombo",
+    "Nepal Standard Time": "Asia/Katmandu",
+    "Central Asia Standard Time": "Asia/Almaty",
+    "Bangladesh Standard Time": "Asia/Dhaka",
+    "Omsk Standard Time": "Asia/Omsk",
+    "Myanmar Standard Time": "Asia/Rangoon",
+    "SE Asia Standard Time": "Asia/Bangkok",
+    "Altai Standard Time": "Asia/Barnaul",
+    "W. Mongolia Standard Time": "Asia/Hovd",
+    "North Asia Standard Time": "Asia/Krasnoyarsk",
+    "N. Central Asia Standard Time": "Asia/Novosibirsk",
+    "Tomsk Standard Time": "Asia/Tomsk",
+    "China Standard Time": "Asia/Shanghai",
+    "North Asia East Standard Time": "Asia/Irkutsk",
+    "Singapore Standard Time": "Asia/Singapore",
+    "W. Australia Standard Time": "Australia/Perth",
+    "Taipei Standard Time": "Asia/Taipei",
+    "Ulaanbaatar Standard Time": "Asia/Ulaanbaatar",
+    "Aus Central W. Standard Time": "Australia/Eucla",
+    "Transbaikal Standard Time": "Asia/Chita",
+    "Tokyo Standard Time": "Asia/Tokyo",
+    "North Korea Standard Time": "Asia/Pyongyang",
+    "Korea Standard Time": "Asia/Seoul",
+    "Yakutsk Standard Time": "Asia/Yakutsk",
+    "Cen. Australia Standard Time": "Australia/Adelaide",
+    "AUS Central Standard Time": "Australia/Darwin",
+    "E. Australia Standard Time": "Australia/Brisbane",
+    "AUS Eastern Standard Time": "Australia/Sydney",
+    "West Pacific Standard Time": "Pacific/Port_Moresby",
+    "Tasmania Standard Time": "Australia/Hobart",
+    "Vladivostok Standard Time": "Asia/Vladivostok",
+    "Lord Howe Standard Time": "Australia/Lord_Howe",
+    "Bougainville Standard Time": "Pacific/Bougainville",
+    "Russia Time Zone 10": "Asia/Srednekolymsk",
+    "Magadan Standard Time": "Asia/Magadan",
+    "Norfolk Standard Time": "Pacific/Norfolk",
+    "Sakhalin Standard Time": "Asia/Sakhalin",
+    "Central Pacific Standard Time": "Pacific/Guadalcanal",
+    "Russia Time Zone 11": "Asia/Kamchatka",
+    "New Zealand Standard Time": "Pacific/Auckland",
+    "UTC+12": "Etc/GMT-12",
+    "Fiji Standard Time": "Pacific/Fiji",
+    "Chatham Islands Standard Time": "Pacific/Chatham",
+    "UTC+13": "Etc/GMT-13",
+    "Tonga Standard Time": "Pacific/Tongatapu",
+    "Samoa Standard Time": "Pacific/Apia",
+    "Line Islands Standard Time": "Pacific/Kiritimati",
+}
+
+
+def _zoneinfo(name: str) -> Optional[tzinfo]:
+    if ZoneInfo is None or not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ValueError, OSError, KeyError):
+        return None
+
+
+def _iana_suffix(tzid: str) -> Optional[tzinfo]:
+    # "/mozilla.org/20050126_1/America/New_York", "/softwarestudio.org/Olson_20011030_5/Europe/Paris"
+    parts = [p for p in tzid.split("/") if p]
+    for i in range(1, len(parts)):
+        zone = _zoneinfo("/".join(parts[i:]))
+        if zone is not None:
+            return zone
+    return None
+
+
+@lru_cache(maxsize=256)
+def resolve_tzid(tzid: str) -> Optional[tzinfo]:
+    """IANA, Windows or vendor-prefixed TZID -> tzinfo, or ``None`` if unknown."""
+    name = tzid.strip().strip('"')
+    zone = _zoneinfo(name)
+    if zone is None and name in WINDOWS_ZONES:
+        zone = _zoneinfo(WINDOWS_ZONES[name])
+    if zone is None and "/" in name:
+        zone = _iana_suffix(name)
+    return zone
+
+
+@lru_cache(maxsize=None)
+def warn_unknown_tzid(tzid: str) -> None:
+    print(f"Unknown TZID {tzid!r}; treating times as local", file=sys.stderr)
+
+
+# ---- VTIMEZONE ----
+def _parse_offset(raw: str) -> timedelta:
+    raw = raw.strip()
+    sign = -1 if raw.startswith("-") else 1
+    digits = raw.lstrip("+-")
+    hours, minutes = int(digits[0:2]), int(digits[2:4])
+    seconds = int(digits[4:6]) if len(digits) >= 6 else 0
+    return sign * timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _parse_wall(raw: str) -> datetime:
+    """``YYYYMMDD`` or ``YYYYMMDDTHHMMSS`` (a trailing ``Z`` or ``/period`` is ignored)."""
+    raw = raw.strip().split("/", 1)[0].rstrip("Zz")
+    if len(raw) == 8 and raw.isdigit():
+        return datetime(int(raw[0:4]), int(raw[4:6]), int(raw[6:8]))
+    if len(raw) == 15 and raw[8] in "Tt" and raw[:8].isdigit() and raw[9:].isdigit():
+        return datetime(int(raw[0:4]), int(raw[4:6]), int(raw[6:8]),
+                        int(raw[9:11]), int(raw[11:13]), int(raw[13:15]))
+    raise ValueError(f"bad date-time {raw!r}")
+
+
+class _Observance:
+    def __init__(self, props: Dict[str, List[str]], daylight: bool) -> None:
+        self.daylight = daylight
+        self.offset_from = _parse_offset(props["TZOFFSETFROM"][0])
+        self.offset_to = _parse_offset(props["TZOFFSETTO"][0])
+        self.start = _parse_wall(props["DTSTART"][0])
+        self.rrules = props.get("RRULE", [])
+        self.rdates = [_parse_wall(d) for line in props.get("RDATE", []) for d in line.split(",") if d.strip()]
+
+    def onsets(self, year: int) -> Iterable[datetime]:
+        """UTC instants (naive) at which this observance starts during ``year``."""
+        before = timezone(self.offset_from)
+        dtstart = self.start.replace(tzinfo=before)
+        lo = datetime(year, 1, 1, tzinfo=before)
+        hi = datetime(year + 1, 1, 1, tzinfo=before)
+        if not self.rrules and not self.rdates and lo <= dtstart < hi:
+            yield (dtstart - self.offset_from).replace(tzinfo=None)
+        for raw in self.rrules:
+            for occ in iter_rrule(dtstart, parse_rrule(raw, before), lo, hi, timedelta(0)):
+                yield (occ - self.offset_from).replace(tzinfo=None)
+        for wall in self.rdates:
+            if wall.year == year:
+                yield wall - self.offset_from
+
+
+class VTimezone(tzinfo):
+    """A zone defined by a feed's VTIMEZONE STANDARD/DAYLIGHT observances."""
+
+    def __init__(self, tzid: str, observances: List[_Observance]) -> None:
+        self.tzid = tzid
+        self._observances = observances
+        self._years: Dict[int, List[Tuple[datetime, _Observance]]] = {}
+        first = min(observances, key=lambda o: o.start)
+        self._initial = first.offset_from
+
+    def _transitions(self, year: int) -> List[Tuple[datetime, _Observance]]:
+        cached = self._years.get(year)
+        if cached is None:
+            cached = sorted(
+                ((onset, obs) for obs in self._observances for onset in obs.onsets(year)),
+                key=lambda item: item[0],
+            )
+            self._years[year] = cached
+        return cached
+
+    def _at_utc(self, utc: datetime) -> Optional[_Observance]:
+        for year in (utc.year, utc.year - 1):
+            current = None
+            for onset, obs in self._transitions(year):
+                if onset <= utc:
+                    current = obs
+            if current is not None:
+                return current
+        return None
+
+    def _at_wall(self, wall: datetime) -> Optional[_Observance]:
+        # Compare against onsets expressed in the wall time in force just before them.
+        for year in (wall.year, wall.year - 1):
+            current = None
+            for onset, obs in self._transitions(year):
+                if onset + obs.offset_from <= wall:
+                    current = obs
+            if current is not None:
+                return current
+        return None
+
+    def utcoffset(self, dt: Optional[datetime]) -> timedelta:
+        if dt is None:
+            return self._initial
+        obs = self._at_wall(dt.replace(tzinfo=None))
+        return obs.offset_to if obs is not None else self._initial
+
+    def dst(self, dt: Optional[datetime]) -> timedelta:
+        if dt is None:
+            return timedelta(0)
+        obs = self._at_wall(dt.replace(tzinfo=None))
+        if obs is None or not obs.daylight:
+            return timedelta(0)
+        return obs.offset_to - obs.offset_from
+
+    def tzname(self, dt: Optional[datetime]) -> str:
+        return self.tzid
+
+    def fromutc(self, dt: datetime) -> datetime:
+        obs = self._at_utc(dt.replace(tzinfo=None))
+        return dt + (obs.offset_to if obs is not None else self._initial)
+
+    def __repr__(self) -> str:
+        return f"VTimezone({self.tzid!r})"
+
+
+def parse_vtimezone(lines: Iterable[str]) -> Optional[VTimezone]:
+    """Build a ``VTimezone`` from the unfolded lines between BEGIN/END:VTIMEZONE.
+
+    Returns ``None`` if any observance is malformed: a zone missing one of its
+    transitions would give wrong offsets without any sign of trouble.
+    """
+    tzid = ""
+    observances: List[_Observance] = []
+    props: Optional[Dict[str, List[str]]] = None
+    daylight = False
+    broken = False
+    for line in lines:
+        upper = line.upper()
+        if upper in ("BEGIN:STANDARD", "BEGIN:DAYLIGHT"):
+            props, daylight = {}, upper == "BEGIN:DAYLIGHT"
+            continue
+        if upper in ("END:STANDARD", "END:DAYLIGHT"):
+            try:
+                if props is not None:
+                    observances.append(_Observance(props, daylight))
+            except (KeyError, ValueError, IndexError):
+                broken = True
+            props = None
+            continue
+        if ":" not in line:
+            continue
+        name, value = line.split(":", 1)
+        key = name.split(";", 1)[0].upper()
+        if props is None:
+            if key == "TZID":
+                tzid = value.strip()
+        else:
+            props.setdefault(key, []).append(value)
+    if broken and tzid:
+        warn_unknown_tzid(tzid)
+    if broken or not tzid or not observances:
+        return None
+    return VTimezone(tzid, observances)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Record and replay Traycer pipe traffic.
+
+A capture is NDJSON with one record per transport write, exactly as it went
+over the wire::
+
+    {"ts": 1760000000.123, "pid": 4242, "msgs": [{"op": "set", ...}, ...]}
+
+``TeeTransport`` wraps any transport and appends a record after every
+successful write. ``open_transport`` installs it when ``TRAYCER_RECORD`` names
+a capture file, so any producer can be recorded without changes; several
+processes may append to the same file.
+
+``replay()`` sends a capture back through a ``TraycerClient`` at its original
+timing, scaled by ``speed``, or flat-out (``speed=0``), keeping each write's
+batch intact, and returns a ``ReplayReport`` with throughput, per-op send
+latency percentiles and failed writes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from traycer_client import TraycerClient, TraycerError, encode_message
+from traycer_transport import Transport
+
+PERCENTILES = (50, 90, 99)
+# A replayed write this far behind its scheduled time counts as late.
+LATE_THRESHOLD = 0.005
+
+
+@dataclass
+class CaptureRecord:
+    ts: float
+    msgs: List[Dict[str, Any]]
+    pid: int = 0
+
+
+class CaptureWriter:
+    """Appends capture records; each record is a single ``O_APPEND`` write."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records = 0
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes, ts: Optional[float] = None) -> None:
+        msgs = []
+        for raw in data.split(b"\n"):
+            if not raw.strip():
+                continue
+            try:
+                msgs.append(json.loads(raw))
+            except ValueError:
+                # Keep what the producer sent even if the HUD would drop it.
+                msgs.append(raw.decode("utf-8", errors="replace"))
+        if not msgs:
+            return
+        record = {"ts": round(time.time() if ts is None else ts, 6), "pid": os.getpid(), "msgs": msgs}
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+            self.records += 1
+
+    def close(self) -> None:
+        with self._lock:
+            fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+
+class TeeTransport(Transport):
+    """Forwards to ``inner`` and records every successful write."""
+
+    def __init__(self, inner: Transport, capture: str) -> None:
+        super().__init__(inner.url)
+        self.inner = inner
+        self.writer = CaptureWriter(capture)
+
+    @property
+    def connected(self) -> bool:
+        return self.inner.connected
+
+    def connect(self) -> None:
+        self.inner.connect()
+
+    def write(self, data: bytes) -> None:
+        ts = time.time()
+        self.inner.write(data)
+        try:
+            self.writer.write(data, ts)
+        except OSError as exc:
+            print(f"traycer: capture write failed: {exc}", file=sys.stderr)
+
+    def close(self) -> None:
+        self.inner.close()
+        self.writer.close()
+
+    def session_id(self) -> Optional[str]:
+        return self.inner.session_id()
+
+    def __repr__(self) -> str:
+        return f"TeeTransport({self.inner!r}, {self.writer.path!r})"
+
+
+def read_capture(path: str, *, errors: Optional[List[str]] = None) -> Iterator[CaptureRecord]:
+    """Records from a capture file (``-`` for stdin); bad lines go to ``errors``."""
+    fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for n, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                msgs = data["msgs"]
+                if not isinstance(msgs, list) or not msgs:
+                    raise TypeError("msgs must be a non-empty list")
+                yield CaptureRecord(float(data["ts"]), msgs, int(data.get("pid", 0)))
+            except (ValueError, KeyError, TypeError) as exc:
+                if errors is not None:
+                    errors.append(f"{path}:{n}: {exc}")
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _op_of(msg: Any) -> str:
+    return str(msg.get("op", "?")).lower() if isinstance(msg, dict) else "?"
+
+
+@dataclass
+class ReplayReport:
+    messages: int = 0
+    writes: int = 0
+    failed: int = 0
+    skipped: int = 0
+    late: int = 0
+    max_lag: float = 0.0
+    elapsed: float = 0.0
+    # Send latency per write, keyed by the op of its first message.
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float:
+        return self.messages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        ops = {}
+        for op, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            ops[op] = {
+                "writes": len(values),
+                **{f"p{p}_ms": round(percentile(values, p) * 1000, 3) for p in PERCENTILES},
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return {
+            "messages": self.messages,
+            "writes": self.writes,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "late": self.late,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "elapsed_s": round(self.elapsed, 3),
+            "msgs_per_s": round(self.rate, 1),
+            "ops": ops,
+        }
+
+    def format(self) -> str:
+        d = self.as_dict()
+        lines = [
+            f"{d['messages']} messages in {d['writes']} writes over {d['elapsed_s']:.2f}s "
+            f"({d['msgs_per_s']:.1f} msgs/s)",
+            f"failed writes: {d['failed']}  skipped records: {d['skipped']}  "
+            f"late writes: {d['late']} (max lag {d['max_lag_ms']:.1f} ms)",
+        ]
+        if d["ops"]:
+            lines.append(f"{'op':<10} {'writes':>7} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES) + f" {'max':>8}")
+            for op, s in d["ops"].items():
+                lines.append(f"{op:<10} {s['writes']:>7} "
+                             + " ".join(f"{s[f'p{p}_ms']:>8.3f}" for p in PERCENTILES) + f" {s['max_ms']:>8.3f}")
+            lines.append("(latencies in ms)")
+        return "\n".join(lines)
+
+
+def replay(records: Iterable[CaptureRecord], client: TraycerClient, *, speed: float = 1.0,
+           loops: int = 1) -> ReplayReport:
+    """Send ``records`` through ``client``; ``speed`` 0 means as fast as possible."""
+    report = ReplayReport()
+    records = list(records)
+    if not records:
+        return report
+    span = records[-1].ts - records[0].ts
+    start = time.perf_counter()
+    for loop in range(max(1, loops)):
+        base = records[0].ts - loop * span
+        for rec in records:
+            if speed > 0:
+                # Schedule against the start, not the previous write, so lag doesn't accumulate.
+                due = start + (rec.ts - base) / speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    lag = -wait
+                    report.max_lag = max(report.max_lag, lag)
+                    if lag > LATE_THRESHOLD:
+                        report.late += 1
+            try:
+                data = b"".join(
+                    encode_message(m) if isinstance(m, dict) else (str(m) + "\n").encode("utf-8")
+                    for m in rec.msgs
+                )
+            except (TypeError, ValueError):
+                report.skipped += 1
+                continue
+            op = _op_of(rec.msgs[0])
+            t0 = time.perf_counter()
+            try:
+                client.send_bytes(data, op=op)
+            except TraycerError:
+                report.failed += 1
+                continue
+            report.latencies.setdefault(op, []).append(time.perf_counter() - t0)
+            report.writes += 1
+            report.messages += len(rec.msgs)
+    report.elapsed = time.perf_counter() - start
+    return report
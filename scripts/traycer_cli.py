@@ -2,50 +2,37 @@
 # -*- coding: utf-8 -*-
 r"""
 Traycer HUD test sender (Windows, Python 3.9+)
-- Talks to \\.\pipe\TraycerHud (Named Pipe)
-- Commands: config, add, remove, resize, set, bind, placement, bulk, demo, repl
-- No deps required. If you install pywin32, we'll use it for a sturdier connect.
+- Talks to \\.\pipe\TraycerHud (Named Pipe) over one persistent connection
+- Commands: config, add, remove, resize, set, bind, placement, bulk, demo, repl, stream, record, replay
+- No deps required.
 """
 
-import argparse, json, time, sys
-from typing import Iterable, Dict, Any
+import argparse, json, os, subprocess, time, sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-PIPE_NAME = r"\\.\pipe\TraycerHud"
+from traycer_capture import read_capture, replay
+from traycer_client import CoalescingWriter, TraycerClient, TraycerError, get_client
+from traycer_state import WellStateCache, default_state_path
+from traycer_transport import open_transport
 
-HAS_PYWIN32 = False
-try:
-    import win32file  # type: ignore
-    HAS_PYWIN32 = True
-except Exception:
-    HAS_PYWIN32 = False
-
-def _send_line(line: str, timeout_sec: float = 5.0) -> None:
-    if HAS_PYWIN32:
-        import win32file  # type: ignore
-        t0 = time.time(); last = None
-        while time.time() - t0 < timeout_sec:
-            try:
-                h = win32file.CreateFile(PIPE_NAME, win32file.GENERIC_WRITE, 0, None,
-                                         win32file.OPEN_EXISTING, 0, None)
-                try: win32file.WriteFile(h, line.encode("utf-8"))
-                finally: win32file.CloseHandle(h)
-                return
-            except Exception as e:
-                last = e; time.sleep(0.1)
-        raise RuntimeError(f"Open/write failed: {last}")
-    else:
-        t0 = time.time(); last = None
-        while time.time() - t0 < timeout_sec:
-            try:
-                with open(PIPE_NAME, "w", encoding="utf-8", newline="\n") as f:
-                    f.write(line); f.flush()
-                return
-            except Exception as e:
-                last = e; time.sleep(0.1)
-        raise RuntimeError(f"Open/write failed: {last}")
+LAYOUT_OPS = ("add", "remove", "resize", "config")
 
 def send_json(obj: Dict[str, Any]) -> None:
-    _send_line(json.dumps(obj, ensure_ascii=False) + "\n")
+    client = get_client()
+    client.send(obj)
+    if str(obj.get("op", "")).lower() in LAYOUT_OPS:
+        note_layout(client, obj)
+
+def note_layout(client: TraycerClient, obj: Dict[str, Any]) -> None:
+    """Apply a layout change to the producers' shared state file, so they re-add wells removed here."""
+    session = client.transport.session_id()
+    if session is None:
+        # Can't tell which HUD this was; binding would wipe the other producers' saved state.
+        return
+    state = WellStateCache(default_state_path())
+    state.bind_session(session)
+    state.record(obj)
+    state.save()
 
 def normalize_color(s: str | None) -> str | None:
     if not s: return s
@@ -113,18 +100,22 @@ def cmd_bulk(a):
     send_json({"op":"bulk","updates":updates}); print("sent: bulk")
 
 def cmd_demo(a):
+    # Each tick's sets are merged into a single bulk frame by the writer, and
+    # fields the HUD already shows (e.g. the static meeting well) are dropped.
+    client = get_client(); client.state = WellStateCache()
     send_json({"op":"placement","height": a.height, "bottomOffset": a.bottomOffset, "padding": a.padding})
+    out = CoalescingWriter(client, window=a.window/1000.0)
     try:
         t0=time.time()
         while True:
             if int(time.time()-t0)%2==0:
-                send_json({"op":"set","well":"weather","text":"🌦️  71°F Light rain"})
-                send_json({"op":"set","well":"build","text":"🟡 Running…","bg":"#33333322"})
+                out.set_well("weather", text="🌦️  71°F Light rain")
+                out.set_well("build", text="🟡 Running…", bg="#33333322")
             else:
-                send_json({"op":"set","well":"weather","text":"⛅  73°F Overcast"})
-                send_json({"op":"set","well":"build","text":"✅ Passing","bg":"#33305533"})
+                out.set_well("weather", text="⛅  73°F Overcast")
+                out.set_well("build", text="✅ Passing", bg="#33305533")
             import random
-            send_json({"op":"bulk","updates":[
+            out.send({"op":"bulk","updates":[
                 {"op":"set","well":"net","text":f"📶  {random.randint(20,600)} Mbps"},
                 {"op":"set","well":"cpu","text":f"🧠  {random.randint(5,90)}%"},
                 {"op":"set","well":"ram","text":f"🧵  {random.randint(20,92)}%"},
@@ -132,6 +123,7 @@ def cmd_demo(a):
             ]})
             time.sleep(a.interval/1000.0)
     except KeyboardInterrupt:
+        out.close()
         print("\nDemo stopped.")
 
 def cmd_repl(a):
@@ -149,50 +141,159 @@ def cmd_repl(a):
                 try: send_json(json.loads(line))
                 except Exception as e: print("  ! bad JSON:", e)
                 continue
-            parts=line.split()
-            cmd=parts[0].lower(); rest=" ".join(parts[1:])
-            if cmd=="set":
-                well, *kvs = parts[1:]
-                kv = parse_kv(" ".join(kvs))
-                if "fg" in kv: kv["fg"] = normalize_color(kv["fg"])
-                if "bg" in kv: kv["bg"] = normalize_color(kv["bg"])
-                o={"op":"set","well":well}; o.update(kv); send_json(o)
-            elif cmd=="bind":
-                well, *kvs = parts[1:]
-                kv = parse_kv(" ".join(kvs))
-                o={"op":"bind","well":well}; o.update(kv); send_json(o)
-            elif cmd=="placement":
-                o={"op":"placement"}; o.update(parse_kv(rest)); send_json(o)
-            elif cmd=="config":
-                wells=[]; 
-                for spec in rest.split():
-                    if ":" in spec:
-                        id_, w = spec.split(":",1); wells.append({"id":id_, "width":float(w)})
-                send_json({"op":"config","wells":wells})
-            elif cmd=="add":
-                well, width, *more = parts[1:]
-                o={"op":"add","well":well,"width":float(width)}
-                if more and more[0].startswith("--index"):
-                    o["index"]=int(more[0].split("=",1)[-1]) if "=" in more[0] else int(more[1])
-                send_json(o)
-            elif cmd=="remove":
-                send_json({"op":"remove","well":parts[1]})
-            elif cmd=="resize":
-                send_json({"op":"resize","well":parts[1],"width":float(parts[2])})
-            elif cmd=="bulk":
-                updates=[]
-                for chunk in rest.split("  "):
-                    kv=parse_kv(chunk)
-                    if "fg" in kv: kv["fg"] = normalize_color(kv["fg"])
-                    if "bg" in kv: kv["bg"] = normalize_color(kv["bg"])
-                    if "well" in kv:
-                        u={"op":"set","well":kv.pop("well")}; u.update(kv); updates.append(u)
-                send_json({"op":"bulk","updates":updates})
-            else:
-                print("unknown cmd")
+            try: o=parse_friendly(line)
+            except (ValueError, IndexError) as e: print("  ! bad command:", e); continue
+            if o is None: print("unknown cmd")
+            else: send_json(o)
     except KeyboardInterrupt:
         print("\nbye.")
 
+def parse_friendly(line: str) -> Optional[Dict[str, Any]]:
+    """REPL syntax -> message; None for an unknown command."""
+    parts=line.split()
+    cmd=parts[0].lower(); rest=" ".join(parts[1:])
+    if cmd=="set":
+        well, *kvs = parts[1:]
+        kv = parse_kv(" ".join(kvs))
+        if "fg" in kv: kv["fg"] = normalize_color(kv["fg"])
+        if "bg" in kv: kv["bg"] = normalize_color(kv["bg"])
+        o={"op":"set","well":well}; o.update(kv); return o
+    if cmd=="bind":
+        well, *kvs = parts[1:]
+        kv = parse_kv(" ".join(kvs))
+        o={"op":"bind","well":well}; o.update(kv); return o
+    if cmd=="placement":
+        o={"op":"placement"}; o.update(parse_kv(rest)); return o
+    if cmd=="config":
+        wells=[]
+        for spec in rest.split():
+            if ":" in spec:
+                id_, w = spec.split(":",1); wells.append({"id":id_, "width":float(w)})
+        return {"op":"config","wells":wells}
+    if cmd=="add":
+        well, width, *more = parts[1:]
+        o={"op":"add","well":well,"width":float(width)}
+        if more and more[0].startswith("--index"):
+            o["index"]=int(more[0].split("=",1)[-1]) if "=" in more[0] else int(more[1])
+        return o
+    if cmd=="remove":
+        return {"op":"remove","well":parts[1]}
+    if cmd=="resize":
+        return {"op":"resize","well":parts[1],"width":float(parts[2])}
+    if cmd=="bulk":
+        updates=[]
+        for chunk in rest.split("  "):
+            kv=parse_kv(chunk)
+            if "fg" in kv: kv["fg"] = normalize_color(kv["fg"])
+            if "bg" in kv: kv["bg"] = normalize_color(kv["bg"])
+            if "well" in kv:
+                u={"op":"set","well":kv.pop("well")}; u.update(kv); updates.append(u)
+        return {"op":"bulk","updates":updates}
+    return None
+
+# ---- Streaming ----
+OPS = {"config","add","remove","resize","set","bulk","bind","placement"}
+WELL_OPS = {"add","remove","resize","set","bind"}
+
+def validate_message(o: Any) -> Dict[str, Any]:
+    """Check a message has the shape HandleMessage expects; raise ValueError if not."""
+    if not isinstance(o, dict): raise ValueError("message must be a JSON object")
+    # HandleMessage matches ops case-insensitively.
+    op = o.get("op").lower() if isinstance(o.get("op"), str) else None
+    if op not in OPS: raise ValueError(f"unknown op {o.get('op')!r}")
+    if op in WELL_OPS and not isinstance(o.get("well"), str): raise ValueError(f"{op} requires a string 'well'")
+    if op in ("add","resize"):
+        if isinstance(o.get("width"), bool) or not isinstance(o.get("width"), (int, float)):
+            raise ValueError(f"{op} requires a numeric 'width'")
+    if op=="config":
+        wells = o.get("wells")
+        if not isinstance(wells, list) or not all(isinstance(w, dict) and isinstance(w.get("id"), str) for w in wells):
+            raise ValueError("config requires 'wells': [{id, width}, ...]")
+    if op=="bulk":
+        updates = o.get("updates")
+        if not isinstance(updates, list) or not all(isinstance(u, dict) and isinstance(u.get("well"), str) for u in updates):
+            raise ValueError("bulk requires 'updates': [{well, ...}, ...]")
+    return o
+
+def parse_stream_line(line: str) -> Optional[Dict[str, Any]]:
+    """One NDJSON or friendly-syntax line -> validated message; None for blanks/comments."""
+    line = line.strip()
+    if not line or line.startswith("#"): return None
+    if line.startswith("{"):
+        try: o = json.loads(line)
+        except json.JSONDecodeError as e: raise ValueError(f"bad JSON: {e}") from None
+    else:
+        try: o = parse_friendly(line)
+        except (ValueError, IndexError) as e: raise ValueError(f"bad command: {e}") from None
+        if o is None: raise ValueError(f"unknown command {line.split()[0]!r}")
+    return validate_message(o)
+
+def iter_stream_sources(paths: List[str]) -> Iterator[Tuple[str, int, str]]:
+    """(source, line number, line) from files or stdin ('-'), read incrementally."""
+    for path in paths or ["-"]:
+        fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for n, line in enumerate(fh, 1):
+                yield ("<stdin>" if path == "-" else path), n, line
+        finally:
+            if fh is not sys.stdin: fh.close()
+
+def cmd_stream(a):
+    # One persistent connection; set/bulk lines are merged into bulk frames over
+    # a short window, and fields the HUD already shows are dropped.
+    client = get_client(); client.state = WellStateCache()
+    out = CoalescingWriter(client, window=a.window/1000.0)
+    lines = sent = rejected = failed = 0
+    try:
+        for source, n, line in iter_stream_sources(a.file):
+            lines += 1
+            try:
+                o = parse_stream_line(line)
+            except ValueError as e:
+                rejected += 1
+                print(f"{source}:{n}: {e}", file=sys.stderr)
+                if a.strict: break
+                continue
+            if o is None: continue
+            try: out.send(o); sent += 1
+            except TraycerError as e: failed += 1; print(f"{source}:{n}: send failed: {e}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try: out.close()
+        except TraycerError as e: failed += 1; print(f"send failed: {e}", file=sys.stderr)
+        if out.last_error is not None: failed += 1; print(f"send failed: {out.last_error}", file=sys.stderr)
+        if not a.quiet:
+            print(f"stream: {lines} lines, {sent} messages, {rejected} rejected, {failed} failed", file=sys.stderr)
+    return 1 if failed or (rejected and a.strict) else 0
+
+# ---- Record / replay ----
+def cmd_record(a):
+    # Every transport write (ours or the child's) is appended to the capture by TeeTransport.
+    os.environ["TRAYCER_RECORD"] = os.path.abspath(a.capture)
+    cmd = a.command[1:] if a.command[:1] == ["--"] else a.command
+    if not cmd:
+        a.file = ["-"]; return cmd_stream(a)
+    try: rc = subprocess.call(cmd)
+    except OSError as e: print(f"record: {e}", file=sys.stderr); return 127
+    except KeyboardInterrupt: rc = 130
+    print(f"record: capture in {a.capture}", file=sys.stderr)
+    return rc
+
+def cmd_replay(a):
+    errors = []
+    records = list(read_capture(a.capture, errors=errors))
+    for e in errors: print(e, file=sys.stderr)
+    if not records: print("replay: nothing to replay", file=sys.stderr); return 1
+    # A private client: no state cache (every write must go out) and never recorded.
+    client = TraycerClient(open_transport(record=""), linger=None)
+    try: report = replay(records, client, speed=0.0 if a.max else a.speed, loops=a.loop)
+    except KeyboardInterrupt: print("replay: interrupted", file=sys.stderr); return 130
+    finally: client.close()
+    report.skipped += len(errors)
+    print(json.dumps(report.as_dict(), indent=2) if a.json else report.format())
+    return 1 if report.failed else 0
+
 def parse_kv(s: str) -> Dict[str, Any]:
     out: Dict[str, Any] = {}
     tokens=[]; buf=[]; q=None
@@ -230,10 +331,13 @@ def main(argv: Iterable[str]) -> int:
     p=sub.add_parser("placement"); p.add_argument("--height",type=float); p.add_argument("--bottomOffset",type=float); p.add_argument("--padding",type=float); p.add_argument("--cornerRadius",type=float); p.set_defaults(func=cmd_placement)
     p=sub.add_parser("bulk"); p.add_argument("--set",action="append"); p.add_argument("--file"); p.set_defaults(func=cmd_bulk)
 
-    p=sub.add_parser("demo"); p.add_argument("--interval",type=int,default=800); p.add_argument("--height",type=float,default=26); p.add_argument("--bottomOffset",type=float,default=2); p.add_argument("--padding",type=float,default=6); p.set_defaults(func=cmd_demo)
+    p=sub.add_parser("demo"); p.add_argument("--interval",type=int,default=800); p.add_argument("--height",type=float,default=26); p.add_argument("--bottomOffset",type=float,default=2); p.add_argument("--padding",type=float,default=6); p.add_argument("--window",type=int,default=50,help="coalescing window in ms"); p.set_defaults(func=cmd_demo)
     p=sub.add_parser("repl"); p.set_defaults(func=cmd_repl)
+    p=sub.add_parser("stream", help="forward NDJSON / friendly-syntax lines from stdin or files"); p.add_argument("file",nargs="*",help="files to read, '-' for stdin (default)"); p.add_argument("--window",type=int,default=20,help="batching window in ms"); p.add_argument("--strict",action="store_true",help="stop at the first invalid line"); p.add_argument("--quiet",action="store_true"); p.set_defaults(func=cmd_stream)
+    p=sub.add_parser("record", help="capture timestamped traffic from a command (or stdin) while forwarding it"); p.add_argument("capture"); p.add_argument("command",nargs=argparse.REMAINDER,help="producer to run, e.g. -- python weather.py 98101"); p.add_argument("--window",type=int,default=20,help="stdin mode: batching window in ms"); p.add_argument("--strict",action="store_true"); p.add_argument("--quiet",action="store_true"); p.set_defaults(func=cmd_record)
+    p=sub.add_parser("replay", help="play a capture back and report throughput and latency"); p.add_argument("capture",help="capture file, '-' for stdin"); p.add_argument("--speed",type=float,default=1.0,help="timing scale (2 = twice as fast)"); p.add_argument("--max",action="store_true",help="ignore timing, send flat-out"); p.add_argument("--loop",type=int,default=1,help="play the capture N times"); p.add_argument("--json",action="store_true",help="print the report as JSON"); p.set_defaults(func=cmd_replay)
 
-    args=ap.parse_args(list(argv)); args.func(args); return 0
+    args=ap.parse_args(list(argv)); return args.func(args) or 0
 
 if __name__=="__main__":
     raise SystemExit(main(sys.argv[1:]))
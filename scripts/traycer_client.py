@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Shared Traycer HUD client.
+
+Holds one long-lived connection to the HUD (``\\\\.\\pipe\\TraycerHud`` by default,
+or any transport URL understood by ``traycer_transport``) and reuses it for
+every message instead of paying a full connect per line. If the HUD restarts
+the broken handle is dropped and the next write reconnects transparently.
+
+The HUD pipe server accepts a single client at a time, so an idle connection
+is released after ``linger`` seconds to let other producers in.
+
+With ``queued=True`` (or a ``spool`` file) sends return immediately: a
+background worker delivers them, and while the HUD is unreachable the latest
+state per well is spooled (to disk with ``spool``) and replayed as one
+snapshot when it comes back; see ``traycer_outbox``.
+
+Connect/write timings, retries, bytes and failures are recorded in
+``traycer_metrics`` (dumped to ``TRAYCER_METRICS`` when set).
+"""
+
+from __future__ import annotations
+
+import atexit
+import errno
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import traycer_metrics as metrics
+import traycer_profile as profile
+from traycer_outbox import DEFAULT_QUEUE_SIZE, DRAIN_GRACE, Outbox, Spool
+from traycer_state import WellStateCache
+from traycer_transport import Transport, open_transport
+
+CONNECT_TIMEOUT = 5.0
+RETRY_INTERVAL = 0.1
+DEFAULT_LINGER = 2.0
+# Connect errors meaning nothing is serving the pipe (as opposed to it being busy).
+HUD_ABSENT_ERRNOS = (errno.ENOENT, errno.ECONNREFUSED, errno.ENXIO)
+# Queued clients retry those only this long (the pipe briefly vanishes between server
+# instances), then spool; the outbox retries later anyway.
+ABSENT_GRACE = 0.3
+COALESCE_WINDOW = 0.05
+COALESCE_MAX_UPDATES = 64
+
+
+class TraycerError(Exception):
+    """Raised when the Traycer pipe cannot be written."""
+
+
+def encode_message(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class TraycerClient:
+    """Persistent, reconnecting writer for the Traycer pipe."""
+
+    def __init__(
+        self,
+        pipe: Union[str, Transport, None] = None,
+        *,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        linger: Optional[float] = DEFAULT_LINGER,
+        state: Optional[WellStateCache] = None,
+        queued: bool = False,
+        spool: Optional[str] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        self._transport = pipe if isinstance(pipe, Transport) else open_transport(pipe)
+        self._connect_timeout = connect_timeout
+        self._linger = linger
+        self._lock = threading.RLock()
+        self._idle_timer: Optional[threading.Timer] = None
+        self._state = state
+        self.reconnects = 0
+        self._outbox: Optional[Outbox] = None
+        if queued or spool:
+            self._outbox = Outbox(self._deliver, maxsize=queue_size, spool=Spool(spool),
+                                  drain_timeout=connect_timeout + DRAIN_GRACE, errors=(TraycerError,))
+        metrics.autostart()
+
+    @property
+    def pipe(self) -> str:
+        return self._transport.url
+
+    @property
+    def transport(self) -> Transport:
+        return self._transport
+
+    @property
+    def connected(self) -> bool:
+        return self._transport.connected
+
+    @property
+    def outbox(self) -> Optional[Outbox]:
+        return self._outbox
+
+    @property
+    def state(self) -> Optional[WellStateCache]:
+        return self._state
+
+    @state.setter
+    def state(self, state: Optional[WellStateCache]) -> None:
+        with self._lock:
+            self._state = state
+            if state is not None and self._transport.connected:
+                # Attached to an open connection: _connect won't run again to bind it.
+                state.bind_session(self._transport.session_id())
+
+    # ---- Connection management ----
+    @profile.timed("connect")
+    def _connect(self, deadline: float) -> None:
+        last_error: Optional[OSError] = None
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            try:
+                self._transport.connect()
+                if self.state is not None:
+                    self.state.bind_session(self._transport.session_id())
+                metrics.CONNECT_SECONDS.observe(time.perf_counter() - started)
+                metrics.CONNECT_RETRIES.observe(attempts)
+                return
+            except OSError as exc:
+                last_error = exc
+                attempts += 1
+            absent = (self._outbox is not None and last_error.errno in HUD_ABSENT_ERRNOS
+                      and time.perf_counter() - started >= ABSENT_GRACE)
+            if absent or time.time() >= deadline:
+                metrics.CONNECT_RETRIES.observe(attempts)
+                metrics.CONNECT_FAILURES.inc()
+                if isinstance(last_error, FileNotFoundError):
+                    err = TraycerError(f"Traycer pipe not found: {self.pipe}")
+                else:
+                    err = TraycerError(f"Failed opening Traycer pipe: {last_error}")
+                raise err from last_error
+            time.sleep(RETRY_INTERVAL)
+
+    def _drop(self) -> None:
+        self._transport.close()
+
+    def _arm_idle_timer(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._linger is None:
+            return
+        timer = threading.Timer(self._linger, self._close_if_idle)
+        timer.daemon = True
+        timer.start()
+        self._idle_timer = timer
+
+    def _close_if_idle(self) -> None:
+        with self._lock:
+            self._idle_timer = None
+            self._drop()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued sends to be delivered; ``False`` if ``timeout`` ran out."""
+        return self._outbox.flush(timeout) if self._outbox is not None else True
+
+    def settle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued sends were delivered or spooled (HUD down); ``False`` if ``timeout`` ran out."""
+        return self._outbox.settle(timeout) if self._outbox is not None else True
+
+    def close(self) -> None:
+        if self._outbox is not None and not self._outbox.close():
+            # The worker is still waiting on a connect; what it holds was spooled.
+            return
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self._drop()
+            self.save_state()
+
+    def save_state(self) -> None:
+        """Persist the well-state cache, if it has a file."""
+        with self._lock:
+            if self.state is not None:
+                self.state.save()
+
+    def __enter__(self) -> "TraycerClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---- Sending ----
+    def send_bytes(self, data: bytes, *, op: str = "raw") -> None:
+        with self._lock:
+            deadline = time.time() + self._connect_timeout
+            try:
+                while True:
+                    if not self._transport.connected:
+                        self._connect(deadline)
+                    started = time.perf_counter()
+                    try:
+                        self._transport.write(data)
+                        break
+                    except OSError as exc:
+                        # Stale handle (HUD restarted or server recycled): reconnect.
+                        self._drop()
+                        self.reconnects += 1
+                        metrics.WRITE_RETRIES.inc()
+                        if time.time() >= deadline:
+                            raise TraycerError(f"Failed writing to Traycer pipe: {exc}") from exc
+            except TraycerError:
+                metrics.WRITE_FAILURES.inc(label=op)
+                raise
+            metrics.WRITE_SECONDS.observe(time.perf_counter() - started, op)
+            metrics.WRITE_BYTES.observe(len(data), op)
+            self._arm_idle_timer()
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        self.send_many([payload])
+
+    def send_many(self, payloads: Iterable[Dict[str, Any]]) -> None:
+        if self._outbox is not None:
+            self._outbox.put(list(payloads))
+        else:
+            self._deliver(payloads)
+
+    @profile.timed("send")
+    def _deliver(self, payloads: Iterable[Dict[str, Any]]) -> None:
+        state = self.state
+        with self._lock:
+            if state is None:
+                payloads = list(payloads)
+            else:
+                # Connect first so the cache is checked against the live HUD session.
+                if not self._transport.connected:
+                    try:
+                        self._connect(time.time() + self._connect_timeout)
+                    except TraycerError:
+                        metrics.WRITE_FAILURES.inc(label=metrics.op_label(list(payloads)))
+                        raise
+                payloads = list(payloads)
+                offered = len(payloads)
+                payloads = [p for p in (state.filter(p) for p in payloads) if p is not None]
+                if offered != len(payloads):
+                    metrics.SUPPRESSED.inc(offered - len(payloads))
+            if not payloads:
+                return
+            before = self.reconnects
+            self.send_bytes(b"".join(encode_message(p) for p in payloads), op=metrics.op_label(payloads))
+            if state is not None:
+                if self.reconnects != before and not state.session_known:
+                    # The HUD may have restarted; stop trusting what it showed.
+                    state.clear()
+                for payload in payloads:
+                    state.record(payload)
+
+    # ---- Protocol helpers ----
+    def ensure_well(self, well_id: str, width: float, index: Optional[int] = None) -> None:
+        payload: Dict[str, Any] = {"op": "add", "well": well_id, "width": width}
+        if index is not None:
+            payload["index"] = index
+        self.send(payload)
+
+    def set_well(self, well_id: str, **fields: Any) -> None:
+        payload: Dict[str, Any] = {"op": "set", "well": well_id}
+        payload.update({k: v for k, v in fields.items() if v is not None})
+        self.send(payload)
+
+    def set_text(self, well_id: str, text: str) -> None:
+        self.set_well(well_id, text=text)
+
+    def bulk(self, updates: List[Dict[str, Any]]) -> None:
+        self.send({"op": "bulk", "updates": updates})
+
+
+class CoalescingWriter:
+    """Collects ``set`` updates for a short window and sends them as one ``bulk``.
+
+    The HUD marshals every ``set`` onto its UI thread separately while a
+    ``bulk`` is applied in a single dispatch. Updates to the same well are
+    merged field by field (the latest value wins), so a burst of N updates to
+    K wells costs one write carrying K entries. Any other op flushes pending
+    updates first to preserve ordering.
+    """
+
+    def __init__(
+        self,
+        client: TraycerClient,
+        *,
+        window: float = COALESCE_WINDOW,
+        max_updates: int = COALESCE_MAX_UPDATES,
+    ) -> None:
+        self._client = client
+        self._window = window
+        self._max_updates = max_updates
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self.last_error: Optional[TraycerError] = None
+
+    @property
+    def client(self) -> TraycerClient:
+        return self._client
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def set_well(self, well_id: str, **fields: Any) -> None:
+        update = {k: v for k, v in fields.items() if v is not None}
+        flush_now = False
+        with self._lock:
+            entry = self._pending.get(well_id)
+            if entry is None:
+                self._pending[well_id] = update
+            else:
+                entry.update(update)
+            if len(self._pending) >= self._max_updates:
+                flush_now = True
+            elif self._timer is None:
+                self._timer = threading.Timer(self._window, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        op = str(payload.get("op", "")).lower()
+        if op == "set" and "well" in payload:
+            fields = {k: v for k, v in payload.items() if k not in ("op", "well")}
+            self.set_well(payload["well"], **fields)
+        elif op == "bulk" and isinstance(payload.get("updates"), list):
+            for update in payload["updates"]:
+                self.send({**update, "op": "set"})
+        else:
+            self.flush()
+            self._client.send(payload)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+        return [{"op": "set", "well": well_id, **fields} for well_id, fields in pending.items()]
+
+    def flush(self) -> None:
+        updates = self._take()
+        if updates:
+            metrics.COALESCED_UPDATES.observe(len(updates))
+        if len(updates) == 1:
+            self._client.send(updates[0])
+        elif updates:
+            self._client.bulk(updates)
+
+    def _flush_from_timer(self) -> None:
+        try:
+            self.flush()
+        except TraycerError as exc:
+            # Nobody is waiting on a timer flush; keep the error for the caller to inspect.
+            self.last_error = exc
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "CoalescingWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+_default_client: Optional[TraycerClient] = None
+
+
+def get_client(
+    pipe: Optional[str] = None, *, state_file: Optional[str] = None, spool: Optional[str] = None
+) -> TraycerClient:
+    """Return the process-wide shared client, creating it on first use.
+
+    Arguments only apply to the first call; later calls return the same client.
+    With ``state_file`` the client skips updates the HUD is already showing,
+    remembering them across runs in that file. With ``spool`` sends are queued
+    and never block; undeliverable state is kept in that file until the HUD is back.
+    """
+    global _default_client
+    if _default_client is None:
+        state = WellStateCache(state_file) if state_file else None
+        _default_client = TraycerClient(pipe, state=state, spool=spool)
+        atexit.register(_default_client.close)
+    return _default_client
+
+
+def settle_sends(client: Optional[TraycerClient] = None) -> None:
+    """Let ``client`` (or the shared client, if one was created) finish its queued sends.
+
+    Profiled runs call this before reporting: queued sends are timed on the
+    outbox thread and would otherwise only go out in the atexit ``close``.
+    """
+    client = client or _default_client
+    if client is not None:
+        client.settle()
+
+
+def send_json(payload: Dict[str, Any]) -> None:
+    get_client().send(payload)
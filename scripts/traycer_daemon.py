@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Long-running Traycer feed daemon.
+
+Runs several producer scripts as plugins inside one resident process instead
+of spawning a fresh interpreter per scheduled run. Each feed refreshes on its
+own interval and all of them share one HUD connection and well-state cache.
+
+Config file (JSON)::
+
+    {
+      "feeds": [
+        {"plugin": "weather", "interval": 1800, "args": ["39.95238", "-75.16362"]},
+        {"plugin": "build_stats", "interval": 1800, "args": ["--repo-dir", "C:\\\\src\\\\app"]},
+        {"plugin": "calendar", "interval": 300, "args": ["https://example.com/private.ics"]}
+      ]
+    }
+
+``plugin`` is a built-in name (see ``PLUGINS``) or ``module:function`` for a
+custom producer. A plugin function takes ``(argv, client)`` and returns an exit
+code, the same contract as the scripts' ``run_feed``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from traycer_client import TraycerClient
+from traycer_state import WellStateCache, default_state_path
+from traycer_transport import default_url
+
+DEFAULT_INTERVAL = 30 * 60.0
+MIN_INTERVAL = 1.0
+SPOOL_FILE = "spool-daemon.json"
+
+PLUGINS = {
+    "weather": "weather:run_feed",
+    "calendar": "calendar_overview:run_feed",
+    "build_stats": "build_stats:run_feed",
+}
+
+FeedFunc = Callable[[List[str], TraycerClient], int]
+
+log = logging.getLogger("traycer_daemon")
+
+
+@dataclass
+class FeedSpec:
+    id: str
+    plugin: str
+    interval: float = DEFAULT_INTERVAL
+    args: List[str] = field(default_factory=list)
+
+
+def load_plugin(spec: str) -> FeedFunc:
+    target = PLUGINS.get(spec, spec)
+    if ":" not in target:
+        raise ValueError(f"Unknown plugin {spec!r} (expected one of {sorted(PLUGINS)} or module:function)")
+    module_name, func_name = target.split(":", 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)
+
+
+def load_config(path: str) -> List[FeedSpec]:
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    entries = data["feeds"] if isinstance(data, dict) else data
+    feeds: List[FeedSpec] = []
+    for i, entry in enumerate(entries):
+        plugin = entry["plugin"]
+        args = entry.get("args") or []
+        if isinstance(args, str):
+            args = args.split()
+        feeds.append(FeedSpec(
+            id=entry.get("id") or f"{plugin}-{i}",
+            plugin=plugin,
+            interval=max(MIN_INTERVAL, float(entry.get("interval", DEFAULT_INTERVAL))),
+            args=[str(a) for a in args],
+        ))
+    return feeds
+
+
+async def run_feed_loop(spec: FeedSpec, func: FeedFunc, client: TraycerClient) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        try:
+            # Producers are synchronous (HTTP, subprocesses); keep them off the loop.
+            code = await loop.run_in_executor(None, func, list(spec.args), client)
+            if code:
+                log.warning("%s: exited with %s", spec.id, code)
+            client.save_state()
+        except asyncio.CancelledError:
+            raise
+        except (Exception, SystemExit) as exc:
+            log.error("%s: %s: %s", spec.id, type(exc).__name__, exc)
+        elapsed = loop.time() - started
+        await asyncio.sleep(max(0.0, spec.interval - elapsed))
+
+
+async def run_daemon(feeds: List[FeedSpec], client: TraycerClient) -> None:
+    tasks = []
+    for spec in feeds:
+        func = load_plugin(spec.plugin)
+        log.info("%s: %s every %ss", spec.id, spec.plugin, spec.interval)
+        tasks.append(asyncio.create_task(run_feed_loop(spec, func, client), name=spec.id))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run Traycer producer scripts as plugins in one process")
+    ap.add_argument("config", help="JSON file listing feeds")
+    ap.add_argument("--pipe", default=default_url(), help="Traycer pipe or transport URL (default: %(default)s)")
+    ap.add_argument("--log", help="Log file (stderr is invisible under pythonw)")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(
+        filename=args.log,
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    try:
+        feeds = load_config(args.config)
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"Invalid daemon config: {exc}", file=sys.stderr)
+        return 1
+    if not feeds:
+        print("No feeds configured.", file=sys.stderr)
+        return 1
+
+    client = TraycerClient(args.pipe, state=WellStateCache(default_state_path()),
+                           spool=default_state_path(SPOOL_FILE))
+    try:
+        asyncio.run(run_daemon(feeds, client))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
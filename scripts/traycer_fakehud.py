@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""In-process stand-in for the Traycer HUD pipe server.
+
+``FakeHud`` applies NDJSON ops the way ``MainWindow.HandleMessage`` does
+(case-insensitive ``op``, malformed messages silently dropped, one UI-thread
+dispatch per message) and keeps counters so send paths can be exercised and
+benchmarked off Windows. ``serve()`` exposes it over a Unix socket, a FIFO or
+the ``memory://`` hub; like the real HUD it handles one client at a time.
+
+Usage:
+  python traycer_fakehud.py unix:///tmp/traycer.sock --echo
+  TRAYCER_PIPE=unix:///tmp/traycer.sock python traycer_cli.py demo
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from traycer_transport import (
+    FifoTransport,
+    MemoryTransport,
+    NamedPipeTransport,
+    UnixSocketTransport,
+    default_url,
+    open_transport,
+    register_memory_hub,
+    unregister_memory_hub,
+)
+
+DEFAULT_WIDTH = 200.0
+
+
+class _Invalid(Exception):
+    """Mirrors the JSON accessor exceptions that HandleMessage swallows."""
+
+
+def _get(obj: Dict[str, Any], key: str) -> Any:
+    if not isinstance(obj, dict) or key not in obj:
+        raise _Invalid(f"missing property {key!r}")
+    return obj[key]
+
+
+def _string(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    raise _Invalid("expected string")
+
+
+def _double(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise _Invalid("expected number")
+    return float(value)
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise _Invalid("expected integer")
+    return value
+
+
+def _bool(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise _Invalid("expected boolean")
+    return value
+
+
+@dataclass
+class Well:
+    id: str
+    width: float
+    text: str = ""
+    fg: Optional[str] = None
+    bg: Optional[str] = None
+    blink: bool = False
+
+
+@dataclass
+class HudStats:
+    messages: int = 0
+    bytes: int = 0
+    dispatches: int = 0
+    errors: int = 0
+    connections: int = 0
+    ops: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "dispatches": self.dispatches,
+            "errors": self.errors,
+            "connections": self.connections,
+            "ops": dict(self.ops),
+        }
+
+
+class FakeHud:
+    """Well state machine equivalent to the HUD's pipe message handling."""
+
+    def __init__(self, on_message: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.wells: List[Well] = []
+        self.actions: Dict[str, str] = {}
+        self.placement: Dict[str, float] = {}
+        self.tasks: Optional[List[Any]] = None
+        self.stats = HudStats()
+        self._on_message = on_message
+        self._lock = threading.Lock()
+        self._pending = b""
+
+    # ---- Introspection ----
+    def well(self, well_id: str) -> Optional[Well]:
+        return next((w for w in self.wells if w.id == well_id), None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "wells": [vars(w).copy() for w in self.wells],
+                "actions": dict(self.actions),
+                "placement": dict(self.placement),
+            }
+
+    # ---- Input ----
+    def feed(self, data: bytes) -> None:
+        """Consume a chunk of the NDJSON byte stream."""
+        self.stats.bytes += len(data)
+        buf = self._pending + data
+        *lines, self._pending = buf.split(b"\n")
+        for raw in lines:
+            self.handle_line(raw.decode("utf-8", errors="replace").rstrip("\r"))
+
+    def end_stream(self) -> None:
+        """Flush a trailing unterminated line, like ``ReadLineAsync`` at EOF."""
+        rest, self._pending = self._pending, b""
+        if rest:
+            self.handle_line(rest.decode("utf-8", errors="replace").rstrip("\r"))
+
+    def handle_line(self, line: str) -> None:
+        if not line.strip():
+            return
+        try:
+            msg = json.loads(line)
+            with self._lock:
+                self.stats.messages += 1
+                self.handle_message(msg)
+        except (ValueError, _Invalid, AttributeError, TypeError):
+            self.stats.errors += 1
+            return
+        if self._on_message is not None:
+            self._on_message(msg)
+
+    # ---- HandleMessage ----
+    def handle_message(self, msg: Dict[str, Any]) -> None:
+        op = _string(msg.get("op")) if isinstance(msg, dict) else None
+        op = (op or "").lower()
+        self.stats.ops[op or "?"] += 1
+
+        if op == "config":
+            wells = None
+            wells_el = msg.get("wells")
+            if isinstance(wells_el, list):
+                wells = []
+                for w in wells_el:
+                    wid = _string(_get(w, "id")) or ""
+                    width = _double(w["width"]) if "width" in w else DEFAULT_WIDTH
+                    wells.append(Well(wid, width))
+            tasks = msg.get("tasks") if isinstance(msg.get("tasks"), list) else None
+            if wells is not None or tasks is not None:
+                self._dispatch()
+                if wells is not None:
+                    self.wells = wells
+                if tasks is not None:
+                    self.tasks = tasks
+        elif op == "add":
+            wid = _string(_get(msg, "well")) or ""
+            width = _double(msg["width"]) if "width" in msg else DEFAULT_WIDTH
+            index = _int(msg["index"]) if "index" in msg else None
+            self._dispatch()
+            self._add(wid, width, index)
+        elif op == "remove":
+            wid = _string(_get(msg, "well")) or ""
+            self._dispatch()
+            self.wells = [w for w in self.wells if w.id != wid]
+            self.actions.pop(wid, None)
+        elif op == "resize":
+            wid = _string(_get(msg, "well")) or ""
+            width = _double(_get(msg, "width"))
+            self._dispatch()
+            self._resize(wid, width)
+        elif op == "set":
+            args = self._set_args(msg)
+            self._dispatch()
+            self._set(*args)
+        elif op == "bulk":
+            updates = msg.get("updates")
+            if isinstance(updates, list):
+                self._dispatch()
+                for u in updates:
+                    self._set(*self._set_args(u))
+        elif op == "bind":
+            wid = _string(_get(msg, "well")) or ""
+            action = _string(_get(msg, "action")) or ""
+            self._dispatch()
+            self.actions[wid] = action
+        elif op == "placement":
+            for key in ("height", "bottomOffset", "padding", "cornerRadius"):
+                if key in msg:
+                    self.placement[key] = _double(msg[key])
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        self.stats.dispatches += 1
+
+    @staticmethod
+    def _set_args(msg: Dict[str, Any]) -> tuple:
+        wid = _string(_get(msg, "well")) or ""
+        text = _string(msg["text"]) if "text" in msg else None
+        fg = _string(msg["fg"]) if "fg" in msg else None
+        bg = _string(msg["bg"]) if "bg" in msg else None
+        blink = _bool(msg["blink"]) if "blink" in msg else None
+        action = _string(msg["action"]) if "action" in msg else None
+        return wid, text, fg, bg, blink, action
+
+    def _add(self, wid: str, width: float, index: Optional[int]) -> None:
+        if self.well(wid) is not None:
+            self._resize(wid, width)
+            return
+        insert = len(self.wells) if index is None else max(0, min(index, len(self.wells)))
+        self.wells.insert(insert, Well(wid, width))
+
+    def _resize(self, wid: str, width: float) -> None:
+        well = self.well(wid)
+        if well is not None:
+            well.width = width
+
+    def _set(self, wid, text, fg, bg, blink, action) -> None:
+        well = self.well(wid)
+        if well is None:
+            return
+        if text is not None:
+            well.text = text
+        if fg is not None:
+            well.fg = fg
+        if bg is not None:
+            well.bg = bg
+        if blink is not None:
+            well.blink = blink
+        if action is not None:
+            self.actions[wid] = action
+
+
+class FakeHudServer:
+    """Serves a ``FakeHud`` on a background thread for a transport URL."""
+
+    def __init__(self, url: Optional[str] = None, hud: Optional[FakeHud] = None) -> None:
+        self.url = url or default_url()
+        self.hud = hud or FakeHud()
+        self._transport = open_transport(self.url, record="")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+
+    def start(self) -> "FakeHudServer":
+        t = self._transport
+        if isinstance(t, MemoryTransport):
+            register_memory_hub(t.name, self.hud.feed)
+            return self
+        if isinstance(t, UnixSocketTransport):
+            if os.path.exists(t.path):
+                os.unlink(t.path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.bind(t.path)
+            self._sock.listen(1)
+            target = self._serve_socket
+        elif isinstance(t, FifoTransport):
+            if not os.path.exists(t.path):
+                os.mkfifo(t.path)
+            target = self._serve_fifo
+        elif isinstance(t, NamedPipeTransport):
+            raise ValueError("Named pipes are served by the real HUD; use unix://, fifo:// or memory://")
+        else:
+            raise ValueError(f"Cannot serve {self.url}")
+        self._thread = threading.Thread(target=target, name="fakehud", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        t = self._transport
+        if isinstance(t, MemoryTransport):
+            unregister_memory_hub(t.name)
+            return
+        if isinstance(t, UnixSocketTransport) and self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        if isinstance(t, FifoTransport):
+            # Unblock a reader waiting in open() by briefly attaching a writer.
+            try:
+                fd = os.open(t.path, os.O_WRONLY | os.O_NONBLOCK)
+                os.close(fd)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        path = getattr(t, "path", None)
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "FakeHudServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _serve_socket(self) -> None:
+        assert self._sock is not None
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.hud.stats.connections += 1
+            with conn:
+                while True:
+                    try:
+                        chunk = conn.recv(65536)
+                    except OSError:
+                        break
+                    if not chunk:
+                        break
+                    self.hud.feed(chunk)
+            self.hud.end_stream()
+
+    def _serve_fifo(self) -> None:
+        path = self._transport.path  # type: ignore[attr-defined]
+        while not self._stop.is_set():
+            with open(path, "rb", buffering=0) as fifo:
+                self.hud.stats.connections += 1
+                while True:
+                    chunk = fifo.read(65536)
+                    if not chunk:
+                        break
+                    self.hud.feed(chunk)
+            self.hud.end_stream()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Stand-in Traycer HUD server")
+    ap.add_argument("url", nargs="?", default=default_url(), help="Transport URL to serve (default: %(default)s)")
+    ap.add_argument("--echo", action="store_true", help="Print every accepted message")
+    args = ap.parse_args(argv)
+
+    hud = FakeHud(on_message=(lambda m: print(json.dumps(m, ensure_ascii=False))) if args.echo else None)
+    server = FakeHudServer(args.url, hud).start()
+    print(f"fake HUD listening on {args.url} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    print(json.dumps({"stats": hud.stats.as_dict(), "state": hud.snapshot()}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
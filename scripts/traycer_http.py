@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Shared HTTP fetching for the Traycer producer scripts.
+
+- Keep-alive connections are pooled per host, so repeated polls (and several
+  feeds in ``traycer_daemon``) reuse sockets instead of reconnecting.
+- Responses are cached on disk with their ``ETag``/``Last-Modified``
+  validators. The next request is conditional and a ``304 Not Modified``
+  returns the cached body without downloading it again; callers can check
+  ``FetchResult.not_modified`` (or the body's ``content_hash``) to skip
+  re-parsing as well.
+- Bodies are streamed to the cache file in chunks, never held whole in memory.
+
+``get()`` is synchronous; ``fetch()``/``fetch_many()`` are the asyncio
+equivalents and run requests concurrently on worker threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import ssl
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import IO, Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from traycer_state import default_state_path, write_json_atomic
+
+USER_AGENT = "traycer-scripts/1.0"
+DEFAULT_TIMEOUT = 15.0
+MAX_REDIRECTS = 5
+MAX_IDLE_PER_HOST = 4
+CHUNK_SIZE = 64 * 1024
+
+_REDIRECTS = {301, 302, 303, 307, 308}
+
+
+class HttpError(Exception):
+    """Raised for network failures and non-success HTTP statuses."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def default_cache_dir() -> str:
+    return default_state_path("http")
+
+
+# ---- Connection pool ----
+_PoolKey = Tuple[str, str, int]
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle keep-alive connections keyed by host."""
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST) -> None:
+        self._idle: Dict[_PoolKey, Deque[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._max_idle = max_idle_per_host
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def acquire(self, scheme: str, host: str, port: int, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return ``(connection, reused)``."""
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def release(self, scheme: str, host: str, port: int, conn: http.client.HTTPConnection) -> None:
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self._max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+
+_pool = ConnectionPool()
+
+
+# ---- Cache ----
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+    content_hash: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def charset(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for part in content_type.split(";")[1:]:
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip('"')
+        return "utf-8"
+
+    def open(self) -> IO[bytes]:
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        with self.open() as fh:
+            return fh.read()
+
+    def text(self) -> str:
+        return self.read_bytes().decode(self.charset, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.read_bytes())
+
+
+class HttpCache:
+    """Response bodies plus validator metadata, one pair of files per URL."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or default_cache_dir()
+
+    def _base(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32])
+
+    def body_path(self, url: str) -> str:
+        return self._base(url) + ".body"
+
+    def load_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._base(url) + ".json", "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not os.path.exists(self.body_path(url)):
+            return None
+        return meta
+
+    def store_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        write_json_atomic(self._base(url) + ".json", meta)
+
+    def temp_body(self) -> Tuple[IO[bytes], str]:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".dl-", dir=self.directory)
+        return os.fdopen(fd, "wb"), tmp
+
+
+# ---- Requests ----
+def _request(
+    url: str,
+    headers: Dict[str, str],
+    timeout: float,
+    sink_factory,
+) -> Tuple[int, Dict[str, str], Optional[str], str]:
+    """Issue a GET, following redirects. Returns (status, headers, body_tmp, final_url)."""
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise HttpError(f"Unsupported URL scheme: {url}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        req_headers = {"Host": parts.netloc, "User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **headers}
+
+        for attempt in range(2):
+            conn, reused = _pool.acquire(scheme, host, port, timeout)
+            try:
+                conn.request("GET", target, headers=req_headers)
+                resp = conn.getresponse()
+                break
+            except (http.client.HTTPException, OSError) as exc:
+                conn.close()
+                # A pooled socket the server already closed: retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise HttpError(f"{type(exc).__name__}: {exc} ({url})") from exc
+
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        status = resp.status
+        body_tmp: Optional[str] = None
+        drained = False
+        try:
+            if status == 200:
+                body_tmp = _stream_body(resp, resp_headers, sink_factory)
+            else:
+                resp.read()
+            drained = True
+        except (http.client.HTTPException, OSError, zlib.error) as exc:
+            raise HttpError(f"{type(exc).__name__}: {exc} ({url})") from exc
+        finally:
+            if drained and not resp.will_close:
+                _pool.release(scheme, host, port, conn)
+            else:
+                conn.close()
+        if status in _REDIRECTS and "location" in resp_headers:
+            url = urljoin(url, resp_headers["location"])
+            continue
+        return status, resp_headers, body_tmp, url
+    raise HttpError(f"Too many redirects ({url})")
+
+
+def _stream_body(resp: http.client.HTTPResponse, headers: Dict[str, str], sink_factory) -> str:
+    gzip = headers.get("content-encoding", "").lower() == "gzip"
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip else None
+    sink, tmp = sink_factory()
+    try:
+        with sink:
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sink.write(inflater.decompress(chunk) if inflater else chunk)
+            if inflater is not None:
+                sink.write(inflater.flush())
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return tmp
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get(
+    url: str,
+    *,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: Optional[HttpCache] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> FetchResult:
+    """Fetch ``url`` with conditional revalidation against the on-disk cache."""
+    cache = cache or HttpCache()
+    meta = cache.load_meta(url)
+    req_headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            req_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            req_headers["If-Modified-Since"] = meta["last_modified"]
+
+    status, resp_headers, body_tmp, _ = _request(url, req_headers, timeout, cache.temp_body)
+
+    if status == 304 and meta:
+        return FetchResult(
+            url=url,
+            status=304,
+            path=cache.body_path(url),
+            headers=meta.get("headers", {}),
+            not_modified=True,
+            content_hash=meta.get("content_hash", ""),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+        )
+    if status != 200 or body_tmp is None:
+        raise HttpError(f"HTTP {status} for {url}", status)
+
+    content_hash = _file_hash(body_tmp)
+    path = cache.body_path(url)
+    os.replace(body_tmp, path)
+    kept_headers = {k: v for k, v in resp_headers.items() if k in ("content-type", "date")}
+    new_meta = {
+        "url": url,
+        "etag": resp_headers.get("etag"),
+        "last_modified": resp_headers.get("last-modified"),
+        "content_hash": content_hash,
+        "fetched": time.time(),
+        "headers": kept_headers,
+    }
+    try:
+        cache.store_meta(url, new_meta)
+    except OSError:
+        pass
+    return FetchResult(
+        url=url,
+        status=200,
+        path=path,
+        headers=kept_headers,
+        # Servers without validators still let us skip re-parsing identical bodies.
+        not_modified=bool(meta) and meta.get("content_hash") == content_hash,
+        content_hash=content_hash,
+        etag=new_meta["etag"],
+        last_modified=new_meta["last_modified"],
+    )
+
+
+async def fetch(url: str, **kwargs: Any) -> FetchResult:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: get(url, **kwargs))
+
+
+async def fetch_many(urls: List[str], **kwargs: Any) -> List[Any]:
+    """Fetch concurrently; each entry is a ``FetchResult`` or the ``HttpError`` raised."""
+    return await asyncio.gather(*(fetch(u, **kwargs) for u in urls), return_exceptions=True)
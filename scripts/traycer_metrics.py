@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Lightweight in-process metrics for the Traycer send path.
+
+``TraycerClient`` records into the module-level ``REGISTRY``:
+
+- ``traycer_connect_seconds``        time to open the pipe, including backoff
+- ``traycer_connect_retries``        failed attempts (100 ms apart) per connect
+- ``traycer_connect_failures_total`` connects that gave up after the timeout
+- ``traycer_write_seconds{op}``      time per transport write
+- ``traycer_write_bytes{op}``        bytes per write
+- ``traycer_write_retries_total``    writes retried on a stale handle
+- ``traycer_write_failures_total{op}`` writes that raised ``TraycerError``
+- ``traycer_suppressed_total``       messages the well-state cache dropped
+- ``traycer_coalesced_updates``      updates per ``CoalescingWriter`` flush
+- ``traycer_outbox_depth``           queued batches seen by each queued send
+- ``traycer_spooled_total``          messages spooled while the HUD was unreachable
+
+Writes carrying several messages are labelled with their common op, or
+``mixed``. Set ``TRAYCER_METRICS`` to a file path to have every process dump
+the registry there every ``TRAYCER_METRICS_INTERVAL`` seconds (default 60)
+and at exit: Prometheus text format for ``*.prom`` (node_exporter textfile
+collector), JSON otherwise. ``{script}`` and ``{pid}`` in the path are
+substituted so concurrent producers don't overwrite each other.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+from traycer_state import write_bytes_atomic
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 16384, 65536)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+DEFAULT_DUMP_INTERVAL = 60.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one optional label dimension."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], label: Optional[str] = None) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label = label
+        # label value -> [per-bucket counts..., +Inf count, sum, max]
+        self._series: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label: str = "") -> None:
+        i = bisect_left(self.buckets, value)
+        n = len(self.buckets)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [0] * (n + 1) + [0.0, value]
+            series[i] += 1
+            series[n + 1] += value
+            if value > series[n + 2]:
+                series[n + 2] = value
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        n = len(self.buckets)
+        out = {}
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label, series in items:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:n + 1]):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else _num(bound)] = running
+            out[label] = {"count": running, "sum": series[n + 1], "max": series[n + 2], "buckets": cumulative}
+        return out
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None) -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, label: str = "") -> None:
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {label: {"value": value} for label, value in self._values.items()}
+
+
+def _num(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Added to every exported series, e.g. {"script": "weather"}.
+        self.const_labels: Dict[str, str] = {}
+
+    def _get(self, cls: type, name: str, *args: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name!r} already registered as a {metric.kind}")
+            return metric
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  label: Optional[str] = None) -> Histogram:
+        return self._get(Histogram, name, help, buckets, label)
+
+    def counter(self, name: str, help: str, label: Optional[str] = None) -> Counter:
+        return self._get(Counter, name, help, label)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "created": time.time(),
+            "pid": os.getpid(),
+            "labels": dict(self.const_labels),
+            "metrics": {
+                m.name: {"type": m.kind, "help": m.help, "label": m.label, "series": m.snapshot()}
+                for m in metrics
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2) + "\n"
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        const = [f'{k}="{_escape(v)}"' for k, v in sorted(snap["labels"].items())]
+        lines: List[str] = []
+        for name, metric in sorted(snap["metrics"].items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for label_value, data in sorted(metric["series"].items()):
+                labels = list(const)
+                if metric["label"]:
+                    labels.append(f'{metric["label"]}="{_escape(label_value)}"')
+                if metric["type"] == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_num(data['value'])}")
+                    continue
+                for le, count in data["buckets"].items():
+                    bucket_labels = labels + ['le="%s"' % le]
+                    lines.append(f"{name}_bucket{_labels(bucket_labels)} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_num(data['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write a snapshot atomically; ``.prom`` files get Prometheus text format."""
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        write_bytes_atomic(path, text.encode("utf-8"))
+
+
+def _labels(parts: List[str]) -> str:
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+REGISTRY = Registry()
+
+
+def script_name() -> str:
+    name = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else "python"))[0]
+    return name or "python"
+
+
+def expand_path(template: str) -> str:
+    return template.replace("{script}", script_name()).replace("{pid}", str(os.getpid()))
+
+
+class Dumper:
+    """Dumps a registry to ``path`` every ``interval`` seconds and once more on ``stop()``."""
+
+    def __init__(self, path: str, interval: float = DEFAULT_DUMP_INTERVAL, registry: Registry = REGISTRY) -> None:
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="traycer-metrics", daemon=True)
+
+    def start(self) -> "Dumper":
+        if self.interval > 0:
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self) -> None:
+        try:
+            self.registry.dump(self.path)
+        except OSError as exc:
+            print(f"traycer: metrics dump to {self.path} failed: {exc}", file=sys.stderr)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self.dump()
+
+
+_dumper: Optional[Dumper] = None
+
+
+def autostart() -> Optional[Dumper]:
+    """Start dumping to ``TRAYCER_METRICS`` if set; idempotent."""
+    global _dumper
+    if _dumper is None:
+        path = os.environ.get("TRAYCER_METRICS")
+        if not path:
+            return None
+        try:
+            interval = float(os.environ.get("TRAYCER_METRICS_INTERVAL", DEFAULT_DUMP_INTERVAL))
+        except ValueError:
+            interval = DEFAULT_DUMP_INTERVAL
+        REGISTRY.const_labels.setdefault("script", script_name())
+        _dumper = Dumper(expand_path(path), interval).start()
+        atexit.register(_dumper.stop)
+    return _dumper
+
+
+# ---- Send-path metrics ----
+CONNECT_SECONDS = REGISTRY.histogram("traycer_connect_seconds", "Time to open the HUD pipe, including backoff")
+CONNECT_RETRIES = REGISTRY.histogram("traycer_connect_retries", "Failed connect attempts before success or giving up",
+                                     COUNT_BUCKETS)
+CONNECT_FAILURES = REGISTRY.counter("traycer_connect_failures_total", "Connects that gave up after the timeout")
+WRITE_SECONDS = REGISTRY.histogram("traycer_write_seconds", "Time per transport write", label="op")
+WRITE_BYTES = REGISTRY.histogram("traycer_write_bytes", "Bytes per transport write", SIZE_BUCKETS, label="op")
+WRITE_RETRIES = REGISTRY.counter("traycer_write_retries_total", "Writes retried after a stale handle")
+WRITE_FAILURES = REGISTRY.counter("traycer_write_failures_total", "Writes that failed with TraycerError", label="op")
+SUPPRESSED = REGISTRY.counter("traycer_suppressed_total", "Messages dropped by the well-state cache as no-ops")
+COALESCED_UPDATES = REGISTRY.histogram("traycer_coalesced_updates", "Pending set updates per coalesced flush",
+                                       COUNT_BUCKETS)
+OUTBOX_DEPTH = REGISTRY.histogram("traycer_outbox_depth", "Batches already queued when a send was queued",
+                                  COUNT_BUCKETS + (100, 250))
+SPOOLED = REGISTRY.counter("traycer_spooled_total", "Messages spooled while the HUD was unreachable")
+
+
+def op_label(payloads: Sequence[Dict[str, Any]]) -> str:
+    ops = {str(p.get("op", "?")).lower() for p in payloads}
+    return ops.pop() if len(ops) == 1 else "mixed"
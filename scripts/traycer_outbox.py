@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Non-blocking sends for ``TraycerClient``.
+
+An ``Outbox`` puts outgoing messages on a bounded in-memory queue that a
+background thread delivers, so producers never wait on the pipe. When a
+delivery fails (HUD not running) or the queue is full, messages go to a
+``Spool`` instead: a compacted log holding only the latest state per well,
+saved to disk so it also survives the producer exiting. Once the HUD is back
+the spool is replayed as one snapshot write (placement, the wells via
+``add``, or ``config`` if the producer itself sent one, then a single
+``bulk``), followed by whatever was sent in the meantime.
+
+A plain ``config`` is only replayed when the producer sent one: it replaces
+every well, including the HUD's own and other producers'.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+import traycer_metrics as metrics
+import traycer_profile as profile
+from traycer_state import WELL_FIELDS, read_json, write_json_atomic
+
+DEFAULT_QUEUE_SIZE = 256
+RETRY_INTERVAL = 2.0
+# close() waits for queued sends for a full connect attempt (the single-instance pipe may
+# be held by another producer's idle linger) plus this much for the write. A connect that
+# finds no HUD at all fails within a few hundred ms, so close() doesn't wait on it.
+DRAIN_GRACE = 0.3
+DRAIN_TIMEOUT = 5.0 + DRAIN_GRACE
+SPOOL_VERSION = 1
+SPOOL_MAX_AGE = 24 * 60 * 60.0
+# Compact the spool log once it grows past this many messages.
+COMPACT_AT = 512
+
+Payload = Dict[str, Any]
+Deliver = Callable[[List[Payload]], None]
+
+
+def compact(payloads: List[Payload]) -> List[Payload]:
+    """The shortest message list that leaves the HUD in the same state as ``payloads``."""
+    placement: Dict[str, Any] = {}
+    config = False
+    # well -> (add or resize, width, index)
+    layout: Dict[str, Tuple[str, Any, Optional[int]]] = {}
+    fields: Dict[str, Dict[str, Any]] = {}
+    removed: List[str] = []
+    for p in payloads:
+        op = str(p.get("op", "")).lower()
+        well = p.get("well")
+        if op in ("set", "bind") and isinstance(well, str):
+            fields.setdefault(well, {}).update({k: v for k, v in p.items() if k in WELL_FIELDS})
+        elif op == "bulk" and isinstance(p.get("updates"), list):
+            for u in p["updates"]:
+                if isinstance(u, dict) and isinstance(u.get("well"), str):
+                    fields.setdefault(u["well"], {}).update({k: v for k, v in u.items() if k in WELL_FIELDS})
+        elif op in ("add", "resize") and isinstance(well, str):
+            kind, width, index = layout.get(well, (op, None, None))
+            if op == "add":
+                kind, index = "add", p.get("index", index)
+                if well in removed:
+                    removed.remove(well)
+            layout[well] = (kind, p.get("width", width), index)
+        elif op == "remove" and isinstance(well, str):
+            layout.pop(well, None)
+            fields.pop(well, None)
+            if well not in removed:
+                removed.append(well)
+        elif op == "config" and isinstance(p.get("wells"), list):
+            # The HUD rebuilds exactly these wells, blank; actions survive.
+            config = True
+            removed = []
+            layout = {}
+            kept = {}
+            for entry in p["wells"]:
+                if isinstance(entry, dict) and isinstance(entry.get("id"), str):
+                    layout[entry["id"]] = ("add", entry.get("width"), None)
+                    action = fields.get(entry["id"], {}).get("action")
+                    kept[entry["id"]] = {"action": action} if action is not None else {}
+            fields = kept
+        elif op == "placement":
+            placement.update({k: v for k, v in p.items() if k != "op"})
+
+    out: List[Payload] = []
+    if placement:
+        out.append({"op": "placement", **placement})
+    if config:
+        out.append({"op": "config", "wells": [
+            {"id": w, "width": width} if width is not None else {"id": w} for w, (_, width, _) in layout.items()]})
+    else:
+        out += [{"op": "remove", "well": w} for w in removed]
+        for w, (kind, width, index) in layout.items():
+            msg: Payload = {"op": kind, "well": w}
+            if width is not None:
+                msg["width"] = width
+            if index is not None:
+                msg["index"] = index
+            out.append(msg)
+    updates = [{"op": "set", "well": w, **f} for w, f in fields.items() if f]
+    if updates:
+        out.append({"op": "bulk", "updates": updates})
+    return out
+
+
+class Spool:
+    """Messages that could not be delivered, compacted to the latest state."""
+
+    def __init__(self, path: Optional[str] = None, *, max_age: float = SPOOL_MAX_AGE) -> None:
+        self.path = path
+        self.log: List[Payload] = []
+        # Bumped on every change, so a delivered snapshot is only cleared if nothing arrived meanwhile.
+        self.version = 0
+        data = read_json(path)
+        if (isinstance(data, dict) and data.get("version") == SPOOL_VERSION
+                and time.time() - float(data.get("saved", 0)) <= max_age
+                and isinstance(data.get("messages"), list)):
+            self.log = [m for m in data["messages"] if isinstance(m, dict)]
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    def record(self, payloads: List[Payload]) -> None:
+        self.log.extend(payloads)
+        self.version += 1
+        if len(self.log) > COMPACT_AT:
+            self.log = compact(self.log)
+
+    def record_older(self, payloads: List[Payload]) -> None:
+        """Add messages that predate everything already spooled."""
+        self.log[:0] = payloads
+        self.version += 1
+
+    def snapshot(self) -> List[Payload]:
+        return compact(self.log)
+
+    def clear(self) -> None:
+        self.log = []
+        self.version += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        try:
+            if self.log:
+                write_json_atomic(self.path, {"version": SPOOL_VERSION, "saved": time.time(),
+                                              "messages": compact(self.log)})
+            elif os.path.exists(self.path):
+                os.unlink(self.path)
+        except OSError as exc:
+            print(f"traycer: could not write spool {self.path}: {exc}", file=sys.stderr)
+
+
+class Outbox:
+    """Bounded queue drained by a background thread; falls back to a ``Spool``."""
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        *,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        spool: Optional[Spool] = None,
+        retry_interval: float = RETRY_INTERVAL,
+        drain_timeout: float = DRAIN_TIMEOUT,
+        errors: Tuple[Type[BaseException], ...] = (Exception,),
+    ) -> None:
+        self._deliver = deliver
+        self.maxsize = maxsize
+        self.spool = spool if spool is not None else Spool()
+        self.retry_interval = retry_interval
+        self.drain_timeout = drain_timeout
+        self._errors = errors
+        # Each batch is delivered within the profiling session that queued it.
+        self._queue: Deque[Tuple[List[Payload], Deliver]] = deque()
+        self._replay: Deliver = deliver
+        self._cond = threading.Condition()
+        # While set, new messages go to the spool so they can't overtake spooled state.
+        self._spooling = len(self.spool) > 0
+        self._next_retry = 0.0
+        # The batch the worker is delivering, unless it is a spool snapshot.
+        self._inflight: Optional[List[Payload]] = None
+        self._busy = False
+        self._closing = False
+        self._offline = False
+        self._thread: Optional[threading.Thread] = None
+        if self._spooling:
+            # Left over from an earlier run: replay it as soon as the HUD is up.
+            self._start()
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self._thread
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="traycer-outbox", daemon=True)
+            self._thread.start()
+
+    def put(self, payloads: List[Payload]) -> None:
+        """Queue ``payloads`` for delivery; never blocks on the pipe."""
+        if not payloads:
+            return
+        deliver = profile.propagate(self._deliver)
+        with self._cond:
+            metrics.OUTBOX_DEPTH.observe(len(self._queue))
+            if self._spooling or self._closing or len(self._queue) >= self.maxsize:
+                self._spooling = True
+                self.spool.record(payloads)
+                self._replay = deliver
+                metrics.SPOOLED.inc(len(payloads))
+                if self._closing:
+                    self.spool.save()
+            else:
+                self._queue.append((payloads, deliver))
+            self._start()
+            self._cond.notify_all()
+
+    def _wait(self, done: Callable[[], bool], timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not done():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued (and spooled) was delivered."""
+        return self._wait(lambda: not (self._queue or self._busy or self._spooling), timeout)
+
+    def settle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued was delivered or, with the HUD down, spooled."""
+        return self._wait(self._settled, self.drain_timeout if timeout is None else timeout)
+
+    def _settled(self) -> bool:
+        # Everything was delivered, or has failed once and sits in the spool.
+        if self._queue:
+            return False
+        if self._busy:
+            return self._offline and self._inflight is None
+        return not self._spooling or self._offline
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to ``timeout`` seconds for queued sends to go out or fail, then spool what is left.
+
+        Returns ``False`` if the worker is still busy (e.g. waiting on a connect).
+        """
+        drained = self.settle(timeout)
+        with self._cond:
+            self._closing = True
+            if not drained:
+                # The in-flight batch may still arrive; replaying its state later is harmless.
+                pending = ([self._inflight] if self._inflight else []) + [b for b, _ in self._queue]
+                self._queue.clear()
+                self.spool.record_older([p for batch in pending for p in batch])
+                self._spooling = True
+            if self._spooling:
+                self.spool.save()
+            self._cond.notify_all()
+            busy = self._busy
+        if self._thread is not None and not busy:
+            self._thread.join(timeout=0.5)
+        return not busy
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._queue:
+                        (batch, deliver), snapshot, version = self._queue.popleft(), False, 0
+                        break
+                    if self._spooling and self.spool:
+                        remaining = self._next_retry - time.monotonic()
+                        if remaining <= 0 and not self._closing:
+                            batch, snapshot, version = self.spool.snapshot(), True, self.spool.version
+                            deliver = self._replay
+                            break
+                        if self._closing:
+                            return
+                        self._cond.wait(remaining)
+                        continue
+                    if self._spooling:
+                        self._spooling = False
+                        self._cond.notify_all()
+                        continue
+                    if self._closing:
+                        return
+                    self._cond.wait()
+                self._busy = True
+                self._inflight = None if snapshot else batch
+            error: Optional[BaseException] = None
+            try:
+                deliver(batch)
+            except self._errors as exc:
+                error = exc
+            except Exception as exc:
+                # Not a delivery problem (e.g. an unencodable message); retrying won't help.
+                print(f"traycer: dropping {len(batch)} message(s): {exc}", file=sys.stderr)
+                version = self.spool.version
+            with self._cond:
+                self._busy = False
+                self._inflight = None
+                if error is None:
+                    if snapshot and self.spool.version == version:
+                        self.spool.clear()
+                        self.spool.save()
+                        self._spooling = False
+                    if self._offline and not self._spooling:
+                        self._offline = False
+                        print("traycer: HUD reachable again; spooled state replayed", file=sys.stderr)
+                else:
+                    if not snapshot and not self._closing:
+                        # Older than anything spooled or still queued behind it.
+                        older = batch + [p for b, _ in self._queue for p in b]
+                        self._queue.clear()
+                        self.spool.record_older(older)
+                        self._replay = deliver
+                        metrics.SPOOLED.inc(len(older))
+                    self._spooling = True
+                    self._next_retry = time.monotonic() + self.retry_interval
+                    self.spool.save()
+                    if not self._offline:
+                        self._offline = True
+                        where = f" to {self.spool.path}" if self.spool.path else ""
+                        print(f"traycer: {error}; spooling updates{where}", file=sys.stderr)
+                self._cond.notify_all()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Phase timing for the producer scripts.
+
+Wrap phases with ``span("name")`` or ``@timed()``; both cost one global
+lookup when profiling is off. ``session(args)`` turns profiling on for a run
+when the script was started with ``--profile`` (see ``add_arguments``) and
+prints a per-phase breakdown to stderr when the run ends::
+
+    phase               calls   total ms    self ms  % wall
+    parse_ics_events        1      412.3      412.3    71.0
+    fetch                   1      120.9      120.9    20.8
+    ...
+
+``self`` excludes time spent in nested spans. The active profiler is held in
+a context variable, so concurrent sessions (e.g. plugins under
+``traycer_daemon``) each report only their own spans. Work handed to a thread
+pool is included when wrapped with ``propagate(fn)``; totals can then exceed
+wall time when work overlaps.
+``--profile-out FILE`` additionally runs ``cProfile`` on the main thread and
+writes its stats to ``FILE`` (read with ``python -m pstats FILE``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import contextvars
+import functools
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started", "child")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.child = 0.0
+
+    def __enter__(self) -> None:
+        self.profiler._stack().append(self)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        elapsed = time.perf_counter() - self.started
+        stack = self.profiler._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        self.profiler._record(self.name, elapsed, elapsed - self.child)
+
+
+class Profiler:
+    """Accumulates calls, total and self time per span name."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name: str, total: float, self_time: float) -> None:
+        with self._lock:
+            entry = self.totals.get(name)
+            if entry is None:
+                self.totals[name] = [1, total, self_time]
+            else:
+                entry[0] += 1
+                entry[1] += total
+                entry[2] += self_time
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def report(self, out: TextIO = sys.stderr) -> None:
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            rows = sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True)
+        width = max([len("phase")] + [len(name) for name, _ in rows])
+        print(f"{'phase':<{width}} {'calls':>7} {'total ms':>10} {'self ms':>10} {'% wall':>7}", file=out)
+        for name, (calls, total, self_time) in rows:
+            share = 100.0 * total / wall if wall > 0 else 0.0
+            print(f"{name:<{width}} {int(calls):>7} {total * 1000:>10.1f} {self_time * 1000:>10.1f} {share:>7.1f}",
+                  file=out)
+        print(f"{'wall':<{width}} {'':>7} {wall * 1000:>10.1f}", file=out)
+
+
+_active: contextvars.ContextVar[Optional[Profiler]] = contextvars.ContextVar("traycer_profile", default=None)
+
+
+def current() -> Optional[Profiler]:
+    """The profiler of the session running in this context, if any."""
+    return _active.get()
+
+
+def propagate(fn: F) -> F:
+    """Bind ``fn`` to the calling context's session, for running it on another thread."""
+    profiler = _active.get()
+    if profiler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _active.set(profiler)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def span(name: str) -> Any:
+    """Context manager timing ``name`` while profiling is on; a shared no-op otherwise."""
+    profiler = _active.get()
+    return _NULL_SPAN if profiler is None else _Span(profiler, name)
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of ``span``; the name defaults to the function's."""
+
+    def decorate(fn: F) -> F:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _active.get()
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with _Span(profiler, label):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true", help="Print a per-phase timing breakdown to stderr")
+    parser.add_argument("--profile-out", metavar="FILE", help="Also write cProfile stats to FILE (implies --profile)")
+
+
+@contextlib.contextmanager
+def session(args: Optional[argparse.Namespace] = None, *, enabled: Optional[bool] = None,
+            cprofile_path: Optional[str] = None, out: TextIO = sys.stderr) -> Iterator[Optional[Profiler]]:
+    """Profile the enclosed run if ``--profile``/``--profile-out`` was given."""
+    if args is not None:
+        cprofile_path = cprofile_path or getattr(args, "profile_out", None)
+        if enabled is None:
+            enabled = bool(getattr(args, "profile", False))
+    enabled = bool(enabled or cprofile_path)
+    outer = _active.get()
+    if not enabled or outer is not None:
+        # Off, or nested inside a session that already reports.
+        yield outer
+        return
+
+    profiler = Profiler()
+    token = _active.set(profiler)
+    cprof = None
+    if cprofile_path:
+        import cProfile
+
+        cprof = cProfile.Profile()
+        cprof.enable()
+    try:
+        yield profiler
+    finally:
+        if cprof is not None:
+            cprof.disable()
+        _active.reset(token)
+        profiler.report(out)
+        if cprof is not None:
+            try:
+                cprof.dump_stats(cprofile_path)
+                print(f"cProfile stats written to {cprofile_path}", file=out)
+            except OSError as exc:
+                print(f"Failed writing cProfile stats: {exc}", file=out)
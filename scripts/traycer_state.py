@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Last-sent well state for suppressing no-op updates.
+
+``WellStateCache`` remembers the text/fg/bg/blink/action most recently sent
+for each well, plus the wells this client has created and their widths.
+``filter()`` drops ``set`` messages that would not change the HUD, trims the
+rest down to the fields that differ, and skips ``add``/``resize`` ops for
+wells that already exist at that width. The cache can be persisted to a small
+JSON file so short-lived scheduled scripts share it across runs.
+
+Everything is keyed on the HUD session reported by the transport (the HUD's
+process id and start time on Windows). When the session changes the HUD has
+restarted, so the cache is dropped and wells are created again; when the
+transport cannot identify the HUD nothing is filtered at all. Wells can also
+be blanked behind the cache's back (another producer's ``config``, the tray
+menu), so a well's full state is re-sent, and its ``add`` repeated, once
+they are ``refresh_after`` seconds old.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+WELL_FIELDS = ("text", "fg", "bg", "blink", "action")
+STATE_VERSION = 3
+DEFAULT_MAX_AGE = 2 * 60 * 60.0
+# Re-send a well's remembered fields and its add at least this often, even if unchanged.
+DEFAULT_REFRESH_AFTER = 10 * 60.0
+
+_MISSING = object()
+
+
+def default_state_path(name: str = "client-state.json") -> str:
+    """Per-user location for Traycer client state files."""
+    env = os.environ.get("TRAYCER_STATE_DIR")
+    if env:
+        base = env
+    elif sys.platform == "win32":
+        base = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "Traycer")
+    else:
+        base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "traycer")
+    return os.path.join(base, name)
+
+
+def write_bytes_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def read_json(path: Optional[str]) -> Optional[Any]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+class WellStateCache:
+    """Tracks what the HUD is showing, as far as this client knows."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        max_age: float = DEFAULT_MAX_AGE,
+        refresh_after: float = DEFAULT_REFRESH_AFTER,
+    ) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.refresh_after = refresh_after
+        self.wells: Dict[str, Dict[str, Any]] = {}
+        # When each well's complete remembered state was last sent.
+        self.sent: Dict[str, float] = {}
+        self.layout: Dict[str, float] = {}
+        # When each well was last created (add/config) by a message we sent.
+        self.added: Dict[str, float] = {}
+        self.session: Optional[str] = None
+        self._session_known = False
+        self._touched: Set[str] = set()
+        self._cleared = False
+        if path:
+            self._load()
+
+    # ---- Persistence ----
+    def _load(self) -> None:
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return
+        if time.time() - float(data.get("saved", 0)) > self.max_age:
+            return
+        wells = data.get("wells")
+        if isinstance(wells, dict):
+            self.wells = {k: dict(v) for k, v in wells.items() if isinstance(v, dict)}
+        sent = data.get("sent")
+        if isinstance(sent, dict):
+            self.sent = {k: float(v) for k, v in sent.items() if isinstance(v, (int, float))}
+        layout = data.get("layout")
+        if isinstance(layout, dict):
+            self.layout = {k: float(v) for k, v in layout.items() if isinstance(v, (int, float))}
+        added = data.get("added")
+        if isinstance(added, dict):
+            self.added = {k: float(v) for k, v in added.items() if isinstance(v, (int, float))}
+        self.session = data.get("session")
+
+    def save(self) -> None:
+        """Write touched wells back, merging with entries other processes saved."""
+        if not self.path or not (self._touched or self._cleared):
+            return
+        merged: Dict[str, Dict[str, Any]] = {}
+        merged_sent: Dict[str, float] = {}
+        merged_layout: Dict[str, float] = {}
+        merged_added: Dict[str, float] = {}
+        on_disk = None if self._cleared else read_json(self.path)
+        # Entries saved against another HUD session are stale; don't carry them over.
+        if isinstance(on_disk, dict) and on_disk.get("session") == self.session:
+            if isinstance(on_disk.get("wells"), dict):
+                merged.update(on_disk["wells"])
+            if isinstance(on_disk.get("sent"), dict):
+                merged_sent.update(on_disk["sent"])
+            if isinstance(on_disk.get("layout"), dict):
+                merged_layout.update(on_disk["layout"])
+            if isinstance(on_disk.get("added"), dict):
+                merged_added.update(on_disk["added"])
+        else:
+            self._touched.update(self.wells)
+            self._touched.update(self.layout)
+        for well_id in self._touched:
+            if well_id in self.wells:
+                merged[well_id] = self.wells[well_id]
+            else:
+                merged.pop(well_id, None)
+            if well_id in self.sent:
+                merged_sent[well_id] = self.sent[well_id]
+            else:
+                merged_sent.pop(well_id, None)
+            if well_id in self.layout:
+                merged_layout[well_id] = self.layout[well_id]
+            else:
+                merged_layout.pop(well_id, None)
+            if well_id in self.added:
+                merged_added[well_id] = self.added[well_id]
+            else:
+                merged_added.pop(well_id, None)
+        data = {
+            "version": STATE_VERSION,
+            "saved": time.time(),
+            "session": self.session,
+            "wells": merged,
+            "sent": merged_sent,
+            "layout": merged_layout,
+            "added": merged_added,
+        }
+        try:
+            write_json_atomic(self.path, data)
+        except OSError:
+            return
+        self._touched.clear()
+        self._cleared = False
+
+    # ---- Session ----
+    def bind_session(self, session: Optional[str]) -> None:
+        """Record which HUD instance we are connected to, dropping stale state."""
+        self._session_known = session is not None
+        if session is not None and session == self.session:
+            return
+        # A different HUD, or one we can't identify (possibly restarted): nothing we remember is verifiable.
+        self.clear()
+        self.session = session
+
+    @property
+    def session_known(self) -> bool:
+        return self._session_known
+
+    # ---- Diffing ----
+    def diff(self, update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return ``update`` reduced to changed fields, or ``None`` if it is a no-op.
+
+        A well not fully re-sent for ``refresh_after`` seconds gets everything
+        remembered for it sent again, in case the HUD blanked it meanwhile.
+        """
+        well_id = update.get("well")
+        known = self.wells.get(well_id, {})
+        if time.time() - self.sent.get(well_id, 0.0) >= self.refresh_after:
+            return {**update, **{k: v for k, v in known.items() if k not in update}} if known else update
+        changed = {k: v for k, v in update.items() if k in WELL_FIELDS and known.get(k, _MISSING) != v}
+        if not changed:
+            return None
+        out = {k: v for k, v in update.items() if k not in WELL_FIELDS}
+        out.update(changed)
+        return out
+
+    def filter(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Trim a message before sending; ``None`` means nothing needs to go out."""
+        if not self._session_known:
+            # Can't tell whether the HUD restarted since these were recorded.
+            return payload
+        op = str(payload.get("op", "")).lower()
+        if op == "set" and "well" in payload:
+            return self.diff(payload)
+        if op == "bulk" and isinstance(payload.get("updates"), list):
+            updates = [u for u in (self.diff(u) if "well" in u else u for u in payload["updates"]) if u]
+            if not updates:
+                return None
+            return {**payload, "updates": updates}
+        if op in ("add", "resize"):
+            # Only trust the layout when we know which HUD instance created it.
+            known = self.layout.get(payload.get("well"))
+            if known is None or time.time() - self.added.get(payload.get("well"), 0.0) >= self.refresh_after:
+                # Unknown, or long enough ago that it may have been removed since.
+                return payload
+            if known == payload.get("width"):
+                return None
+            if op == "add":
+                # An add on an existing well is a resize plus ReassertTopmost().
+                return {"op": "resize", "well": payload["well"], "width": payload.get("width")}
+        return payload
+
+    def record(self, payload: Dict[str, Any]) -> None:
+        """Apply a message that was successfully sent."""
+        op = str(payload.get("op", "")).lower()
+        if op == "set":
+            self._record_set(payload)
+        elif op == "bulk":
+            for update in payload.get("updates") or []:
+                self._record_set(update)
+        elif op == "bind" and "well" in payload:
+            self._record_set({"well": payload["well"], "action": payload.get("action")})
+        elif op in ("add", "resize"):
+            well_id = payload.get("well")
+            if isinstance(well_id, str) and isinstance(payload.get("width"), (int, float)):
+                if op == "add" or well_id in self.layout:
+                    self.layout[well_id] = float(payload["width"])
+                    self._touched.add(well_id)
+                if op == "add":
+                    self.added[well_id] = time.time()
+        elif op == "remove":
+            self.forget([payload.get("well")])
+        elif op == "config" and isinstance(payload.get("wells"), list):
+            # The HUD rebuilds exactly these wells, blank; actions survive.
+            self._touched.update(self.wells)
+            self._touched.update(self.layout)
+            wells: Dict[str, Dict[str, Any]] = {}
+            layout: Dict[str, float] = {}
+            for entry in payload["wells"]:
+                well_id = entry.get("id") if isinstance(entry, dict) else None
+                if not isinstance(well_id, str):
+                    continue
+                layout[well_id] = float(entry.get("width", 200.0))
+                action = self.wells.get(well_id, {}).get("action")
+                wells[well_id] = {"action": action} if action is not None else {}
+            self.wells, self.layout = wells, layout
+            now = time.time()
+            self.sent = {well_id: now for well_id in wells}
+            self.added = {well_id: now for well_id in layout}
+            self._touched.update(self.wells)
+
+    def _record_set(self, update: Dict[str, Any]) -> None:
+        well_id = update.get("well")
+        if not isinstance(well_id, str):
+            return
+        fields = self.wells.setdefault(well_id, {})
+        fields.update({k: v for k, v in update.items() if k in WELL_FIELDS})
+        if all(k in update for k in fields):
+            # Everything we remember for this well went out in this message.
+            self.sent[well_id] = time.time()
+        self._touched.add(well_id)
+
+    def forget(self, well_ids: Iterable[Optional[str]]) -> None:
+        for well_id in well_ids:
+            if well_id is not None:
+                self.wells.pop(well_id, None)
+                self.sent.pop(well_id, None)
+                self.layout.pop(well_id, None)
+                self.added.pop(well_id, None)
+                self._touched.add(well_id)
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after the HUD may have restarted."""
+        self.wells.clear()
+        self.sent.clear()
+        self.layout.clear()
+        self.added.clear()
+        self._touched.clear()
+        self._cleared = True
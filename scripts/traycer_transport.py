@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Transport backends for talking to the Traycer HUD.
+
+A transport is chosen by URL (or the ``TRAYCER_PIPE`` environment variable):
+
+- ``\\\\.\\pipe\\TraycerHud`` or ``pipe://TraycerHud`` – Windows named pipe
+- ``unix:///tmp/traycer.sock`` – Unix-domain stream socket
+- ``fifo:///tmp/traycer.fifo`` – POSIX FIFO
+- ``memory://name`` – in-process hub, served by ``traycer_fakehud``
+
+Bare filesystem paths are probed: sockets and FIFOs are detected by file type.
+If ``TRAYCER_RECORD`` names a file, every write is also appended to it as a
+timestamped capture (see ``traycer_capture``).
+Every backend exposes the same small surface (``connect``/``write``/``close``)
+and raises ``OSError`` on failure so the client can apply one retry policy.
+``session_id()`` identifies the HUD instance on the other end (process id and
+start time for the named pipe, the socket file's inode and change time for
+Unix sockets) so callers can tell when the HUD has restarted. FIFOs have no
+stable identity (writes touch their timestamps) and report ``None``.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import socket
+import stat
+import sys
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Dict, Optional
+
+PIPE_NAME = r"\\.\pipe\TraycerHud"
+PIPE_PREFIX = "\\\\.\\pipe\\"
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "traycer.sock")
+
+
+def default_url() -> str:
+    """Return the transport URL used when none is given explicitly."""
+    env = os.environ.get("TRAYCER_PIPE")
+    if env:
+        return env
+    if sys.platform == "win32":
+        return PIPE_NAME
+    return f"unix://{DEFAULT_SOCKET}"
+
+
+class Transport:
+    """Base class for a one-way NDJSON connection to the HUD."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    @property
+    def connected(self) -> bool:
+        raise NotImplementedError
+
+    def connect(self) -> None:
+        raise NotImplementedError
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def session_id(self) -> Optional[str]:
+        """Identity of the connected HUD instance, or ``None`` if unknown."""
+        return None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.url!r})"
+
+
+class NamedPipeTransport(Transport):
+    """Windows named pipe opened as a plain binary file."""
+
+    def __init__(self, url: str, path: str) -> None:
+        super().__init__(url)
+        self.path = path
+        self._handle: Optional[BinaryIO] = None
+        self._session: Optional[str] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._handle is not None
+
+    def connect(self) -> None:
+        self._handle = open(self.path, "wb", buffering=0)
+        self._session = _pipe_server_session(self._handle)
+
+    def session_id(self) -> Optional[str]:
+        return self._session if self._handle is not None else None
+
+    def write(self, data: bytes) -> None:
+        if self._handle is None:
+            raise BrokenPipeError("not connected")
+        self._handle.write(data)
+
+    def close(self) -> None:
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            try:
+                handle.close()
+            except OSError:
+                pass
+
+
+class FifoTransport(Transport):
+    """POSIX FIFO; connecting fails fast (ENXIO) while no reader is attached."""
+
+    def __init__(self, url: str, path: str) -> None:
+        super().__init__(url)
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._fd is not None
+
+    def connect(self) -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        os.set_blocking(fd, True)
+        self._fd = fd
+
+    def write(self, data: bytes) -> None:
+        if self._fd is None:
+            raise BrokenPipeError("not connected")
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+
+    def close(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class UnixSocketTransport(Transport):
+    """Unix-domain stream socket."""
+
+    def __init__(self, url: str, path: str) -> None:
+        super().__init__(url)
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        self._session: Optional[str] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._session = _path_session(self.path)
+
+    def session_id(self) -> Optional[str]:
+        return self._session if self._sock is not None else None
+
+    def write(self, data: bytes) -> None:
+        if self._sock is None:
+            raise BrokenPipeError("not connected")
+        self._sock.sendall(data)
+
+    def close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+class MemoryHub:
+    """In-process endpoint that ``memory://`` transports deliver bytes to."""
+
+    def __init__(self, name: str, on_data: Callable[[bytes], None]) -> None:
+        self.name = name
+        self._on_data = on_data
+        self.session = f"memory:{name}:{next(_hub_ids)}"
+        # Mirrors the HUD's single server instance: one writer at a time.
+        self._lock = threading.Lock()
+
+    def deliver(self, data: bytes) -> None:
+        with self._lock:
+            self._on_data(data)
+
+
+_memory_hubs: Dict[str, MemoryHub] = {}
+_hub_ids = itertools.count(1)
+
+
+def register_memory_hub(name: str, on_data: Callable[[bytes], None]) -> MemoryHub:
+    hub = MemoryHub(name, on_data)
+    _memory_hubs[name] = hub
+    return hub
+
+
+def unregister_memory_hub(name: str) -> None:
+    _memory_hubs.pop(name, None)
+
+
+class MemoryTransport(Transport):
+    """Delivers writes synchronously to a registered ``MemoryHub``."""
+
+    def __init__(self, url: str, name: str) -> None:
+        super().__init__(url)
+        self.name = name
+        self._hub: Optional[MemoryHub] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._hub is not None
+
+    def connect(self) -> None:
+        hub = _memory_hubs.get(self.name)
+        if hub is None:
+            raise FileNotFoundError(f"no in-memory Traycer hub named {self.name!r}")
+        self._hub = hub
+
+    def write(self, data: bytes) -> None:
+        hub = self._hub
+        if hub is None or _memory_hubs.get(self.name) is not hub:
+            self._hub = None
+            raise BrokenPipeError("in-memory hub went away")
+        hub.deliver(data)
+
+    def close(self) -> None:
+        self._hub = None
+
+    def session_id(self) -> Optional[str]:
+        return self._hub.session if self._hub is not None else None
+
+
+def _path_session(path: str) -> Optional[str]:
+    # The server binds a fresh socket file on start; inodes can be reused, ctimes can't.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_dev}:{st.st_ino}:{st.st_ctime_ns}"
+
+
+def _pipe_server_session(handle: BinaryIO) -> Optional[str]:
+    """Return ``"<pid>:<creation filetime>"`` of the pipe's server process."""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        import msvcrt
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.GetNamedPipeServerProcessId.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.ULONG)]
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        pid = wintypes.ULONG()
+        if not kernel32.GetNamedPipeServerProcessId(msvcrt.get_osfhandle(handle.fileno()), ctypes.byref(pid)):
+            return None
+        proc = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+        if not proc:
+            return f"{pid.value}:?"
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            if not kernel32.GetProcessTimes(proc, *(ctypes.byref(t) for t in times)):
+                return f"{pid.value}:?"
+            created = (times[0].dwHighDateTime << 32) | times[0].dwLowDateTime
+            return f"{pid.value}:{created}"
+        finally:
+            kernel32.CloseHandle(proc)
+    except (AttributeError, ImportError, OSError, ValueError):
+        return None
+
+
+def _split_scheme(url: str) -> tuple[str, str]:
+    if url.startswith(PIPE_PREFIX):
+        return "pipe", url
+    if "://" in url:
+        scheme, rest = url.split("://", 1)
+        return scheme.lower(), rest
+    return "", url
+
+
+def open_transport(url: Optional[str] = None, *, record: Optional[str] = None) -> Transport:
+    """Build a (not yet connected) transport for ``url``.
+
+    ``record`` (default: ``TRAYCER_RECORD``) wraps it in a ``TeeTransport``
+    writing a capture file; pass ``""`` to never record.
+    """
+    if record is None:
+        record = os.environ.get("TRAYCER_RECORD", "")
+    transport = _open_transport(url or default_url())
+    if record:
+        from traycer_capture import TeeTransport
+
+        return TeeTransport(transport, record)
+    return transport
+
+
+def _open_transport(url: str) -> Transport:
+    scheme, rest = _split_scheme(url)
+
+    if scheme == "pipe":
+        path = rest if rest.startswith(PIPE_PREFIX) else PIPE_PREFIX + rest
+        return NamedPipeTransport(url, path)
+    if scheme == "unix":
+        return UnixSocketTransport(url, rest)
+    if scheme == "fifo":
+        return FifoTransport(url, rest)
+    if scheme == "memory":
+        return MemoryTransport(url, rest)
+    if scheme:
+        raise ValueError(f"Unsupported Traycer transport: {url}")
+
+    # Bare path: probe the file type, fall back to the platform default.
+    try:
+        mode = os.stat(rest).st_mode
+    except OSError:
+        mode = 0
+    if stat.S_ISSOCK(mode):
+        return UnixSocketTransport(url, rest)
+    if stat.S_ISFIFO(mode):
+        return FifoTransport(url, rest)
+    if sys.platform == "win32":
+        return NamedPipeTransport(url, rest)
+    return UnixSocketTransport(url, rest)
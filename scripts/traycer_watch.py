@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Wait for changes to a git clone's refs.
+
+``open_watcher()`` returns an inotify-based watcher on Linux (via ctypes, no
+extra dependency) and a stat-polling watcher elsewhere. Both watch, per git
+directory, ``HEAD``, ``FETCH_HEAD``, ``packed-refs`` and everything under
+``refs/``, and expose the same calls:
+
+- ``wait(timeout)`` blocks until something changed (``True``) or the timeout
+  passed (``False``); an idle inotify watcher costs no CPU at all.
+- ``settle(quiet)`` swallows the burst of follow-up changes a ``git fetch`` or
+  ``commit`` produces, returning once nothing changed for ``quiet`` seconds.
+- ``reset()`` discards pending changes, e.g. ones the caller made itself.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+WATCHED_FILES = frozenset({"HEAD", "FETCH_HEAD", "packed-refs"})
+DEFAULT_POLL_INTERVAL = 2.0
+MAX_SETTLE = 10.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class Watcher:
+    def wait(self, timeout: Optional[float]) -> bool:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget changes seen so far (e.g. our own ``git fetch`` touching FETCH_HEAD)."""
+
+    def settle(self, quiet: float) -> None:
+        deadline = time.monotonic() + MAX_SETTLE
+        while time.monotonic() < deadline and self.wait(min(quiet, deadline - time.monotonic())):
+            pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    """Compares a stat fingerprint of the watched files every ``interval`` seconds."""
+
+    def __init__(self, git_dirs: Sequence[Path], interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.git_dirs = list(git_dirs)
+        self.interval = interval
+        self._last = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snap: Dict[str, Tuple[int, int]] = {}
+        for git_dir in self.git_dirs:
+            paths: List[str] = [str(git_dir / name) for name in WATCHED_FILES]
+            for root, _, files in os.walk(git_dir / "refs"):
+                paths.extend(os.path.join(root, name) for name in files if not name.endswith(".lock"))
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snap[path] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def reset(self) -> None:
+        self._last = self._snapshot()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+            snap = self._snapshot()
+            if snap != self._last:
+                self._last = snap
+                return True
+
+
+class InotifyWatcher(Watcher):
+    """Linux inotify through libc; new directories under ``refs/`` are watched as they appear."""
+
+    def __init__(self, git_dirs: Sequence[Path]) -> None:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        # wd -> (directory, is the top-level git dir)
+        self._dirs: Dict[int, Tuple[str, bool]] = {}
+        try:
+            for git_dir in git_dirs:
+                self._add(str(git_dir), top=True)
+                for root, _, _ in os.walk(git_dir / "refs"):
+                    self._add(root, top=False)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add(self, path: str, top: bool) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOENT:
+                return
+            raise OSError(err, f"inotify_add_watch failed: {path}")
+        self._dirs[wd] = (path, top)
+
+    def _drain(self) -> bool:
+        changed = False
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                name = buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0").decode(
+                    sys.getfilesystemencoding(), "replace")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    changed = True
+                    continue
+                directory, top = self._dirs.get(wd, ("", False))
+                if top:
+                    changed |= name in WATCHED_FILES
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add(os.path.join(directory, name), top=False)
+                if not name.endswith(".lock"):
+                    changed = True
+
+    def reset(self) -> None:
+        self._drain()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            # Only lock-file churn or unrelated .git files: keep waiting.
+            if self._drain():
+                return True
+
+    def close(self) -> None:
+        fd, self._fd = getattr(self, "_fd", -1), -1
+        if fd >= 0:
+            os.close(fd)
+
+
+def open_watcher(git_dirs: Sequence[Path], poll_interval: float = DEFAULT_POLL_INTERVAL) -> Watcher:
+    """The cheapest available watcher for ``git_dirs``."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(git_dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(git_dirs, poll_interval)
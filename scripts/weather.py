@@ -1,105 +1,204 @@
-import json
-import requests
+import argparse
 import sys
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import traycer_profile as profile
+from traycer_client import TraycerClient, TraycerError, get_client, settle_sends
+from traycer_http import HttpError, get
+from traycer_state import default_state_path, read_json, write_json_atomic
 
-PIPE_NAME = r"\\.\\pipe\\TraycerHud"
-CONNECT_TIMEOUT = 5.0
 TARGET_WELL = "weather"
 DEFAULT_WIDTH = 120
+API_BASE = "https://api.open-meteo.com"
+GEOCODE_BASE = "https://geocoding-api.open-meteo.com"
+GEOCODE_CACHE_FILE = "geocode.json"
+FORECAST_CACHE_FILE = "weather-forecast.json"
+SPOOL_FILE = "spool-weather.json"
+# Hours of hourly forecast fetched with each request; runs in between read from it.
+FORECAST_HOURS = 12
+DEFAULT_MAX_AGE_HOURS = 3.0
+# A cached forecast is never shown once it is older than this, even if a refetch failed.
+MAX_STALE_HOURS = FORECAST_HOURS
+SLOT_SECONDS = 3600
+UNAVAILABLE_TEXT = "❔  Weather unavailable"
 
+WEATHER_CODES = {
+    0: ("☀️", "Clear"),
+    1: ("🌤", "Mostly clear"),
+    2: ("⛅", "Partly cloudy"),
+    3: ("☁️", "Overcast"),
+    45: ("🌫", "Fog"),
+    48: ("🌫", "Rime fog"),
+    51: ("🌦", "Light drizzle"),
+    53: ("🌧", "Drizzle"),
+    55: ("🌧", "Heavy drizzle"),
+    61: ("🌦", "Light rain"),
+    63: ("🌧", "Rain"),
+    65: ("🌧", "Heavy rain"),
+    71: ("🌨", "Light snow"),
+    73: ("🌨", "Snow"),
+    75: ("❄️", "Heavy snow"),
+    80: ("🌦", "Showers"),
+    95: ("⛈", "Thunderstorm"),
+}
 
-def send_json(payload: dict) -> bool:
-    data = json.dumps(payload, ensure_ascii=False) + "\n"
-    deadline = time.time() + CONNECT_TIMEOUT
-    last_error = None
-    while time.time() < deadline:
-        try:
-            with open(PIPE_NAME, "w", encoding="utf-8", newline="\n") as pipe:
-                pipe.write(data)
-            return True
-        except (FileNotFoundError, OSError) as exc:
-            last_error = exc
-            time.sleep(0.1)
 
-    if last_error is not None:
-        print(f"Failed to send to Traycer: {last_error}", file=sys.stderr)
-    return False
+@dataclass
+class Location:
+    query: str
+    lat: float
+    lon: float
+    well: str = TARGET_WELL
+
+    @property
+    def key(self) -> str:
+        return f"{self.lat:.4f},{self.lon:.4f}"
+
+
+def send_json(payload: dict, client: Optional[TraycerClient] = None) -> bool:
+    try:
+        (client or get_client(state_file=default_state_path(), spool=default_state_path(SPOOL_FILE))).send(payload)
+    except TraycerError as exc:
+        print(f"Failed to send to Traycer: {exc}", file=sys.stderr)
+        return False
+    return True
 
 
-def ensure_well(width: int = DEFAULT_WIDTH) -> None:
-    send_json({"op": "add", "well": TARGET_WELL, "width": width})
+def ensure_well(width: int = DEFAULT_WIDTH, client: Optional[TraycerClient] = None, well: str = TARGET_WELL) -> None:
+    send_json({"op": "add", "well": well, "width": width}, client)
 
 
-def send_to_traycer(text: str, action: Optional[str] = None) -> bool:
-    ensure_well()
-    payload = {"op": "set", "well": TARGET_WELL, "text": text}
+def send_to_traycer(text: str, action: Optional[str] = None, client: Optional[TraycerClient] = None,
+                    well: str = TARGET_WELL) -> bool:
+    ensure_well(client=client, well=well)
+    payload = {"op": "set", "well": well, "text": text}
     if action:
         payload["action"] = action
-    return send_json(payload)
+    return send_json(payload, client)
 
 
-def get_weather(lat: float, lon: float) -> Optional[str]:
-    url = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}&current_weather=true"
-        "&temperature_unit=fahrenheit"
+def format_weather(temperature: float, code: int) -> str:
+    emoji, desc = WEATHER_CODES.get(code, ("❔", f"Code {code}"))
+    return f"{emoji}  {round(temperature)}°F {desc}"
+
+
+# ---- Forecasts ----
+def forecast_url(locations: List[Location], api_base: str = API_BASE) -> str:
+    """One Open-Meteo request for every location (it accepts coordinate lists)."""
+    lats = ",".join(str(loc.lat) for loc in locations)
+    lons = ",".join(str(loc.lon) for loc in locations)
+    return (
+        f"{api_base.rstrip('/')}/v1/forecast"
+        f"?latitude={lats}&longitude={lons}&current_weather=true"
+        f"&hourly=temperature_2m,weathercode&forecast_hours={FORECAST_HOURS}"
+        "&temperature_unit=fahrenheit&timeformat=unixtime"
     )
+
+
+@profile.timed()
+def fetch_forecasts(locations: List[Location], api_base: str = API_BASE,
+                    timeout: float = 10) -> Optional[List[Dict[str, Any]]]:
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-    except requests.RequestException as exc:
+        data = get(forecast_url(locations, api_base), timeout=timeout).json()
+    except (HttpError, ValueError) as exc:
         print(f"Weather request failed: {exc}", file=sys.stderr)
         return None
-
-    data = resp.json()
-    if "current_weather" not in data:
+    # A single location comes back as an object, several as a list in request order.
+    results = data if isinstance(data, list) else [data]
+    if len(results) != len(locations):
         print("Weather data not found.", file=sys.stderr)
         return None
+    return results
+
 
-    current = data["current_weather"]
-    temp = round(current.get("temperature", 0))
-    code = current.get("weathercode", -1)
-
-    weather_map = {
-        0: ("☀️", "Clear"),
-        1: ("🌤", "Mostly clear"),
-        2: ("⛅", "Partly cloudy"),
-        3: ("☁️", "Overcast"),
-        45: ("🌫", "Fog"),
-        48: ("🌫", "Rime fog"),
-        51: ("🌦", "Light drizzle"),
-        53: ("🌧", "Drizzle"),
-        55: ("🌧", "Heavy drizzle"),
-        61: ("🌦", "Light rain"),
-        63: ("🌧", "Rain"),
-        65: ("🌧", "Heavy rain"),
-        71: ("🌨", "Light snow"),
-        73: ("🌨", "Snow"),
-        75: ("❄️", "Heavy snow"),
-        80: ("🌦", "Showers"),
-        95: ("⛈", "Thunderstorm"),
-    }
-
-    emoji, desc = weather_map.get(code, ("❔", f"Code {code}"))
-    return f"{emoji}  {temp}\u00B0F {desc}"
+class ForecastCache:
+    """Last fetched current conditions and hourly forecast per coordinate."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_state_path(FORECAST_CACHE_FILE)
+        data = read_json(self.path)
+        self.entries: Dict[str, Dict[str, Any]] = data if isinstance(data, dict) else {}
+
+    def store(self, location: Location, data: Dict[str, Any], fetched: float) -> None:
+        self.entries[location.key] = {
+            "fetched": fetched,
+            "current": data.get("current_weather") or {},
+            "hourly": data.get("hourly") or {},
+        }
+
+    def is_fresh(self, location: Location, now: float, max_age: float) -> bool:
+        entry = self.entries.get(location.key)
+        if not entry or now - entry.get("fetched", 0) > max_age:
+            return False
+        times = entry["hourly"].get("time") or []
+        return bool(times) and times[-1] >= now
+
+    def conditions(self, location: Location, now: float,
+                   max_age: float = MAX_STALE_HOURS * 3600) -> Optional[Tuple[float, int]]:
+        """Temperature and weather code at ``now``: current conditions right after a
+        fetch, the matching hourly forecast slot later on. ``None`` once the entry is
+        older than ``max_age`` or ``now`` is past the last slot."""
+        entry = self.entries.get(location.key)
+        if not entry or now - entry.get("fetched", 0) > max_age:
+            return None
+        current = entry.get("current") or {}
+        if "temperature" in current and now - current.get("time", entry["fetched"]) < SLOT_SECONDS:
+            return current["temperature"], int(current.get("weathercode", -1))
+        hourly = entry.get("hourly") or {}
+        times = hourly.get("time") or []
+        temps = hourly.get("temperature_2m") or []
+        codes = hourly.get("weathercode") or hourly.get("weather_code") or []
+        slot = None
+        for i, t in enumerate(times):
+            if t > now:
+                break
+            slot = i
+        # Each slot covers the hour after it; past the last one there is no forecast.
+        if slot is None or now - times[slot] >= SLOT_SECONDS or slot >= len(temps) or temps[slot] is None:
+            return None
+        return temps[slot], int(codes[slot]) if slot < len(codes) and codes[slot] is not None else -1
+
+    def save(self) -> None:
+        try:
+            write_json_atomic(self.path, self.entries)
+        except OSError:
+            pass
+
+
+@profile.timed()
+def get_weather(lat: float, lon: float, api_base: str = API_BASE) -> Optional[str]:
+    results = fetch_forecasts([Location(f"{lat},{lon}", lat, lon)], api_base)
+    if not results or "current_weather" not in results[0]:
+        return None
+    current = results[0]["current_weather"]
+    return format_weather(current.get("temperature", 0), current.get("weathercode", -1))
 
 
 def build_weather_action(lat: float, lon: float) -> str:
     return f'https://www.google.com/search?q=weather'
-def parse_location(arg: str) -> Optional[tuple[float, float]]:
+
+
+# ---- Locations ----
+def parse_location(arg: str, *, cache: Optional[Dict[str, Any]] = None,
+                   geocode_base: str = GEOCODE_BASE) -> Optional[tuple[float, float]]:
+    """``lat,lon`` or a place name; names are geocoded once and remembered in ``cache``."""
     try:
-        lat = float(arg)
-        lon = float(sys.argv[2])
+        lat, lon = (float(part) for part in arg.split(","))
         return lat, lon
-    except (ValueError, IndexError):
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={arg}&count=1"
+    except ValueError:
+        key = arg.strip().lower()
+        if cache is not None and key in cache:
+            lat, lon = cache[key]
+            return lat, lon
+
+        geo_url = f"{geocode_base.rstrip('/')}/v1/search?name={quote(arg)}&count=1"
         try:
-            geo_resp = requests.get(geo_url, timeout=10)
-            geo_resp.raise_for_status()
-            geo_data = geo_resp.json()
-        except requests.RequestException as exc:
+            with profile.span("geocode"):
+                geo_data = get(geo_url, timeout=10).json()
+        except (HttpError, ValueError) as exc:
             print(f"Geocoding failed: {exc}", file=sys.stderr)
             return None
 
@@ -109,39 +208,124 @@ def parse_location(arg: str) -> Optional[tuple[float, float]]:
 
         result = geo_data["results"][0]
         print(f"Coordinates for '{arg}': {result['latitude']},{result['longitude']}")
+        if cache is not None:
+            cache[key] = [result["latitude"], result["longitude"]]
         return result["latitude"], result["longitude"]
 
 
-def main() -> int:
-    if len(sys.argv) == 3:
+def resolve_locations(specs: List[str], geocode_base: str = GEOCODE_BASE) -> Optional[List[Location]]:
+    """``[well=]place`` specs -> locations; the first defaults to the ``weather`` well."""
+    path = default_state_path(GEOCODE_CACHE_FILE)
+    cache = read_json(path)
+    cache = cache if isinstance(cache, dict) else {}
+    before = len(cache)
+    locations = []
+    for i, spec in enumerate(specs):
+        well, sep, place = spec.partition("=")
+        if not sep:
+            well, place = (TARGET_WELL if i == 0 else f"{TARGET_WELL}-{i + 1}"), spec
+        coords = parse_location(place, cache=cache, geocode_base=geocode_base)
+        if coords is None:
+            return None
+        locations.append(Location(place, coords[0], coords[1], well))
+    if len(cache) != before:
+        try:
+            write_json_atomic(path, cache)
+        except OSError:
+            pass
+    return locations
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Update Traycer weather well(s) from Open-Meteo.",
+        epilog="Legacy form '<latitude> <longitude>' is still accepted.",
+    )
+    p.add_argument("location", nargs="+",
+                   help="'lat,lon' or a place name, optionally 'well=' prefixed; one well per location")
+    p.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE_HOURS,
+                   help="Hours the prefetched hourly forecast is used before refetching (default: %(default)s)")
+    p.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="Well width (default: %(default)s)")
+    p.add_argument("--api-base", default=API_BASE, help="Forecast API base URL (default: %(default)s)")
+    p.add_argument("--geocode-base", default=GEOCODE_BASE, help="Geocoding API base URL (default: %(default)s)")
+    profile.add_arguments(p)
+    args = p.parse_args(argv)
+    if len(args.location) == 2:
         try:
-            lat = float(sys.argv[1])
-            lon = float(sys.argv[2])
+            lat, lon = float(args.location[0]), float(args.location[1])
         except ValueError:
-            print("Latitude/longitude must be numeric.", file=sys.stderr)
-            return 1
-    elif len(sys.argv) == 2:
-        coords = parse_location(sys.argv[1])
-        if coords is None:
-            return 1
-        lat, lon = coords
-    else:
+            pass
+        else:
+            args.location = [f"{lat},{lon}"]
+    return args
+
+
+def run_feed(argv: List[str], client: Optional[TraycerClient] = None) -> int:
+    """Update the well(s) from the forecast cache, fetching only when it is stale;
+    also the ``traycer_daemon`` plugin entry point."""
+    if not argv:
         print("Usage:")
         print("  python weather.py <latitude> <longitude>")
-        print("  python weather.py <zip_or_city>")
+        print("  python weather.py <zip_or_city> [[well=]<lat,lon|place> ...]")
         return 1
+    args = parse_args(argv)
+    with profile.session(args) as profiler:
+        try:
+            return update_wells(args, client)
+        finally:
+            if profiler is not None:
+                settle_sends(client)
+
 
-    weather_text = get_weather(lat, lon)
-    if weather_text is None:
+def update_wells(args: argparse.Namespace, client: Optional[TraycerClient] = None) -> int:
+    locations = resolve_locations(args.location, args.geocode_base)
+    if locations is None:
         return 1
 
-    action = build_weather_action(lat, lon)
-    print(weather_text)
-    send_to_traycer(weather_text, action)
-    return 0
+    cache = ForecastCache()
+    now = time.time()
+    stale = [loc for loc in locations if not cache.is_fresh(loc, now, args.max_age * 3600)]
+    refresh_forecasts(cache, stale, now, args.api_base)
+    # Fresh entries can still lack a slot for now (e.g. gaps in the hourly data): fetch those too.
+    missing = [loc for loc in locations if loc not in stale and cache.conditions(loc, now) is None]
+    refresh_forecasts(cache, missing, now, args.api_base)
 
+    updates = []
+    failed = 0
+    for loc in locations:
+        conditions = cache.conditions(loc, now)
+        if conditions is None:
+            # Don't leave an old reading up as if it were current.
+            failed += 1
+            text = UNAVAILABLE_TEXT
+            print(f"No current weather for {loc.query}.", file=sys.stderr)
+        else:
+            text = format_weather(*conditions)
+            print(text if len(locations) == 1 else f"{loc.query}: {text}")
+        updates.append({"well": loc.well, "text": text, "action": build_weather_action(loc.lat, loc.lon)})
+
+    for loc in locations:
+        ensure_well(args.width, client, loc.well)
+    if len(updates) == 1:
+        send_json({"op": "set", **updates[0]}, client)
+    else:
+        send_json({"op": "bulk", "updates": updates}, client)
+    return 1 if failed else 0
 
-if __name__ == "__main__":
-    raise SystemExit(main())
 
+def refresh_forecasts(cache: ForecastCache, locations: List[Location], now: float, api_base: str) -> None:
+    if not locations:
+        return
+    results = fetch_forecasts(locations, api_base)
+    if results is not None:
+        for loc, data in zip(locations, results):
+            cache.store(loc, data, now)
+        cache.save()
 
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return run_feed(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())